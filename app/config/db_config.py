@@ -1,14 +1,106 @@
 import os
+import time
 from dotenv import load_dotenv
+from sqlalchemy import event, inspect, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+from sqlalchemy.schema import CreateColumn, CreateIndex
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 from typing import AsyncGenerator
 
+from app.services.telemetry import db_pool_wait_seconds, instrument_engine, metrics
+
 load_dotenv()
 
-# Async engine
-engine: AsyncEngine = create_async_engine(os.getenv("DB_URL"), echo=True)
+class TimedQueue(AsyncAdaptedQueue):
+    """Reports how long each `get` took to `on_get`."""
+
+    on_get = None
+
+    def get(self, block=True, timeout=None):
+        start = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            if self.on_get is not None:
+                self.on_get(time.perf_counter() - start)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long callers wait to get a connection. Only the get
+    from the pool's queue is timed, the one place a checkout blocks when every
+    connection is in use; opening a new connection is not waiting for the pool.
+    """
+
+    _queue_class = TimedQueue
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._pool.on_get = self._record_wait
+
+    def _record_wait(self, waited: float):
+        db_pool_wait_seconds.observe(waited)
+        self.wait_count += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def recreate(self):
+        # keep the pool class (and its counters) when the engine is disposed
+        pool = super().recreate()
+        pool.wait_count = self.wait_count
+        pool.wait_seconds_total = self.wait_seconds_total
+        pool.wait_seconds_max = self.wait_seconds_max
+        return pool
+
+def env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+DB_URL = os.getenv("DB_URL")
+
+def engine_kwargs() -> dict:
+    kwargs = {
+        "echo": env_bool("DB_ECHO", False),
+        "poolclass": TimedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": env_bool("DB_POOL_PRE_PING", True),
+    }
+    if DB_URL and DB_URL.startswith("postgresql+asyncpg"):
+        statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+        kwargs["connect_args"] = {
+            # set both to 0 behind pgbouncer in transaction mode
+            "prepared_statement_cache_size": statement_cache_size,
+            "statement_cache_size": statement_cache_size,
+            "server_settings": {"statement_timeout": os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")},
+        }
+    return kwargs
+
+def register_vector_codec(engine: AsyncEngine):
+    """Let asyncpg send/receive vectors in binary instead of parsing text literals."""
+    if engine.dialect.driver != "asyncpg":
+        return
+    from pgvector.asyncpg import register_vector
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def register(dbapi_connection, connection_record):
+        try:
+            dbapi_connection.run_async(register_vector)
+        except ValueError:
+            # extension not created yet (first boot), init_db recycles the pool afterwards
+            pass
+
+# Async engine, the only one in the app (SQLAlchemyMiddleware reuses it)
+engine: AsyncEngine = create_async_engine(DB_URL, **engine_kwargs())
+# statement latency histogram (and DB spans when tracing is on)
+instrument_engine(engine)
+register_vector_codec(engine)
 
 # Session factory
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -18,7 +110,55 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
 
+def pool_stats() -> dict:
+    pool = engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    if isinstance(pool, TimedQueuePool):
+        stats.update({
+            "wait_count": pool.wait_count,
+            "wait_seconds_total": pool.wait_seconds_total,
+            "wait_seconds_max": pool.wait_seconds_max,
+        })
+    return stats
+
+metrics.gauge(
+    "db_pool_connections",
+    "Connection pool usage by state.",
+    lambda: [({"state": state}, pool_stats()[state]) for state in ("size", "checked_in", "checked_out", "overflow")],
+)
+
+def create_missing_columns(conn):
+    # likewise for nullable columns added to existing tables
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {column_ddl}'))
+
+def create_missing_indexes(conn):
+    # create_all only builds indexes together with new tables, so existing deployments
+    # pick up indexes added later here
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
 # Async DB init
 async def init_db():
     async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
\ No newline at end of file
+        if engine.dialect.name == "postgresql":
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(create_missing_columns)
+        await conn.run_sync(create_missing_indexes)
+    # connections opened before the extension existed have no vector codec
+    await engine.dispose()
@@ -1,5 +1,29 @@
 # Inisialisasi model (sama dengan GPT-4o di phi)
-from langchain_groq import ChatGroq
 import os
 
-llm = ChatGroq(model_name="qwen/qwen3-32b", api_key=os.getenv("GROQ_API_KEY"))
\ No newline at end of file
+from app.config.resources import resources
+from app.services.llm_service import LLMClient
+
+
+def create_llm_client(model_name: str) -> LLMClient:
+    from langchain_groq import ChatGroq
+
+    return LLMClient(
+        ChatGroq(model_name=model_name, api_key=os.getenv("GROQ_API_KEY")),
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+        timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "60")),
+        model_name=model_name,
+    )
+
+
+# one shared client per model, used by every router
+resources.register("llm_client", lambda: create_llm_client("qwen/qwen3-32b"))
+resources.register("gemma_llm_client", lambda: create_llm_client("gemma2-9b-it"))
+
+
+def get_llm_client() -> LLMClient:
+    return resources.get("llm_client")
+
+
+def get_gemma_llm_client() -> LLMClient:
+    return resources.get("gemma_llm_client")
@@ -0,0 +1,82 @@
+"""Lazy registry for heavy singletons (models, LLM clients, tools)."""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from app.logger import logger
+
+
+@dataclass
+class ResourceEntry:
+    name: str
+    factory: Callable[[], Any]
+    instance: Any = None
+    loaded: bool = False
+    load_seconds: Optional[float] = None
+    loaded_at: Optional[float] = None
+
+
+class ResourceRegistry:
+    """
+    Heavy objects are registered as factories and only built on first `get` (or when
+    warmed from the lifespan hook). Factories should do their own heavy imports so
+    importing `app.main` stays cheap. The time each factory took, imports included,
+    is kept for `report()`.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, ResourceEntry] = {}
+        self._locks: dict[str, threading.Lock] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        self._entries[name] = ResourceEntry(name=name, factory=factory)
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        entry = self._entries[name]
+        if entry.loaded:
+            return entry.instance
+        with self._locks[name]:
+            if not entry.loaded:
+                start = time.perf_counter()
+                entry.instance = entry.factory()
+                entry.load_seconds = time.perf_counter() - start
+                entry.loaded_at = time.time()
+                entry.loaded = True
+                logger.info("resource loaded", extra={"resource": name, "load_seconds": round(entry.load_seconds, 4)})
+        return entry.instance
+
+    def peek(self, name: str) -> Any:
+        """The instance if it was already built, without building it."""
+        entry = self._entries.get(name)
+        return entry.instance if entry is not None and entry.loaded else None
+
+    def warm(self, names: Iterable[str]):
+        for name in names:
+            self.get(name)
+
+    def names(self) -> list[str]:
+        return list(self._entries)
+
+    def report(self) -> list[dict]:
+        return [
+            {
+                "name": entry.name,
+                "loaded": entry.loaded,
+                "load_seconds": entry.load_seconds,
+                "loaded_at": entry.loaded_at,
+            }
+            for entry in self._entries.values()
+        ]
+
+
+resources = ResourceRegistry()
+
+
+def warm_list(value: str) -> list[str]:
+    """WARM_RESOURCES value -> resource names. 'all' warms everything registered."""
+    if value.strip() == "all":
+        return resources.names()
+    return [name.strip() for name in value.split(",") if name.strip()]
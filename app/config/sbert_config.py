@@ -1,4 +1,70 @@
-from sentence_transformers import SentenceTransformer
+import os
 
+from app.config.resources import resources
+from app.logger import logger
+from app.services import embedding_runtime
 
-sbert_model = SentenceTransformer("all-MiniLM-L6-v2")
\ No newline at end of file
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+
+
+def load_sbert_model():
+    """
+    The embedding model on the EMBEDDING_RUNTIME (torch, onnx or onnx-int8).
+
+    An ONNX runtime is only used when it loads and its vectors agree with fp32 torch
+    (min cosine >= EMBEDDING_MIN_COSINE on a fixed sentence set), otherwise torch is
+    used. The agreement is cached next to the exported file, so later workers skip
+    loading the torch reference.
+    """
+    runtime = os.getenv("EMBEDDING_RUNTIME", "torch")
+    threads = int(os.getenv("EMBEDDING_THREADS", "0"))
+    root = os.getenv("EMBEDDING_ONNX_DIR", "app/model/onnx")
+    quantization_config = os.getenv("EMBEDDING_QUANTIZATION_CONFIG", "avx2")
+    min_cosine = float(os.getenv("EMBEDDING_MIN_COSINE", "0.98"))
+    validate = os.getenv("EMBEDDING_VALIDATE", "true").lower() in ("1", "true", "yes")
+
+    if runtime == "torch":
+        return embedding_runtime.load_model(EMBEDDING_MODEL_NAME, "torch", threads)
+    try:
+        candidate = embedding_runtime.load_model(EMBEDDING_MODEL_NAME, runtime, threads, root, quantization_config)
+    except Exception as e:
+        logger.warning("embedding runtime unavailable, using torch", extra={"runtime": runtime, "error": str(e)})
+        return embedding_runtime.load_model(EMBEDDING_MODEL_NAME, "torch", threads)
+    # a different width could not be stored next to the existing Vector(384) embeddings
+    embedding_runtime.check_dimension(candidate, runtime)
+    if not validate:
+        return candidate
+
+    marker = embedding_runtime.validation_marker(EMBEDDING_MODEL_NAME, runtime, root, quantization_config)
+    agreement = embedding_runtime.read_validation(marker)
+    reference = None
+    if agreement is None:
+        reference = embedding_runtime.load_model(EMBEDDING_MODEL_NAME, "torch", threads)
+        agreement = embedding_runtime.cosine_agreement(
+            embedding_runtime.encode_validation(reference), embedding_runtime.encode_validation(candidate)
+        )
+        embedding_runtime.write_validation(marker, agreement)
+    if agreement["min_cosine"] < min_cosine:
+        logger.warning(
+            "embedding runtime disagrees with torch, using torch",
+            extra={"runtime": runtime, "min_cosine": agreement["min_cosine"], "threshold": min_cosine},
+        )
+        return reference or embedding_runtime.load_model(EMBEDDING_MODEL_NAME, "torch", threads)
+    logger.info("embedding runtime loaded", extra={"runtime": runtime, **agreement})
+    return candidate
+
+
+def load_embedding_model():
+    # remote: the model lives in app/embedding_server.py, once per pod instead of once per worker
+    if os.getenv("EMBEDDING_BACKEND", "local") == "remote":
+        from app.services.remote_embedding import RemoteEmbeddingModel
+
+        return RemoteEmbeddingModel.from_env()
+    return load_sbert_model()
+
+
+resources.register("sbert_model", load_embedding_model)
+
+
+def get_sbert_model():
+    return resources.get("sbert_model")
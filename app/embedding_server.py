@@ -0,0 +1,77 @@
+"""
+Embedding server: loads the sentence-transformers model once and serves every API worker.
+
+Run one per pod (a sidecar), then point the API at it with EMBEDDING_BACKEND=remote:
+
+    uv run uvicorn app.embedding_server:app --uds /tmp/embedding.sock
+    EMBEDDING_BACKEND=remote EMBEDDING_SERVER_SOCKET=/tmp/embedding.sock uv run uvicorn app.main:app --workers 4
+
+Requests from all workers go through one micro-batcher, so concurrent calls share
+`encode` batches. Vectors come back as a float32 frame (see app/services/remote_embedding.py).
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response
+
+from app.config.sbert_config import load_sbert_model
+from app.logger import logger
+from app.services.micro_batcher import MicroBatcher
+from app.services.remote_embedding import FRAME_MEDIA_TYPE, encode_frame
+from app.services.telemetry import metrics
+
+MAX_TEXTS_PER_REQUEST = int(os.getenv("EMBEDDING_SERVER_MAX_TEXTS", "1024"))
+
+model = None
+
+
+def encode_batch(texts: list[str]) -> list[np.ndarray]:
+    return list(model.encode(texts, batch_size=len(texts), convert_to_numpy=True))
+
+
+batcher: MicroBatcher[str, np.ndarray] = MicroBatcher(
+    encode_batch,
+    max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64")),
+    max_wait_ms=float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5")),
+    name="embedding-server",
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global model
+    model = await asyncio.to_thread(load_sbert_model)
+    logger.info("embedding server ready", extra={"pid": os.getpid()})
+    yield
+    await batcher.close()
+
+
+app = FastAPI(title="Embedding server", lifespan=lifespan)
+
+
+@app.post("/embed", response_class=Response)
+async def embed(request: Request):
+    texts = await request.json()
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        raise HTTPException(status_code=422, detail="body must be a JSON array of strings")
+    if len(texts) > MAX_TEXTS_PER_REQUEST:
+        raise HTTPException(status_code=413, detail=f"at most {MAX_TEXTS_PER_REQUEST} texts per request")
+    vectors = await batcher.submit_many(texts) if texts else []
+    frame = encode_frame(np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32))
+    return Response(frame, media_type=FRAME_MEDIA_TYPE)
+
+
+@app.get("/health")
+async def health():
+    if model is None:
+        raise HTTPException(status_code=503, detail="model loading")
+    return {"status": "ok", **batcher.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,13 +1,42 @@
+import atexit
+import datetime
+import json
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# attributes every LogRecord has; anything else came in through `extra=`
+RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread untouched, formatting happens off the event loop."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 # Get logger
 logger = logging.getLogger()
 
 # Create formattter
-formatter = logging.Formatter(
-    fmt="%(asctime)s - %(levelname)s - %(message)s"
-)
+formatter = JsonFormatter()
 
 # Create handlers
 stream_handler = logging.StreamHandler(sys.stdout)
@@ -17,8 +46,14 @@ stream_handler.setFormatter(formatter)
 file_handler = logging.FileHandler('app.log')
 file_handler.setFormatter(formatter)
 
+# stdout and file writes run on the listener thread, callers only enqueue
+log_queue: queue.Queue = queue.Queue(-1)
+queue_listener = QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+queue_listener.start()
+atexit.register(queue_listener.stop)
+
 # Add handler to logger
-logger.handlers = [stream_handler, file_handler]
+logger.handlers = [NonBlockingQueueHandler(log_queue)]
 
 # set log level
-logger.setLevel(logging.INFO)
\ No newline at end of file
+logger.setLevel(logging.INFO)
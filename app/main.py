@@ -2,19 +2,25 @@ from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, Security
-from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer  # security scheme
 from fastapi_mcp import FastApiMCP
-from app.config.db_config import init_db
-from app.routers import agent, chatbot, predict, mcp, chat_services, project_routes, ticket_agentic_services, unit_routes
+import asyncio
+from app.config.db_config import engine, init_db
+from app.config.resources import resources, warm_list
+from app.services.article_fetcher import article_fetcher
+from app.services.chat_summary import cancel_summary_refreshes
+from app.services.embedding_service import embedding_service
+from app.services.remote_embedding import EmbeddingServerUnavailable
+from app.services.telemetry import loop_lag_monitor
+from app.routers import agent, chatbot, predict, mcp, chat_services, metrics_routes, project_routes, ticket_agentic_services, unit_routes
 from .logger import logger
 from .middleware import Middleware
 from fastapi_async_sqlalchemy import SQLAlchemyMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 import app.model
-from app.workflow.ticket_trans_graph import ticket_trans_workflow
-from IPython.display import Image, display
-import io
+from app.workflow.ticket_trans_graph import ticket_trans_workflow_png
 
 load_dotenv()
 
@@ -25,7 +31,22 @@ API_TOKEN = os.getenv("API_TOKEN")
 @asynccontextmanager
 async def lifespan(app:FastAPI):
     await init_db()
+    # everything else loads on first use
+    await asyncio.to_thread(resources.warm, warm_list(os.getenv("WARM_RESOURCES", "")))
+    logger.info("resources ready", extra={"resources": resources.report()})
+    loop_lag_monitor.start()
     yield
+    await loop_lag_monitor.stop()
+    await embedding_service.close()
+    await article_fetcher.close()
+    await cancel_summary_refreshes()
+    chat_memory = resources.peek("chat_memory")
+    if chat_memory is not None:
+        await asyncio.to_thread(chat_memory.close)
+    if predict.predict_batcher is not None:
+        await predict.predict_batcher.close()
+    await asyncio.to_thread(predict.iris_registry.stop_polling)
+    await engine.dispose()
 
 app = FastAPI(
     title="AI Agentic API",
@@ -41,17 +62,25 @@ routes = [
     chat_services.router,
     project_routes.router,
     unit_routes.router,
-    ticket_agentic_services.router
+    ticket_agentic_services.router,
+    metrics_routes.router,
+    mcp.router
 ]
 
 for i in routes:
     app.include_router(i)
 
+@app.exception_handler(EmbeddingServerUnavailable)
+async def embedding_server_unavailable(request, exc: EmbeddingServerUnavailable):
+    # routes without their own mapping, e.g. code matching in the ticket workflow
+    logger.warning("embedding server unavailable", extra={"path": request.url.path, "error": str(exc)})
+    return JSONResponse(status_code=503, content={"detail": "Embedding server unavailable"})
+
 app.add_middleware(Middleware)
 
 app.add_middleware(
     SQLAlchemyMiddleware,
-    db_url=os.getenv("DB_URL"),
+    custom_engine=engine,
 )
 
 app.add_middleware(
@@ -64,6 +93,7 @@ app.add_middleware(
         allow_credentials=True,
         allow_methods=['*'],
         allow_headers=['*'],
+        expose_headers=['X-Next-Cursor'],
 )
 # Create an MCP server based on this app
 mcp = FastApiMCP(
@@ -83,8 +113,8 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(security))
 @app.get("/")
 async def root():
     logger.info('Request to index page')
-    return StreamingResponse(
-        io.BytesIO(ticket_trans_workflow.get_graph().draw_mermaid_png()),
+    return Response(
+        await run_in_threadpool(ticket_trans_workflow_png),
         media_type="image/png",
         headers={"Content-Disposition": "inline; filename=workflow.png"}
     )
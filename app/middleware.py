@@ -1,37 +1,115 @@
-from fastapi import Request, HTTPException
+import hmac
+import math
+import os
+import time
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from .logger import logger
-from starlette.middleware.base import BaseHTTPMiddleware
-import time
+from .services.prompt_budget import request_usage
+from .services.rate_limiter import RateLimiter, create_rate_limiter
+from .services.telemetry import http_request_seconds, server_span
+
+def client_identity(scope: Scope, api_token: str | None = None) -> str:
+    # rate limit per client IP; every client shares API_TOKEN, so requests carrying it get
+    # a bucket of their own per IP rather than one for all of them, and made-up bearer
+    # values stay in the IP's bucket so they can't open a fresh one on every request
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    if api_token:
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization" and value[:7].lower() == b"bearer ":
+                if hmac.compare_digest(value[7:], api_token.encode()):
+                    return "token:" + ip
+                break
+    return "ip:" + ip
+
+def route_template(scope: Scope) -> str:
+    # FastAPI stores the matched route in the scope, e.g. /chat/start-chat/{id}
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope["path"]
+
+class Middleware:
+    """
+    Pure ASGI rate limiting and access logging.
 
-class Middleware(BaseHTTPMiddleware):
-    def __init__(self, app, throttle_rate: int = 60):
-        super().__init__(app)
-        self.throttle_rate = throttle_rate
-        self.request_log = {}  # Track timestamps per IP
+    Unlike BaseHTTPMiddleware it does not wrap the app in an extra task or re-stream the
+    body, so streaming responses pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        throttle_rate: int | None = None,
+        rate_limiter: RateLimiter | None = None,
+        api_token: str | None = None,
+    ):
+        self.app = app
+        self.rate_limiter = rate_limiter or create_rate_limiter(throttle_rate)
+        self.api_token = api_token if api_token is not None else os.getenv("API_TOKEN")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         # Rate limiting logic
-        client_ip = request.client.host
-        now = time.time()
-        self.request_log = {
-            ip: [ts for ts in times if ts > now - 60]
-            for ip, times in self.request_log.items()
-        }
-        ip_history = self.request_log.get(client_ip, [])
-        if len(ip_history) >= self.throttle_rate:
-            raise HTTPException(status_code=429, detail="Too many requests")
-        ip_history.append(now)
-        self.request_log[client_ip] = ip_history
+        try:
+            rule, result = await self.rate_limiter.check(client_identity(scope, self.api_token), scope["path"])
+        except Exception as e:
+            # a limiter outage (e.g. Redis down) lets requests through rather than failing them all
+            logger.warning("rate limiter unavailable, request not limited", extra={"path": scope["path"], "error": str(e)})
+            result = None
+        if result is not None and not result.allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={
+                    "Retry-After": str(math.ceil(result.retry_after)),
+                    "X-RateLimit-Limit": str(rule.limit),
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+            await response(scope, receive, send)
+            return
 
         # Logging logic
-        start = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start
-        log_dict = {
-            'url': request.url.path,
-            'method': request.method,
-            'process_time': process_time
-        }
-        logger.info(log_dict, extra=log_dict)
-        return response
\ No newline at end of file
+        start = time.perf_counter()
+        status_code = 500
+        bytes_out = 0
+        usage = {"tokens_in": 0, "tokens_out": 0}
+        usage_token = request_usage.set(usage)
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, bytes_out
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                bytes_out += len(message.get("body", b""))
+            await send(message)
+
+        with server_span(scope) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                request_usage.reset(usage_token)
+                process_time = time.perf_counter() - start
+                route = route_template(scope)
+                # unmatched paths share one series, so random 404s can't blow up cardinality
+                http_request_seconds.observe(
+                    process_time, method=scope["method"], route=route if "route" in scope else "unmatched", status=status_code
+                )
+                if span is not None:
+                    span.update_name(f'{scope["method"]} {route}')
+                    span.set_attribute("http.route", route)
+                    span.set_attribute("http.response.status_code", status_code)
+                log_dict = {
+                    'url': scope["path"],
+                    'route': route,
+                    'method': scope["method"],
+                    'status_code': status_code,
+                    'bytes_out': bytes_out,
+                    'process_time': process_time,
+                    **usage,
+                }
+                logger.info('request', extra=log_dict)
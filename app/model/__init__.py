@@ -2,6 +2,7 @@ from .dummy_project import DummyProject
 from .dummy_unit import DummyUnit
 from .chat_session import ChatSession
 from .chat_content import ChatContent
+from .semantic_cache import SemanticCacheEntry
 
 
 # ChatSession.model_rebuild()
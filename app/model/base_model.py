@@ -1,10 +1,14 @@
 import datetime
+import re
 from sqlmodel import SQLModel as _SQLModel, Field
 from stringcase import snakecase
 from sqlalchemy.orm import declared_attr
 
 import ulid
 
+# Crockford base32, 48-bit timestamp first so the ids sort by creation time
+ULID_PATTERN = re.compile(r"[0-7][0-9A-HJKMNP-TV-Z]{25}")
+
 class SQLModel(_SQLModel):
     @declared_attr
     def __tablename__(cls):
@@ -13,6 +17,9 @@ class SQLModel(_SQLModel):
 def generate_ulid() -> str:
     return str(ulid.ulid())
 
+def is_ulid(value: str) -> bool:
+    return ULID_PATTERN.fullmatch(value) is not None
+
 class BaseULIDModel(SQLModel):
     id:str | None = Field(
         default_factory=generate_ulid,
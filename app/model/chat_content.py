@@ -1,17 +1,17 @@
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from sqlmodel import Field, Relationship, SQLModel
 from app.model.base_model import BaseModel
+from app.model.native_vector import NativeVector
 from typing import TYPE_CHECKING, Optional
 if TYPE_CHECKING:
     from app.model.chat_session import ChatSession
 
 class ChatContentBase(SQLModel):
-    chat_session_id:str = Field(nullable=False, foreign_key="chat_session.id")
+    chat_session_id:str = Field(nullable=False, foreign_key="chat_session.id", index=True)
     content:str = Field(nullable=False)
     embedding: Optional[list[float]] = Field(
         default=None,
-        sa_column=Column(Vector(384), nullable=True)
+        sa_column=Column(NativeVector(384), nullable=True)
     )
     role:str = Field(nullable=False)
 
@@ -24,4 +24,16 @@ class ChatContentFullBase(ChatContentBase, BaseModel):
 
 class ChatContent(ChatContentFullBase, table=True):
     __tablename__="chat_content"
+    __table_args__ = (
+        # chat history pages and new messages since a summary's high-water mark, in order
+        Index("ix_chat_content_session_created_at_id", "chat_session_id", "created_at", "id"),
+        # retrieval orders by negative inner product (<#>), so the ANN index uses vector_ip_ops
+        Index(
+            "ix_chat_content_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_ip_ops"},
+        ),
+    )
     chat_session:'ChatSession' = Relationship(back_populates="chat_content", sa_relationship_kwargs={'lazy': 'select'})
\ No newline at end of file
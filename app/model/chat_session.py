@@ -1,13 +1,16 @@
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.model.base_model import BaseULIDModel
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from app.model.chat_content import ChatContent
 
 class ChatSessionBase(SQLModel):
     title: str = Field(nullable=True, default=None)
+    # rolling summary of the chat_content rows up to and including summary_until (a chat_content id)
+    summary: Optional[str] = Field(nullable=True, default=None)
+    summary_until: Optional[str] = Field(nullable=True, default=None, max_length=26)
 
 class ChatSessionFullBase(ChatSessionBase, BaseULIDModel):
     pass
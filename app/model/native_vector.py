@@ -0,0 +1,24 @@
+import numpy as np
+from pgvector.sqlalchemy import Vector
+
+
+class NativeVector(Vector):
+    """
+    pgvector column type that hands float32 arrays straight to asyncpg.
+
+    The stock type renders every vector to a '[0.1, ...]' string that Postgres parses
+    back. With the asyncpg codec from `db_config` registered, the array is sent in
+    pgvector's binary format instead. Other drivers keep the text path.
+    """
+
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        if dialect.driver != "asyncpg":
+            return super().bind_processor(dialect)
+
+        def process(value):
+            if value is None:
+                return None
+            return np.asarray(value, dtype=np.float32)
+        return process
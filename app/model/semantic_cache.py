@@ -0,0 +1,27 @@
+import datetime
+from typing import Any, Optional
+from sqlalchemy import JSON, Column
+from sqlmodel import Field, SQLModel
+
+from app.model.base_model import BaseULIDModel
+from app.model.native_vector import NativeVector
+
+
+class SemanticCacheEntryBase(SQLModel):
+    namespace: str = Field(nullable=False, index=True)
+    question: str = Field(nullable=False)
+    embedding: Optional[list[float]] = Field(
+        default=None,
+        sa_column=Column(NativeVector(384), nullable=False)
+    )
+    response: dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    hits: int = Field(default=0, nullable=False)
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.now, nullable=False)
+    last_hit_at: datetime.datetime = Field(default_factory=datetime.datetime.now, nullable=False)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+class SemanticCacheEntry(SemanticCacheEntryBase, BaseULIDModel, table=True):
+    __tablename__ = "semantic_cache"
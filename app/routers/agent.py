@@ -1,20 +1,20 @@
 """Agents router: Generate NYT-style articles using LangChain and OpenAI."""
 
-from enum import Enum
-import os
 from dotenv import load_dotenv
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 
-from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain_groq import ChatGroq
+import asyncio
 from datetime import datetime
-from newspaper import Article
 
+from app.config.llm_config import get_gemma_llm_client
+from app.config.resources import resources
 from app.schemas.ticket_trans_schema import TicketTransSch
+from app.services.article_fetcher import article_fetcher
+from app.services.embedding_service import embedding_service
+from app.services.prompt_budget import count_tokens, trim_sources
 
 load_dotenv()
 
@@ -24,30 +24,23 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
-# Inisialisasi model (sama dengan GPT-4o di phi)
-llm = ChatGroq(model_name="gemma2-9b-it", api_key=os.getenv("GROQ_API_KEY"))
-
 # Langkah 1: Cari artikel dari DuckDuckGo
-search_tool = DuckDuckGoSearchResults()
+def load_search_tool():
+    from langchain_community.tools import DuckDuckGoSearchResults
+
+    return DuckDuckGoSearchResults(output_format="list")
+
+resources.register("search_tool", load_search_tool)
 
 def search_links(topic, num_results=5):
-    results = search_tool.run(topic)
-    links = [r['href'] for r in results[:num_results] if 'href' in r]
-    return links
-
-# Langkah 2: Ambil isi artikel dari setiap link
-def extract_articles(links):
-    articles = []
-    for url in links:
-        try:
-            article = Article(url)
-            article.download()
-            article.parse()
-            if article.text:
-                articles.append(f"[{article.title}]({url})\n\n{article.text}")
-        except Exception:
-            continue
-    return "\n\n---\n\n".join(articles)
+    results = resources.get("search_tool").run(topic)
+    links = [r.get('link') or r.get('href') for r in results[:num_results]]
+    return [link for link in links if link]
+
+# Langkah 2: Ambil isi artikel dari setiap link, paralel dengan batas waktu
+async def extract_articles(links):
+    articles = await article_fetcher.fetch_many(links)
+    return [article.as_source() for article in articles]
 
 # Langkah 3: Prompt untuk membuat artikel ala NYT
 prompt_template = PromptTemplate(
@@ -69,7 +62,12 @@ Format in clear Markdown.
 )
 
 # Chain
-chain = LLMChain(llm=llm, prompt=prompt_template)
+def load_article_chain():
+    from langchain.chains import LLMChain
+
+    return LLMChain(llm=get_gemma_llm_client().llm, prompt=prompt_template)
+
+resources.register("article_chain", load_article_chain)
 
 class ArticleRequest(BaseModel):
     topic: str
@@ -82,11 +80,20 @@ async def generate_article_api(req: ArticleRequest):
     """
     topic = req.topic
     num_results = req.num_results
-    links = search_links(topic, num_results)
-    content = extract_articles(links)
-    if not content:
+    llm_client = get_gemma_llm_client()
+    # keep the paragraphs closest to the topic that fit next to the template
+    budget = llm_client.input_budget - count_tokens(prompt_template.template) - count_tokens(topic) - 16
+    if budget <= 0:
+        return {"error": "Topic is too long for the model's context."}
+    links = await asyncio.to_thread(search_links, topic, num_results)
+    sources = await extract_articles(links)
+    if not sources:
         return {"error": "Failed to extract article content from any links."}
-    response = chain.invoke({"topic":topic, "content":content, "date":datetime.now().strftime("%B %d, %Y")})
+    content = "\n\n---\n\n".join(await trim_sources(sources, budget, topic, embedding_service.encode_many))
+    try:
+        response = await llm_client.arun(resources.get("article_chain"), {"topic":topic, "content":content, "date":datetime.now().strftime("%B %d, %Y")})
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="LLM request timed out")
     return {"article": str(response)}
 
 class SimplePromptRequest(BaseModel):
@@ -97,5 +104,8 @@ async def json_builder_api(req:SimplePromptRequest):
     """
     Generate new JSON format
     """
-    response = llm.with_structured_output(TicketTransSch).invoke(req.prompt)
+    try:
+        response = await get_gemma_llm_client().ainvoke_structured(TicketTransSch, req.prompt)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="LLM request timed out")
     return response
\ No newline at end of file
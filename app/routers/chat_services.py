@@ -1,108 +1,195 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
+import os
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import asc, desc, select
-from app.config.db_config import get_session
+from sqlmodel import select
+from app.config.db_config import async_session_maker, get_session
 from app.model.chat_content import ChatContent
 from app.model.chat_session import ChatSession
 from app.schemas.chat_content_schema import ChatContentSchema
 from app.schemas.chat_schema import ChatRequest, ChatResponse, ChatSummary
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage
-from app.config.llm_config import llm
-from app.config.sbert_config import sbert_model
-from sqlalchemy.orm import selectinload
-from app.schemas.chat_session_schema import ChatSessionSchema
+from app.config.llm_config import get_llm_client
+from app.services.embedding_service import embedding_service
+from app.schemas.chat_session_schema import ChatSessionListSchema, ChatSessionSchema
+from app.services.chat_retrieval import retrieve_similar_content
+from app.services.remote_embedding import EmbeddingServerUnavailable
+from app.services.pagination import fetch_page, keyset, ndjson_response, set_next_cursor
 from app.services.chat_service import start_new_chat
+from app.services.chat_summary import SessionNotFound, schedule_summary_refresh, summarize_session
+from app.services.prompt_budget import fit_ranked, message_tokens
+from app.services.streaming_service import sse_response, stream_llm_answer
 
 router=APIRouter(
     prefix="/chat",
     tags=["chat"],
 )
 
+# most similar past messages considered for the prompt, as many as fit the budget are used
+RETRIEVAL_CANDIDATES = int(os.getenv("PROMPT_RETRIEVAL_CANDIDATES", "5"))
+
+# listings select these columns only, the 384-float embedding is never read
+SESSION_COLUMNS = (ChatSession.id, ChatSession.title, ChatSession.summary, ChatSession.summary_until)
+CONTENT_COLUMNS = (
+    ChatContent.id, ChatContent.chat_session_id, ChatContent.content, ChatContent.role,
+    ChatContent.created_by, ChatContent.updated_by, ChatContent.created_at, ChatContent.updated_at,
+)
+# the question and answer of a turn share a millisecond, where ULIDs do not keep their order
+SESSION_ORDER = (ChatSession.id,)
+CONTENT_ORDER = (ChatContent.created_at, ChatContent.id)
+
 @router.post("/start-chat", response_model=ChatResponse, summary="Start new AI chat session")
 async def start_chat(request: ChatRequest, db: AsyncSession = Depends(get_session)):
     response= await start_new_chat(request, db, ChatResponse)
     return response
 
+async def build_session_prompt(db: AsyncSession, id: str, question: str, question_embedding=None):
+    if question_embedding is None:
+        question_embedding = await embedding_service.encode(question)
+
+    result_data:list[ChatContent] = await retrieve_similar_content(db, id, question_embedding, limit=RETRIEVAL_CANDIDATES)
+
+    messages = list(map(lambda x: HumanMessage(content=x.content) if x.role == "human" else AIMessage(content=x.content), result_data))
+    question_message = HumanMessage(content=question)
+    # most similar first, keep what fits the model's context
+    messages = fit_ranked(messages, get_llm_client().input_budget - message_tokens(question_message))
+
+    prompt_history=ChatPromptTemplate.from_messages([
+        *messages,
+        MessagesPlaceholder(variable_name="question"),
+    ])
+    return prompt_history.invoke({"question": [question_message]})
+
+async def save_chat_turn(db: AsyncSession, id: str, question: str, answer: str, question_embedding=None):
+    if question_embedding is None:
+        question_embedding, answer_embedding = await embedding_service.encode_many([question, answer])
+    else:
+        answer_embedding = await embedding_service.encode(answer)
+    db.add_all([
+        ChatContent(chat_session_id=id, content=question, role="human", embedding=question_embedding),
+        ChatContent(chat_session_id=id, content=answer, role="ai", embedding=answer_embedding)
+    ])
+    await db.commit()
+    schedule_summary_refresh(id)
+
 @router.post("/start-chat/{id}", response_model=ChatResponse, summary="Continue AI chat session")
 async def continue_chat(request: ChatRequest, id: str, db: AsyncSession = Depends(get_session)):
     try:
-        new_query = text("""
-            select * from chat_content c
-            where c.chat_session_id= :chat_session_id
-            ORDER BY c.embedding <#> :embedding_vector
-            LIMIT 5""")
-
-        result=await db.execute(new_query, {
-            "chat_session_id":id,
-            "embedding_vector": f"[{', '.join(map(str, sbert_model.encode(request.question).tolist()))}]" 
-        })
-        
-        
-        result_data:list[ChatContent] = result.all()
-
-        messages = list(map(lambda x: HumanMessage(content=x.content) if x.role == "human" else AIMessage(content=x.content), result_data))
+        # not served from the semantic cache: the answer depends on this session's history
+        question_embedding = await embedding_service.encode(request.question)
+        formatted_prompt = await build_session_prompt(db, id, request.question, question_embedding)
+        answer:ChatResponse=await get_llm_client().ainvoke_structured(ChatResponse, formatted_prompt)
 
-        prompt_history=ChatPromptTemplate.from_messages([
-            *messages,
-            MessagesPlaceholder(variable_name="question"),
-        ])
-        formatted_prompt= prompt_history.invoke({"question": [HumanMessage(content=request.question)]})
-        answer:ChatResponse=llm.with_structured_output(ChatResponse).invoke(formatted_prompt)
-        
-        db.add_all([
-            ChatContent(chat_session_id=id, content=request.question, role="human", embedding=sbert_model.encode(request.question)),
-            ChatContent(chat_session_id=id, content=answer.long_answer, role="ai", embedding=sbert_model.encode(answer.long_answer))
-        ])
-        
-        await db.commit()
-        db.close()
+        await save_chat_turn(db, id, request.question, answer.long_answer, question_embedding)
         
         return answer
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="LLM request timed out")
+    except EmbeddingServerUnavailable:
+        await db.rollback()
+        raise HTTPException(status_code=503, detail="Embedding server unavailable")
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/start-chat/{id}/stream", summary="Continue AI chat session, streaming tokens as Server-Sent Events")
+async def continue_chat_stream(request: ChatRequest, id: str, http_request: Request, db: AsyncSession = Depends(get_session)):
+    try:
+        question_embedding = await embedding_service.encode(request.question)
+        formatted_prompt = await build_session_prompt(db, id, request.question, question_embedding)
+    except EmbeddingServerUnavailable:
+        raise HTTPException(status_code=503, detail="Embedding server unavailable")
     except Exception as e:
-        db.rollback()
-        db.close()
         raise HTTPException(status_code=500, detail=str(e))
+
+    async def persist(answer: str):
+        # the request-scoped session is gone once the response starts streaming
+        async with async_session_maker() as session:
+            await save_chat_turn(session, id, request.question, answer, question_embedding)
+        return {"long_answer": answer}
+
+    return sse_response(stream_llm_answer(http_request, get_llm_client(), formatted_prompt, persist))
     
 @router.get("/chat-summary/{id}", response_model=ChatSummary, summary="Summarize prompt")
 async def summarize_chat(id: str, db: AsyncSession = Depends(get_session)):
+    """
+    The summary is stored on the session together with the last message it covers,
+    so only messages added since then are sent to the model.
+    """
     try:
-        query = select(ChatContent).where(ChatContent.chat_session_id == id).order_by(desc(ChatContent.created_at))
-        messages = list(map(lambda x: HumanMessage(content=x.content) if x.role == "human" else AIMessage(content=x.content), await db.scalars(query)))
-        prompt_history=ChatPromptTemplate.from_messages([
-            *messages,
-            MessagesPlaceholder(variable_name="question"),
-            
-        ])
-        answer:ChatSummary=llm.with_structured_output(ChatSummary).invoke(prompt_history.invoke({"question": [HumanMessage(content='Please summarize above prompts')]}))
-        return answer
+        return await summarize_session(db, id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="LLM request timed out")
     except Exception as e:
-        db.rollback()
-        db.close()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/chat-session", response_model=list[ChatSession], summary="Get all chat session")
-async def get_chat_session(db: AsyncSession = Depends(get_session)):
+@router.get("/chat-session", response_model=list[ChatSessionListSchema], summary="Get all chat session")
+async def get_chat_session(
+    response: Response,
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    format: Literal["json", "ndjson"] = "json",
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Sessions in creation order, `limit` per page. `format=ndjson` streams every
+    session after `after` instead, for exports.
+    """
+    query = select(*SESSION_COLUMNS)
     try:
-        return await db.scalars(select(ChatSession))
+        if format == "ndjson":
+            return ndjson_response(keyset(query, SESSION_ORDER, after), ChatSessionListSchema)
+        rows, cursor = await fetch_page(db, query, SESSION_ORDER, after, limit)
+        set_next_cursor(response, cursor)
+        return [dict(row._mapping) for row in rows]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    5
+
 @router.get("/chat-session/{id}", response_model=ChatSessionSchema, summary='Get chat session by ID')
-async def get_chat_session_by_id(id, db:AsyncSession=Depends(get_session)):
+async def get_chat_session_by_id(
+    id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500, description="Messages included; page further through /chat/chat-history"),
+    db: AsyncSession = Depends(get_session),
+):
     try:
-        query = select(ChatSession).where(ChatSession.id==id).options(selectinload(ChatSession.chat_content))
-        result= await db.execute(query)
-        return result.scalar_one_or_none()
+        session = (await db.execute(select(ChatSession.id, ChatSession.title).where(ChatSession.id==id))).one_or_none()
+        if session is not None:
+            rows, cursor = await fetch_page(db, select(*CONTENT_COLUMNS).where(ChatContent.chat_session_id == id), CONTENT_ORDER, None, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    set_next_cursor(response, cursor)
+    return {**session._mapping, "chat_content": [dict(row._mapping) for row in rows]}
 
 @router.get("/chat-history/{id}", response_model=list[ChatContentSchema], summary="Get chat history based on session ID")
-async def get_chat_history(id: str, db: AsyncSession = Depends(get_session)):
+async def get_chat_history(
+    id: str,
+    response: Response,
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    format: Literal["json", "ndjson"] = "json",
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Messages oldest first, `limit` per page. `format=ndjson` streams the whole history
+    after `after` through a server-side cursor, so memory stays flat for any session size.
+    """
+    query = select(*CONTENT_COLUMNS).where(ChatContent.chat_session_id == id)
     try:
-        query = select(ChatContent).where(ChatContent.chat_session_id == id).order_by(asc(ChatContent.created_at))
-        return await db.scalars(query)
+        if format == "ndjson":
+            return ndjson_response(keyset(query, CONTENT_ORDER, after), ChatContentSchema)
+        rows, cursor = await fetch_page(db, query, CONTENT_ORDER, after, limit)
+        set_next_cursor(response, cursor)
+        return [dict(row._mapping) for row in rows]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))        
-
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,18 @@
 """Chatbot router: Simple generative AI using LangChain for text-to-response."""
 
 import os
-import json
 from dotenv import load_dotenv
-from fastapi import APIRouter, HTTPException
-from langchain_groq import ChatGroq
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage
 
-from app.schemas.chat_schema import ChatRequest, ChatResponse
+from app.config.llm_config import get_gemma_llm_client
+from app.config.resources import resources
+from app.schemas.chat_schema import ChatbotRequest, ChatResponse
+from app.services.chat_memory import create_chat_memory_store
+from app.services.prompt_budget import fit_recent, message_tokens
+from app.services.streaming_service import sse_response, stream_llm_answer
 
 load_dotenv()
 
@@ -19,42 +22,64 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
-llm = ChatGroq(
-    model="gemma2-9b-it",
-    api_key=os.getenv("GROQ_API_KEY"))
+# latest messages read per request, trimmed further to the model's budget
+HISTORY_WINDOW = int(os.getenv("CHAT_MEMORY_WINDOW", "50"))
 
-with open("app/memory/chat-history.json") as f:
-    data = json.load(f)
+resources.register("chat_memory", create_chat_memory_store)
+
+async def build_history_prompt(session_id: str, question: str):
+    history = await resources.get("chat_memory").window(session_id, HISTORY_WINDOW)
+    messages = list(map(lambda x: HumanMessage(content=x["content"]) if x["role"] == "human" else AIMessage(content=x["content"]), history))
+    question_message = HumanMessage(content=question)
+    # only the latest turns that fit the model's context
+    messages = fit_recent(messages, get_gemma_llm_client().input_budget - message_tokens(question_message))
+    prompt_history = ChatPromptTemplate.from_messages(
+        [
+            *messages,
+            MessagesPlaceholder(variable_name="question"),
+        ]
+    )
+    return prompt_history.invoke({"question": [question_message]})
+
+async def save_history(session_id: str, question: str, answer: str):
+    await resources.get("chat_memory").append(session_id, [
+        {"role": "human", "content": question},
+        {"role": "ai", "content": answer},
+    ])
 
 # simple chatbot with message history
 @router.post("/ask", response_model=ChatResponse, summary="Ask chatbot a question")
-async def ask_question(request: ChatRequest):
+async def ask_question(request: ChatbotRequest):
     """
     Ask a question to the generative AI chatbot.
     """
     try:
-        messages = list(map(lambda x: HumanMessage(content=x["content"]) if x["role"] == "human" else AIMessage(content=x["content"]), data["data"]))
-        prompt_history = ChatPromptTemplate.from_messages(
-            
-            [
-                *messages,
-                MessagesPlaceholder(variable_name="question"),
-            ]
-        )
-        
-        formatted_prompt = prompt_history.invoke({"question": [HumanMessage(content=request.question)]})
-        answer = llm.invoke(formatted_prompt)
-        response = ChatResponse(answer=answer.content)
-
-        with open("app/memory/chat-history.json", "w") as f:
-            data["data"].append({"role": "human", "content": request.question})
-            data["data"].append({"role": "ai", "content": answer.content})
-            json.dump(data, f)
+        formatted_prompt = await build_history_prompt(request.session_id, request.question)
+        answer = await get_gemma_llm_client().ainvoke(formatted_prompt)
+        response = ChatResponse(title=request.question, long_answer=answer.content)
+
+        await save_history(request.session_id, request.question, answer.content)
         
         return response
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="LLM request timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ask/stream", summary="Ask chatbot a question, streaming tokens as Server-Sent Events")
+async def ask_question_stream(request: ChatbotRequest, http_request: Request):
+    """
+    Same as `/ask`, but tokens are sent as they are generated. The full answer is
+    saved to the chat history once the stream completes.
+    """
+    formatted_prompt = await build_history_prompt(request.session_id, request.question)
+
+    async def persist(answer: str):
+        await save_history(request.session_id, request.question, answer)
+        return {"long_answer": answer}
+
+    return sse_response(stream_llm_answer(http_request, get_gemma_llm_client(), formatted_prompt, persist))
+
 # @router.post('/create-session', response_model=ChatResponse, summary="Create a new chat session")
 # async def createSession(request: ChatSessionBase):
 #     try:
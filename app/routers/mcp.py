@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Query, HTTPException
-import httpx
-from typing import Dict, Any
-import csv
+from fastapi import APIRouter, Query
+from typing import List, Optional
+
+from app.services.books_dataset import BOOK_COLUMNS, SortColumn, books_dataset
 
 # Create router for MCP endpoints
 router = APIRouter(
@@ -11,7 +11,26 @@ router = APIRouter(
 )
 
 @router.get("/books", operation_id="get_csv_data")
-async def read_books():
-    with open("books.csv", newline='', encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
\ No newline at end of file
+async def read_books(
+    genre: Optional[str] = Query(None, description="Exact genre, case-insensitive (e.g. Business)"),
+    author: Optional[str] = Query(None, description="Part of the author name (penulis), case-insensitive"),
+    year_from: Optional[int] = Query(None, description="Earliest tahun_terbit, inclusive"),
+    year_to: Optional[int] = Query(None, description="Latest tahun_terbit, inclusive"),
+    sort_by: Optional[SortColumn] = Query(None, description="Sort column, e.g. total_penjualan for best sellers"),
+    descending: bool = Query(True, description="Highest first when sort_by is set"),
+    fields: Optional[List[str]] = Query(None, description=f"Columns to return, any of {', '.join(BOOK_COLUMNS)}"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of books"),
+    offset: int = Query(0, ge=0),
+):
+    """Books from the catalogue, filtered, sorted and trimmed to the requested columns."""
+    return await books_dataset.query(
+        genre=genre,
+        author=author,
+        year_from=year_from,
+        year_to=year_to,
+        sort_by=sort_by,
+        descending=descending,
+        fields=fields,
+        limit=limit,
+        offset=offset,
+    )
@@ -0,0 +1,61 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.config.db_config import pool_stats
+from app.config.resources import resources
+from app.services.article_fetcher import article_fetcher
+from app.services.books_dataset import books_dataset
+from app.services.embedding_service import embedding_service
+from app.services.prompt_budget import token_usage
+from app.services.semantic_cache import semantic_cache
+from app.services.telemetry import metrics
+from app.workflow.instrumentation import node_metrics
+
+router=APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+)
+
+@router.get("", response_class=PlainTextResponse, summary="Prometheus metrics")
+async def get_prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/pool", summary="Database connection pool usage")
+async def get_pool_metrics():
+    return pool_stats()
+
+
+@router.get("/resources", summary="Lazily loaded models and clients, with their load times")
+async def get_resource_metrics():
+    return resources.report()
+
+
+@router.get("/workflow", summary="Per-node latency and state size of the agent workflows")
+async def get_workflow_metrics():
+    return node_metrics.stats()
+
+
+@router.get("/embedding", summary="Embedding batcher queue depth and batch sizes")
+async def get_embedding_metrics():
+    return embedding_service.stats()
+
+
+@router.get("/articles", summary="Article fetcher counters and cache size")
+async def get_article_metrics():
+    return article_fetcher.stats()
+
+
+@router.get("/tokens", summary="LLM tokens in and out per model")
+async def get_token_metrics():
+    return token_usage.stats()
+
+
+@router.get("/semantic-cache", summary="Semantic cache hits, misses, stores and evictions")
+async def get_semantic_cache_metrics():
+    return semantic_cache.stats()
+
+
+@router.get("/books", summary="Books dataset size, reloads and query count")
+async def get_books_metrics():
+    return books_dataset.stats()
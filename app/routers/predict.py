@@ -1,15 +1,35 @@
 """Prediction router: Serve ML model predictions for Iris dataset."""
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, field_validator
-from typing import List
+from typing import List, Optional
 import os
-import joblib
+import numpy as np
 
-MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "model", "model-randomforest.pkl")
-if not os.path.exists(MODEL_PATH):
-    raise FileNotFoundError(f"Model file not found at {MODEL_PATH}")
-model = joblib.load(MODEL_PATH)
+from app.config.resources import resources
+from app.services.micro_batcher import MicroBatcher
+from app.services.model_registry import ModelRegistry
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "model")
+N_FEATURES = 4
+
+iris_registry = ModelRegistry(
+    MODEL_DIR,
+    os.getenv("IRIS_MODEL_PATTERN", "model-randomforest*.pkl"),
+    backend=os.getenv("IRIS_MODEL_BACKEND", "sklearn"),
+    pinned_version=os.getenv("IRIS_MODEL_VERSION") or None,
+    mmap=os.getenv("IRIS_MODEL_MMAP", "true").lower() == "true",
+    poll_seconds=float(os.getenv("IRIS_MODEL_POLL_SECONDS", "0")),
+    # rows spanning the iris feature ranges, used to check a compiled backend against sklearn
+    validation_data=np.random.default_rng(0).uniform(0, 8, size=(2000, N_FEATURES)),
+)
+# loaded on first prediction, or at startup when listed in WARM_RESOURCES
+resources.register("iris_model", lambda: iris_registry.current)
+# batches up to this size are cheap enough to predict on the event loop
+INLINE_MAX_ROWS = int(os.getenv("PREDICT_INLINE_MAX_ROWS", "256"))
+CHUNK_SIZE = int(os.getenv("PREDICT_CHUNK_SIZE", "50000"))
+MAX_BATCH_ROWS = int(os.getenv("PREDICT_MAX_BATCH_ROWS", "1000000"))
 
 router = APIRouter(
     prefix="/predict",
@@ -23,7 +43,7 @@ class PredictionInput(BaseModel):
     @field_validator("data")
     @classmethod
     def check_length(cls, v):
-        if len(v) != 4:
+        if len(v) != N_FEATURES:
             raise ValueError("data must contain exactly 4 float values")
         return v
 
@@ -37,13 +57,115 @@ class PredictionInput(BaseModel):
 class PredictionOutput(BaseModel):
     prediction: int
 
+class BatchPredictionInput(BaseModel):
+    # columnar: one list per feature (sepal length, sepal width, petal length, petal width)
+    columns: List[List[float]]
+    include_proba: bool = False
+
+    @field_validator("columns")
+    @classmethod
+    def check_shape(cls, v):
+        if len(v) != N_FEATURES:
+            raise ValueError("columns must contain exactly 4 feature columns")
+        n_rows = len(v[0])
+        if n_rows == 0 or any(len(column) != n_rows for column in v):
+            raise ValueError("all feature columns must have the same, non-zero length")
+        if n_rows > MAX_BATCH_ROWS:
+            raise ValueError(f"at most {MAX_BATCH_ROWS} rows per batch")
+        return v
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "columns": [[5.1, 6.7], [3.5, 3.0], [1.4, 5.2], [0.2, 2.3]],
+                "include_proba": False,
+            }
+        }
+
+class BatchPredictionOutput(BaseModel):
+    predictions: List[int]
+    probabilities: Optional[List[List[float]]] = None
+
+class ModelInfo(BaseModel):
+    version: Optional[str]
+    backend: Optional[str]
+    loaded_at: Optional[float]
+    available_versions: List[str]
+
+def predict_one(row: list[float]) -> int:
+    # runs on the threadpool, so a first use loads the model off the event loop
+    return int(iris_registry.current.backend.predict(np.asarray([row]))[0])
+
+def predict_rows(rows: np.ndarray, include_proba: bool = False):
+    backend = iris_registry.current.backend
+    predictions = []
+    probabilities = [] if include_proba else None
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        predictions.append(backend.predict(chunk))
+        if include_proba:
+            probabilities.append(backend.predict_proba(chunk))
+    return (
+        np.concatenate(predictions),
+        np.concatenate(probabilities) if include_proba else None,
+    )
+
+# coalesces concurrent single-row requests into one predict call
+predict_batcher: Optional[MicroBatcher] = None
+if os.getenv("PREDICT_MICRO_BATCH", "false").lower() == "true":
+    predict_batcher = MicroBatcher(
+        lambda rows: iris_registry.current.backend.predict(np.asarray(rows, dtype=np.float64)).tolist(),
+        max_batch_size=int(os.getenv("PREDICT_MICRO_BATCH_SIZE", "128")),
+        max_wait_ms=float(os.getenv("PREDICT_MICRO_BATCH_WAIT_MS", "2")),
+        name="predict",
+    )
+
 @router.post("/iris", response_model=PredictionOutput, summary="Predict Iris species")
-def predict_iris(input_data: PredictionInput):
+async def predict_iris(input_data: PredictionInput):
     """
     Predict the Iris species using a trained RandomForest model.
     """
     try:
-        pred = model.predict([input_data.data])
-        return PredictionOutput(prediction=int(pred[0]))
+        if predict_batcher is not None:
+            pred = await predict_batcher.submit(input_data.data)
+            return PredictionOutput(prediction=int(pred))
+        return PredictionOutput(prediction=await run_in_threadpool(predict_one, input_data.data))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/iris/batch", response_model=BatchPredictionOutput, summary="Predict Iris species for many rows")
+async def predict_iris_batch(input_data: BatchPredictionInput):
+    """
+    Predict N rows in one call. Features are sent column-wise, so the payload is
+    4 lists of N floats instead of N objects.
+    """
+    try:
+        rows = np.asarray(input_data.columns, dtype=np.float64).T
+        if len(rows) <= INLINE_MAX_ROWS and iris_registry.loaded:
+            predictions, probabilities = predict_rows(rows, input_data.include_proba)
+        else:
+            predictions, probabilities = await run_in_threadpool(predict_rows, rows, input_data.include_proba)
+        return BatchPredictionOutput(
+            predictions=predictions.astype(int).tolist(),
+            probabilities=probabilities.tolist() if probabilities is not None else None,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/iris/model", response_model=ModelInfo, summary="Active Iris model version and backend")
+async def get_iris_model():
+    return iris_registry.info()
+
+@router.post("/iris/model/reload", response_model=ModelInfo, summary="Hot reload the Iris model")
+async def reload_iris_model(version: Optional[str] = None):
+    """
+    Load `version` (or the newest artifact) and swap it in without restarting the worker.
+    Only this worker reloads, set IRIS_MODEL_POLL_SECONDS to have every worker follow new artifacts.
+    """
+    try:
+        await run_in_threadpool(iris_registry.reload, version)
+        return iris_registry.info()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
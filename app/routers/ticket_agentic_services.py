@@ -5,6 +5,7 @@ from app.schemas.chat_schema import ChatRequest
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.db_config import get_session
 from app.services.chat_service import start_new_chat
+from app.workflow.instrumentation import run_workflow
 from app.workflow.ticket_trans_graph import ticket_trans_workflow
 
 
@@ -18,5 +19,5 @@ async def start_ticket_agentic_chat(request:ChatRequest, db: AsyncSession = Depe
     # inference basic ai chat
     response:TicketAgenticChatSch = await start_new_chat(request, db, TicketAgenticChatSch)
     # pemanfaatan agent
-    result = ticket_trans_workflow.invoke(response)
+    result = await run_workflow(ticket_trans_workflow, response, "ticket_trans")
     return result
\ No newline at end of file
@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 from app.model.dummy_unit import DummyUnit, DummyUnitRequestSchema
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Optional
 from app.config.db_config import get_session
+from app.services.bulk_ingest import DEFAULT_BATCH_SIZE, IngestFormat, WriteMethod, format_from_content_type, ingest, records
+from app.services.code_matcher import code_matcher
 
 router=APIRouter(
     prefix="/unit",
@@ -15,9 +18,26 @@ async def add_unit(request:DummyUnitRequestSchema,db:AsyncSession=Depends(get_se
         db_obj=DummyUnit.model_validate(request)
         db.add(db_obj)
         await db.commit()
-        await db.close()
-        return db_obj
     except Exception as e:
         await db.rollback()
-        await db.close()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    await code_matcher.add_units([db_obj])
+    return db_obj
+
+@router.post("/bulk", summary="Bulk load units from a CSV or NDJSON body")
+async def bulk_add_units(
+    request:Request,
+    format:Optional[IngestFormat]=Query(None, description="csv or ndjson, default from Content-Type"),
+    batch_size:int=Query(DEFAULT_BATCH_SIZE, ge=1, le=10000),
+    method:WriteMethod=Query("auto", description="copy (PostgreSQL COPY), insert (INSERT ... ON CONFLICT DO NOTHING) or auto"),
+    db:AsyncSession=Depends(get_session),
+):
+    """
+    The body is streamed and written batch by batch, one transaction each. Invalid rows
+    and failed batches are listed in the response, the other batches are still stored.
+    """
+    try:
+        report = await ingest(db, "unit", records(request.stream(), format or format_from_content_type(request.headers.get("content-type"))), batch_size, method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return report.as_dict()
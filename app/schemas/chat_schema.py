@@ -5,6 +5,9 @@ from app.schemas.field_validator_schema import FieldValidatorSchema
 class ChatRequest(BaseModel):
     question: str
 
+class ChatbotRequest(ChatRequest):
+    session_id: str = "default"
+
 class ChatResponse(BaseModel):
     title:str
     long_answer: str
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 from app.schemas.chat_content_schema import ChatContentSchema
@@ -7,3 +8,9 @@ class ChatSessionSchema(BaseModel):
     id:str
     title:str
     chat_content:list["ChatContentSchema"]
+
+class ChatSessionListSchema(BaseModel):
+    id:str
+    title:Optional[str]
+    summary:Optional[str]=None
+    summary_until:Optional[str]=None
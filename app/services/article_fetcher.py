@@ -0,0 +1,180 @@
+"""Concurrent article download and extraction for the article agent."""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.logger import logger
+
+
+@dataclass(frozen=True)
+class FetchedArticle:
+    url: str
+    title: str
+    text: str
+    truncated: bool = False
+
+    def as_source(self) -> str:
+        return f"[{self.title}]({self.url})\n\n{self.text}"
+
+
+def parse_article(url: str, html: str) -> tuple[str, str]:
+    """Runs in a worker process: newspaper's extraction is pure CPU."""
+    from newspaper import Article
+
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.title, article.text
+
+
+class ArticleFetcher:
+    """
+    Downloads a batch of links concurrently and extracts their text.
+
+    One pooled `httpx.AsyncClient` is shared by all requests, with a per-host cap on
+    top of the global connection limit. Bodies are streamed and cut at `max_bytes`.
+    Parsing goes to a process pool (`parse_workers=0` parses on a thread instead).
+    `fetch_many` returns whatever finished before the deadline and cancels the rest.
+    Extracted text is cached per URL for `cache_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_per_host: int = 4,
+        deadline: float = 10.0,
+        request_timeout: float = 8.0,
+        max_bytes: int = 2_000_000,
+        parse_workers: int = 2,
+        cache_ttl: float = 3600,
+        cache_size: int = 512,
+    ):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.deadline = deadline
+        self.request_timeout = request_timeout
+        self.max_bytes = max_bytes
+        self.parse_workers = parse_workers
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._client: Optional[httpx.AsyncClient] = None
+        self._executor: Optional[Executor] = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._cache: OrderedDict[str, tuple[float, FetchedArticle]] = OrderedDict()
+        self._stats = {"fetched": 0, "cache_hits": 0, "failed": 0, "timed_out": 0, "truncated": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.request_timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                headers={"User-Agent": "Mozilla/5.0 (compatible; article-agent)"},
+            )
+        return self._client
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.parse_workers > 0:
+                self._executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="article-parse")
+        return self._executor
+
+    def _cached(self, url: str) -> Optional[FetchedArticle]:
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        expires_at, article = entry
+        if expires_at < time.monotonic():
+            del self._cache[url]
+            return None
+        self._cache.move_to_end(url)
+        return article
+
+    def _store(self, article: FetchedArticle):
+        self._cache[article.url] = (time.monotonic() + self.cache_ttl, article)
+        self._cache.move_to_end(article.url)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _download(self, url: str) -> tuple[str, bool]:
+        host = urlsplit(url).netloc
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        async with limit, self.client.stream("GET", url) as response:
+            response.raise_for_status()
+            chunks, size, truncated = [], 0, False
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    truncated = True
+                    break
+            body = b"".join(chunks)[: self.max_bytes]
+            return body.decode(response.encoding or "utf-8", errors="replace"), truncated
+
+    async def fetch(self, url: str) -> Optional[FetchedArticle]:
+        article = self._cached(url)
+        if article is not None:
+            self._stats["cache_hits"] += 1
+            return article
+        try:
+            html, truncated = await self._download(url)
+            title, text = await asyncio.get_running_loop().run_in_executor(self.executor, parse_article, url, html)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._stats["failed"] += 1
+            logger.warning("article fetch failed", extra={"url": url, "error": str(e)})
+            return None
+        self._stats["fetched"] += 1
+        self._stats["truncated"] += truncated
+        if not text:
+            return None
+        article = FetchedArticle(url=url, title=title, text=text, truncated=truncated)
+        self._store(article)
+        return article
+
+    async def fetch_many(self, urls: Sequence[str], deadline: Optional[float] = None) -> list[FetchedArticle]:
+        """Articles ready within `deadline` seconds, in the order of `urls`."""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return []
+        tasks = [asyncio.create_task(self.fetch(url)) for url in urls]
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline if deadline is None else deadline)
+        for task in pending:
+            task.cancel()
+        self._stats["timed_out"] += len(pending)
+        return [task.result() for task in tasks if task in done and task.result() is not None]
+
+    def stats(self) -> dict:
+        return {**self._stats, "cached": len(self._cache)}
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+article_fetcher = ArticleFetcher(
+    max_connections=int(os.getenv("ARTICLE_MAX_CONNECTIONS", "20")),
+    max_per_host=int(os.getenv("ARTICLE_MAX_PER_HOST", "4")),
+    deadline=float(os.getenv("ARTICLE_FETCH_DEADLINE_SECONDS", "10")),
+    request_timeout=float(os.getenv("ARTICLE_REQUEST_TIMEOUT_SECONDS", "8")),
+    max_bytes=int(os.getenv("ARTICLE_MAX_BYTES", "2000000")),
+    parse_workers=int(os.getenv("ARTICLE_PARSE_WORKERS", "2")),
+    cache_ttl=float(os.getenv("ARTICLE_CACHE_TTL_SECONDS", "3600")),
+)
@@ -0,0 +1,157 @@
+"""The books catalogue behind the MCP `get_csv_data` tool, loaded once and queried in memory."""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Literal, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.logger import logger
+
+BOOK_COLUMNS = {
+    "nama_buku": "string",
+    "harga": "int64",
+    "total_penjualan": "int64",
+    "penulis": "string",
+    "tahun_terbit": "int64",
+    "genre": "string",
+    "rating": "float64",
+}
+SortColumn = Literal["total_penjualan", "rating", "harga", "tahun_terbit"]
+SORT_COLUMNS = ("total_penjualan", "rating", "harga", "tahun_terbit")
+
+
+def group_positions(column: pd.Series) -> dict[str, np.ndarray]:
+    """Lowercased value -> row positions holding it."""
+    keys = column.str.lower().fillna("")
+    return {key: np.asarray(positions, dtype=np.intp) for key, positions in keys.groupby(keys, sort=False).indices.items()}
+
+
+@dataclass
+class BooksTable:
+    """The typed table plus the indexes queries run against."""
+
+    frame: pd.DataFrame
+    genres: dict[str, np.ndarray]  # lowercase genre -> row positions
+    authors: dict[str, np.ndarray]  # lowercase penulis -> row positions
+    years_order: np.ndarray  # row positions sorted by tahun_terbit
+    years_sorted: np.ndarray
+    orders: dict[str, np.ndarray]  # column -> row positions, ascending
+    orders_desc: dict[str, np.ndarray]  # column -> row positions, descending
+    mtime: float
+
+    @classmethod
+    def load(cls, path: str) -> "BooksTable":
+        mtime = os.stat(path).st_mtime
+        frame = pd.read_csv(path, usecols=list(BOOK_COLUMNS), dtype=BOOK_COLUMNS).reset_index(drop=True)
+        genres = group_positions(frame["genre"])
+        years = frame["tahun_terbit"].to_numpy()
+        years_order = np.argsort(years, kind="stable")
+        return cls(
+            frame=frame,
+            genres=genres,
+            authors=group_positions(frame["penulis"]),
+            years_order=years_order,
+            years_sorted=years[years_order],
+            orders={column: np.argsort(frame[column].to_numpy(), kind="stable") for column in SORT_COLUMNS},
+            # file order between equal values either way, so not the ascending order reversed
+            orders_desc={column: np.argsort(-frame[column].to_numpy(), kind="stable") for column in SORT_COLUMNS},
+            mtime=mtime,
+        )
+
+    def query(
+        self,
+        genre: Optional[str] = None,
+        author: Optional[str] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        sort_by: Optional[SortColumn] = None,
+        descending: bool = True,
+        fields: Optional[Sequence[str]] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[dict]:
+        size = len(self.frame)
+        mask = None
+
+        def narrow(positions: np.ndarray):
+            nonlocal mask
+            selected = np.zeros(size, dtype=bool)
+            selected[positions] = True
+            mask = selected if mask is None else mask & selected
+
+        if genre:
+            narrow(self.genres.get(genre.strip().lower(), np.empty(0, dtype=np.intp)))
+        if year_from is not None or year_to is not None:
+            lo = np.searchsorted(self.years_sorted, year_from, side="left") if year_from is not None else 0
+            hi = np.searchsorted(self.years_sorted, year_to, side="right") if year_to is not None else size
+            narrow(self.years_order[lo:hi])
+        if author:
+            needle = author.strip().lower()
+            # substring match over the distinct authors, not every row
+            matches = [positions for name, positions in self.authors.items() if needle in name]
+            narrow(np.concatenate(matches) if matches else np.empty(0, dtype=np.intp))
+
+        if sort_by:
+            order = (self.orders_desc if descending else self.orders)[sort_by]
+            positions = order[mask[order]] if mask is not None else order
+        else:
+            positions = np.flatnonzero(mask) if mask is not None else np.arange(size)
+
+        positions = positions[offset:offset + limit]
+        columns = [column for column in BOOK_COLUMNS if not fields or column in fields]
+        rows = self.frame.iloc[positions][columns]
+        return rows.astype(object).where(rows.notna(), None).to_dict(orient="records")
+
+
+class BooksDataset:
+    """
+    Lazily loaded `BooksTable`, reloaded when the CSV's mtime changes. The mtime is
+    checked at most every `check_interval` seconds and the load runs off the event loop.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._table: Optional[BooksTable] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._stats = {"loads": 0, "queries": 0, "last_load_seconds": None}
+
+    async def table(self) -> BooksTable:
+        now = time.monotonic()
+        if self._table is not None and now - self._checked_at < self.check_interval:
+            return self._table
+        async with self._lock:
+            if self._table is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._table
+            mtime = (await asyncio.to_thread(os.stat, self.path)).st_mtime
+            if self._table is None or mtime != self._table.mtime:
+                start = time.perf_counter()
+                self._table = await asyncio.to_thread(BooksTable.load, self.path)
+                self._stats["loads"] += 1
+                self._stats["last_load_seconds"] = round(time.perf_counter() - start, 4)
+                logger.info("books dataset loaded", extra={"path": self.path, "rows": len(self._table.frame)})
+            self._checked_at = time.monotonic()
+            return self._table
+
+    async def query(self, **filters) -> list[dict]:
+        table = await self.table()
+        self._stats["queries"] += 1
+        return table.query(**filters)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "rows": len(self._table.frame) if self._table is not None else None,
+            **self._stats,
+        }
+
+
+books_dataset = BooksDataset(
+    os.getenv("BOOKS_CSV_PATH", "data/books.csv"),
+    check_interval=float(os.getenv("BOOKS_CHECK_INTERVAL_SECONDS", "2")),
+)
@@ -0,0 +1,303 @@
+"""
+Bulk ingest of project/unit master data from CSV or NDJSON.
+
+Rows are validated in batches against the request schema, get their ULID and audit
+columns up front and are written one batch per transaction, with PostgreSQL COPY
+or a multi-row `INSERT ... ON CONFLICT (id) DO NOTHING`. A failing batch is reported
+and skipped, the rest of the stream still goes in.
+
+    uv run python -m app.services.bulk_ingest project data/projects.csv
+    uv run python -m app.services.bulk_ingest unit data/units.ndjson --batch-size 5000
+"""
+
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Literal, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.model.base_model import is_ulid
+from app.model.dummy_project import DummyProject, DummyProjectRequestSchema
+from app.model.dummy_unit import DummyUnit, DummyUnitRequestSchema
+
+IngestFormat = Literal["csv", "ndjson"]
+WriteMethod = Literal["auto", "copy", "insert"]
+
+# errors listed per batch; the counts are always complete
+MAX_ERRORS_PER_BATCH = 100
+DEFAULT_BATCH_SIZE = int(os.getenv("BULK_INGEST_BATCH_SIZE", "1000"))
+
+
+@dataclass(frozen=True)
+class IngestTarget:
+    model: Any
+    schema: Any
+
+
+TARGETS = {
+    "project": IngestTarget(DummyProject, DummyProjectRequestSchema),
+    "unit": IngestTarget(DummyUnit, DummyUnitRequestSchema),
+}
+
+
+@dataclass
+class BatchReport:
+    batch: int
+    first_row: int
+    rows: int
+    inserted: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    failed: bool = False
+    errors: list[dict] = field(default_factory=list)
+
+    def error(self, row: Optional[int], message: str):
+        if len(self.errors) < MAX_ERRORS_PER_BATCH:
+            self.errors.append({"row": row, "error": message})
+
+
+@dataclass
+class IngestReport:
+    rows: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    failed_batches: int = 0
+    seconds: float = 0.0
+    batches: list[BatchReport] = field(default_factory=list)
+
+    def add(self, batch: BatchReport):
+        self.rows += batch.rows
+        self.inserted += batch.inserted
+        self.skipped += batch.skipped
+        self.invalid += batch.invalid
+        self.failed_batches += batch.failed
+        # only batches with something to report are kept, a clean 100k-row load stays small
+        if batch.errors or batch.failed:
+            self.batches.append(batch)
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "invalid": self.invalid,
+            "failed_batches": self.failed_batches,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows / self.seconds) if self.seconds else None,
+            "batches": [batch.__dict__ for batch in self.batches],
+        }
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def csv_records(lines: AsyncIterable[str]) -> AsyncIterator[dict]:
+    """CSV rows as dicts. A quoted field may contain newlines: a record ends on an even quote count."""
+    header = None
+    buffer: list[str] = []
+    quotes = 0
+    async for line in lines:
+        buffer.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        text, buffer, quotes = "\n".join(buffer), [], 0
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        # empty cells are missing values, not empty strings
+        yield {name: value if value != "" else None for name, value in zip(header, values)}
+
+
+async def ndjson_records(lines: AsyncIterable[str]) -> AsyncIterator[dict]:
+    async for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"__error__": f"invalid JSON: {e}"}
+
+
+def records(chunks: AsyncIterable[bytes], format: IngestFormat) -> AsyncIterator[dict]:
+    lines = iter_lines(chunks)
+    return csv_records(lines) if format == "csv" else ndjson_records(lines)
+
+
+def format_from_content_type(content_type: Optional[str]) -> IngestFormat:
+    return "csv" if content_type and "csv" in content_type else "ndjson"
+
+
+def validate_batch(target: IngestTarget, rows: list[dict], report: BatchReport) -> list[dict]:
+    """Valid rows as full table rows (ULID id, audit columns); invalid ones go to the report."""
+    columns = [column.name for column in target.model.__table__.columns]
+    valid = []
+    for offset, row in enumerate(rows):
+        number = report.first_row + offset
+        if "__error__" in row:
+            report.invalid += 1
+            report.error(number, row["__error__"])
+            continue
+        client_id = row.get("id")
+        # the code matcher reads new rows by id, so a given id must be a ULID
+        if client_id and not (isinstance(client_id, str) and is_ulid(client_id.upper())):
+            report.invalid += 1
+            report.error(number, f"id: {client_id!r} is not a ULID")
+            continue
+        try:
+            request = target.schema.model_validate(row)
+            # an id in the input is kept, so re-running a load skips rows already in
+            values = {"id": client_id.upper()} if client_id else {}
+            db_row = target.model.model_validate({**request.model_dump(), **values})
+        except ValidationError as e:
+            report.invalid += 1
+            report.error(number, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        valid.append({name: getattr(db_row, name) for name in columns})
+    return valid
+
+
+async def drop_unknown_projects(db: AsyncSession, rows: list[dict], report: BatchReport) -> list[dict]:
+    """Units whose project does not exist would fail the whole batch on the foreign key."""
+    project_ids = {row["dummy_project_id"] for row in rows}
+    known = set(await db.scalars(select(DummyProject.id).where(DummyProject.id.in_(project_ids))))
+    kept = []
+    for row in rows:
+        if row["dummy_project_id"] in known:
+            kept.append(row)
+        else:
+            report.invalid += 1
+            report.error(None, f"unknown dummy_project_id {row['dummy_project_id']} (id {row['id']})")
+    return kept
+
+
+async def copy_rows(db: AsyncSession, table, rows: list[dict]) -> int:
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    columns = [column.name for column in table.columns]
+    await raw.driver_connection.copy_records_to_table(
+        table.name, records=[tuple(row[name] for name in columns) for row in rows], columns=columns
+    )
+    return len(rows)
+
+
+async def insert_rows(db: AsyncSession, table, rows: list[dict]) -> int:
+    dialect = db.bind.dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    # executemany with RETURNING is sent as multi-row INSERTs (insertmanyvalues)
+    result = await db.execute(insert(table).on_conflict_do_nothing(index_elements=["id"]).returning(table.c.id), rows)
+    return len(result.all())
+
+
+async def write_batch(db: AsyncSession, target: IngestTarget, rows: list[dict], report: BatchReport, method: WriteMethod):
+    valid = validate_batch(target, rows, report)
+    try:
+        if valid and target.model is DummyUnit:
+            valid = await drop_unknown_projects(db, valid, report)
+        if valid:
+            # COPY has no ON CONFLICT, so loads that bring their own ids go through INSERT
+            client_ids = any(row.get("id") for row in rows if isinstance(row, dict))
+            use_copy = method == "copy" or (method == "auto" and db.bind.dialect.driver == "asyncpg" and not client_ids)
+            table = target.model.__table__
+            report.inserted = await (copy_rows if use_copy else insert_rows)(db, table, valid)
+            report.skipped = len(valid) - report.inserted
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        report.failed = True
+        report.inserted = report.skipped = 0
+        report.error(None, str(e).splitlines()[0])
+
+
+async def ingest(
+    db: AsyncSession,
+    kind: str,
+    rows: AsyncIterable[dict],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    method: WriteMethod = "auto",
+) -> IngestReport:
+    target = TARGETS[kind]
+    if method == "copy" and db.bind.dialect.driver != "asyncpg":
+        # checked up front, otherwise every batch fails on its own
+        raise ValueError(f"method=copy needs PostgreSQL through asyncpg, not {db.bind.dialect.name}+{db.bind.dialect.driver}")
+    report = IngestReport()
+    start = time.perf_counter()
+    batch: list[dict] = []
+    batch_number, first_row = 0, 1
+
+    async def flush():
+        nonlocal batch, batch_number, first_row
+        batch_number += 1
+        batch_report = BatchReport(batch=batch_number, first_row=first_row, rows=len(batch))
+        await write_batch(db, target, batch, batch_report, method)
+        report.add(batch_report)
+        first_row += len(batch)
+        batch = []
+
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+async def file_chunks(path: str, chunk_size: int = 1 << 20) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+
+def detect_format(path: str) -> IngestFormat:
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+async def run_cli(kind: str, paths: Iterable[str], batch_size: int, method: WriteMethod, format: Optional[IngestFormat]):
+    from app.config.db_config import async_session_maker, engine
+
+    try:
+        for path in paths:
+            async with async_session_maker() as db:
+                report = await ingest(db, kind, records(file_chunks(path), format or detect_format(path)), batch_size, method)
+            print(json.dumps({"file": path, **report.as_dict()}, default=str))
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=sorted(TARGETS))
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--method", choices=["auto", "copy", "insert"], default="auto")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None, help="default: from the file extension")
+    args = parser.parse_args()
+    asyncio.run(run_cli(args.kind, args.paths, args.batch_size, args.method, args.format))
+
+
+if __name__ == "__main__":
+    main()
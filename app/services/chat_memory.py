@@ -0,0 +1,278 @@
+"""Append-only chat memory for the chatbot, keyed by session."""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Sequence
+
+from app.logger import logger
+
+
+class ChatMemoryStore(ABC):
+    """
+    Messages are `{"role": ..., "content": ...}` dicts. Appends only add the new turn and
+    reads only return the latest `limit` messages, so neither grows with the history.
+    File access runs on one dedicated thread per store, off the event loop.
+    """
+
+    def __init__(self, retain: int = 1000, compact_every: int = 100):
+        self.retain = retain
+        self.compact_every = compact_every
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=type(self).__name__)
+        self._appends_since_compact: dict[str, int] = {}
+        self._stats = {"appends": 0, "reads": 0, "compactions": 0}
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def append(self, session_id: str, messages: Sequence[dict]):
+        await self._run(self._append, session_id, list(messages))
+        self._stats["appends"] += 1
+        count = self._appends_since_compact.get(session_id, 0) + len(messages)
+        if self.retain and self.compact_every and count >= self.compact_every:
+            await self.compact(session_id)
+            count = 0
+        self._appends_since_compact[session_id] = count
+
+    async def window(self, session_id: str, limit: int) -> list[dict]:
+        """The latest `limit` messages of the session, oldest first."""
+        self._stats["reads"] += 1
+        return await self._run(self._window, session_id, limit)
+
+    async def compact(self, session_id: str):
+        """Drop everything but the latest `retain` messages of the session."""
+        if self.retain:
+            await self._run(self._compact, session_id, self.retain)
+            self._stats["compactions"] += 1
+
+    @abstractmethod
+    def seed(self, session_id: str, messages: Sequence[dict]) -> bool:
+        """Write `messages` only if the session is still empty (safe across workers)."""
+
+    @abstractmethod
+    def _append(self, session_id: str, messages: list[dict]):
+        ...
+
+    @abstractmethod
+    def _window(self, session_id: str, limit: int) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def _compact(self, session_id: str, retain: int):
+        ...
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__, **self._stats}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class SQLiteChatMemoryStore(ChatMemoryStore):
+    """
+    One SQLite database in WAL mode: readers never block the writer and every worker
+    process can open the same file; concurrent writers wait on `busy_timeout`.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript("""
+            create table if not exists chat_memory (
+                seq integer primary key autoincrement,
+                session_id text not null,
+                role text not null,
+                content text not null,
+                created_at real not null
+            );
+            create index if not exists ix_chat_memory_session_seq on chat_memory (session_id, seq);
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("pragma journal_mode=wal")
+            connection.execute("pragma synchronous=normal")
+            self._local.connection = connection
+        return connection
+
+    def _insert(self, connection: sqlite3.Connection, session_id: str, messages: Sequence[dict]):
+        now = time.time()
+        connection.executemany(
+            "insert into chat_memory (session_id, role, content, created_at) values (?, ?, ?, ?)",
+            [(session_id, m["role"], m["content"], now) for m in messages],
+        )
+
+    def seed(self, session_id, messages):
+        connection = self._connection()
+        connection.execute("begin immediate")
+        try:
+            exists = connection.execute("select 1 from chat_memory where session_id = ? limit 1", (session_id,)).fetchone()
+            if not exists:
+                self._insert(connection, session_id, messages)
+            connection.execute("commit")
+        except BaseException:
+            connection.execute("rollback")
+            raise
+        return not exists
+
+    def _append(self, session_id, messages):
+        connection = self._connection()
+        connection.execute("begin immediate")
+        try:
+            self._insert(connection, session_id, messages)
+            connection.execute("commit")
+        except BaseException:
+            connection.execute("rollback")
+            raise
+
+    def _window(self, session_id, limit):
+        rows = self._connection().execute(
+            "select role, content from chat_memory where session_id = ? order by seq desc limit ?",
+            (session_id, limit),
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def _compact(self, session_id, retain):
+        self._connection().execute(
+            """delete from chat_memory where session_id = ? and seq <= (
+                select seq from chat_memory where session_id = ? order by seq desc limit 1 offset ?)""",
+            (session_id, session_id, retain),
+        )
+
+    def _close_connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def close(self):
+        self._executor.submit(self._close_connection).result()
+        self._close_connection()
+        super().close()
+
+
+class JsonlChatMemoryStore(ChatMemoryStore):
+    """
+    One JSON-lines file per session. Appends are a single `O_APPEND` write under an
+    exclusive `flock`, windows read backwards from the end of the file, and compaction
+    rewrites the tail into a temp file that replaces the log atomically.
+    """
+
+    def __init__(self, directory: str, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(session_id.encode()).hexdigest()[:32] + ".jsonl")
+
+    def _write(self, session_id: str, messages: Sequence[dict], only_if_empty: bool = False) -> bool:
+        # Unix only, imported here so the module (and the SQLite store) still loads elsewhere
+        import fcntl
+
+        path = self._path(session_id)
+        while True:
+            with open(path, "ab") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # a compaction replaced the file while we waited for the lock, use the new one
+                    if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                        continue
+                    if only_if_empty and f.tell() > 0:
+                        return False
+                    f.write(b"".join(json.dumps(m).encode() + b"\n" for m in messages))
+                    f.flush()
+                    return True
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def seed(self, session_id, messages):
+        return self._write(session_id, messages, only_if_empty=True)
+
+    def _append(self, session_id, messages):
+        self._write(session_id, messages)
+
+    def _tail(self, f, limit: int, block_size: int = 8192) -> list[bytes]:
+        f.seek(0, os.SEEK_END)
+        position, data = f.tell(), b""
+        while position > 0 and data.count(b"\n") <= limit:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+        return [line for line in data.splitlines() if line][-limit:] if limit else []
+
+    def _window(self, session_id, limit):
+        import fcntl
+
+        try:
+            with open(self._path(session_id), "rb") as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                try:
+                    lines = self._tail(f, limit)
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        except FileNotFoundError:
+            return []
+        return [json.loads(line) for line in lines]
+
+    def _compact(self, session_id, retain):
+        import fcntl
+
+        path = self._path(session_id)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                lines = self._tail(f, retain)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as tmp:
+                    tmp.write(b"".join(line + b"\n" for line in lines))
+                os.replace(tmp_path, path)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def load_legacy_history(path: str) -> list[dict]:
+    """Messages from the old single-file `{"data": [...]}` chat history."""
+    try:
+        with open(path) as f:
+            return json.load(f)["data"]
+    except FileNotFoundError:
+        return []
+
+
+def create_chat_memory_store(
+    backend: Optional[str] = None,
+    path: Optional[str] = None,
+    legacy_path: str = "app/memory/chat-history.json",
+) -> ChatMemoryStore:
+    backend = backend or os.getenv("CHAT_MEMORY_BACKEND", "sqlite")
+    options = {
+        "retain": int(os.getenv("CHAT_MEMORY_RETAIN", "1000")),
+        "compact_every": int(os.getenv("CHAT_MEMORY_COMPACT_EVERY", "100")),
+    }
+    if backend == "sqlite":
+        store = SQLiteChatMemoryStore(path or os.getenv("CHAT_MEMORY_PATH") or "app/memory/chat-memory.sqlite3", **options)
+    elif backend == "jsonl":
+        store = JsonlChatMemoryStore(path or os.getenv("CHAT_MEMORY_PATH") or "app/memory/chat-memory", **options)
+    else:
+        raise ValueError(f"Unknown chat memory backend {backend}")
+    # the old chat-history.json becomes the "default" session, once
+    legacy = load_legacy_history(legacy_path)
+    if legacy and store.seed("default", legacy):
+        logger.info("chat memory seeded from legacy history", extra={"path": legacy_path})
+    return store
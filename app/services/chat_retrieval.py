@@ -0,0 +1,96 @@
+"""Similarity retrieval over a session's chat_content, exact or approximate depending on size."""
+
+import os
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.logger import logger
+from app.model.native_vector import NativeVector
+
+# Sessions up to this many rows are scanned exactly through the chat_session_id index;
+# past it the HNSW index on embedding is used.
+EXACT_SEARCH_MAX_ROWS = int(os.getenv("RETRIEVAL_EXACT_MAX_ROWS", "2000"))
+HNSW_EF_SEARCH = int(os.getenv("RETRIEVAL_HNSW_EF_SEARCH", "64"))
+# Without an iterative scan (pgvector >= 0.8) the HNSW index yields `ef_search` rows
+# before the session filter, so a session that is a small share of the table can get
+# fewer than `limit` back; those queries are rerun exactly. Empty disables it.
+HNSW_ITERATIVE_SCAN = os.getenv("RETRIEVAL_HNSW_ITERATIVE_SCAN", "relaxed_order")
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+
+# `+ 0` keeps the planner from using the HNSW index, so the ordering is exact
+EXACT_QUERY = text("""
+    select c.id, c.content, c.role from chat_content c
+    where c.chat_session_id = :chat_session_id
+    order by (c.embedding <#> :embedding_vector) + 0
+    limit :limit""").bindparams(bindparam("embedding_vector", type_=NativeVector(384)))
+
+APPROXIMATE_QUERY = text("""
+    select c.id, c.content, c.role from chat_content c
+    where c.chat_session_id = :chat_session_id
+    order by c.embedding <#> :embedding_vector
+    limit :limit""").bindparams(bindparam("embedding_vector", type_=NativeVector(384)))
+
+SESSION_SIZE_QUERY = text("""
+    select count(*) from (
+        select 1 from chat_content c
+        where c.chat_session_id = :chat_session_id
+        limit :cap
+    ) s""")
+
+
+PGVECTOR_VERSION_QUERY = text("select extversion from pg_extension where extname = 'vector'")
+
+_pgvector_version: Optional[tuple[int, ...]] = None
+
+
+async def pgvector_version(db: AsyncSession) -> tuple[int, ...]:
+    """Installed pgvector version, read once per process."""
+    global _pgvector_version
+    if _pgvector_version is None:
+        version = await db.scalar(PGVECTOR_VERSION_QUERY) or "0"
+        _pgvector_version = tuple(int(part) for part in version.split(".") if part.isdigit())
+        if HNSW_ITERATIVE_SCAN and _pgvector_version < ITERATIVE_SCAN_MIN_VERSION:
+            logger.warning(
+                "pgvector has no hnsw.iterative_scan, short approximate results are rerun exactly",
+                extra={"pgvector": version, "needs": ".".join(map(str, ITERATIVE_SCAN_MIN_VERSION))},
+            )
+    return _pgvector_version
+
+
+async def session_size(db: AsyncSession, chat_session_id: str, cap: int) -> int:
+    """Row count of a session, counting at most `cap` rows so big sessions stay cheap."""
+    return await db.scalar(SESSION_SIZE_QUERY, {"chat_session_id": chat_session_id, "cap": cap})
+
+
+async def retrieve_similar_content(
+    db: AsyncSession,
+    chat_session_id: str,
+    embedding: Any,
+    limit: int = 5,
+    exact_max_rows: int = EXACT_SEARCH_MAX_ROWS,
+    size: Optional[int] = None,
+) -> Sequence[Any]:
+    """`size` is the session's row count when the caller already knows it, else it is counted."""
+    params = {
+        "chat_session_id": chat_session_id,
+        "embedding_vector": embedding,
+        "limit": limit,
+    }
+    if size is None:
+        size = await session_size(db, chat_session_id, exact_max_rows + 1)
+    if size <= exact_max_rows:
+        return (await db.execute(EXACT_QUERY, params)).all()
+
+    # SET LOCAL only lasts until the end of the current transaction
+    await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(HNSW_EF_SEARCH)}"))
+    iterative = HNSW_ITERATIVE_SCAN in ("relaxed_order", "strict_order") and await pgvector_version(db) >= ITERATIVE_SCAN_MIN_VERSION
+    if iterative:
+        # keep scanning the graph until enough rows of this session pass the filter
+        await db.execute(text(f"SET LOCAL hnsw.iterative_scan = {HNSW_ITERATIVE_SCAN}"))
+    rows = (await db.execute(APPROXIMATE_QUERY, params)).all()
+    if len(rows) < limit and not iterative:
+        # the session has more than `exact_max_rows` rows, so this is the index coming up short
+        rows = (await db.execute(EXACT_QUERY, params)).all()
+    return rows
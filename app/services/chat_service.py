@@ -2,30 +2,46 @@ from fastapi import HTTPException
 from app.schemas.chat_schema import ChatAgentic, ChatRequest, ChatResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Union
-from app.config.llm_config import llm
+from app.config.llm_config import get_llm_client
 from app.model.chat_session import ChatSession
 from app.model.chat_content import ChatContent
-from app.config.sbert_config import sbert_model
+from app.services.chat_summary import schedule_summary_refresh
+from app.services.embedding_service import embedding_service
+from app.services.remote_embedding import EmbeddingServerUnavailable
+from app.services.semantic_cache import semantic_cache
 from app.schemas.ticket_trans_schema import TicketAgenticChatSch
 
 async def start_new_chat(request:ChatRequest, db:AsyncSession, response:Union[ChatResponse, ChatAgentic, TicketAgenticChatSch]):
     try:
-        formatted_prompt:Union[ChatResponse, ChatAgentic, TicketAgenticChatSch] = llm.with_structured_output(response).invoke(request.question)
+        question_embedding = await embedding_service.encode(request.question)
+        cache_namespace = semantic_cache.namespace("start-chat", response)
+        cached = await semantic_cache.lookup(cache_namespace, question_embedding)
+        if cached is not None:
+            formatted_prompt = response.model_validate(cached)
+        else:
+            formatted_prompt:Union[ChatResponse, ChatAgentic, TicketAgenticChatSch] = await get_llm_client().ainvoke_structured(response, request.question)
+            await semantic_cache.store(cache_namespace, request.question, question_embedding, formatted_prompt.model_dump(mode="json"))
+
         session_obj: ChatSession = ChatSession(title=formatted_prompt.title)
         db.add(session_obj)
         
         await db.flush()  # Ensure session_obj.id is populated
         
+        answer_embedding = await embedding_service.encode(formatted_prompt.long_answer)
         db.add_all([
-            ChatContent(chat_session_id=session_obj.id, content=request.question, role="human", embedding=sbert_model.encode(request.question)),
-            ChatContent(chat_session_id=session_obj.id, content=formatted_prompt.long_answer, role="ai", embedding=sbert_model.encode(formatted_prompt.long_answer))
+            ChatContent(chat_session_id=session_obj.id, content=request.question, role="human", embedding=question_embedding),
+            ChatContent(chat_session_id=session_obj.id, content=formatted_prompt.long_answer, role="ai", embedding=answer_embedding)
         ])
         
         await db.commit()
-        db.close()
+        schedule_summary_refresh(session_obj.id)
         
         return formatted_prompt
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="LLM request timed out")
+    except EmbeddingServerUnavailable:
+        await db.rollback()
+        raise HTTPException(status_code=503, detail="Embedding server unavailable")
     except Exception as e:
-        db.rollback()
-        db.close()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""Rolling per-session summaries: fold only the messages added since the last summary."""
+
+import asyncio
+import os
+from typing import Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from sqlalchemy import func, select, true, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.db_config import async_session_maker
+from app.config.llm_config import get_llm_client
+from app.logger import logger
+from app.model.chat_content import ChatContent
+from app.model.chat_session import ChatSession
+from app.schemas.chat_schema import ChatSummary
+from app.services.prompt_budget import message_tokens
+
+# fold the summary in the background once this many messages are past the mark, 0 disables it
+REFRESH_AFTER_MESSAGES = int(os.getenv("CHAT_SUMMARY_REFRESH_AFTER", "10"))
+# rows read per round; a round is cut further to fit the model's budget
+FOLD_BATCH_ROWS = int(os.getenv("CHAT_SUMMARY_BATCH_ROWS", "200"))
+
+SUMMARY_INSTRUCTION = "Please summarize above prompts"
+
+
+class SessionNotFound(Exception):
+    pass
+
+
+def fold_prompt(summary: Optional[str], messages: list):
+    history = [SystemMessage(content=f"Summary of the conversation so far:\n{summary}")] if summary else []
+    prompt = ChatPromptTemplate.from_messages([
+        *history,
+        *messages,
+        MessagesPlaceholder(variable_name="question"),
+    ])
+    return prompt.invoke({"question": [HumanMessage(content=SUMMARY_INSTRUCTION)]})
+
+
+def after_mark(mark: Optional[str]):
+    """
+    Messages past the one with id `mark`, in (created_at, id) order. The question and
+    answer of a turn get their ULIDs in the same millisecond, where the random part
+    decides the order, so the id alone can put the answer first.
+    """
+    if not mark:
+        return true()
+    mark_at = select(ChatContent.created_at).where(ChatContent.id == mark).scalar_subquery()
+    return tuple_(ChatContent.created_at, ChatContent.id) > tuple_(mark_at, mark)
+
+
+async def unsummarized_count(db: AsyncSession, chat_session_id: str, mark: Optional[str], cap: int) -> int:
+    """Messages after `mark`, counting at most `cap`."""
+    query = select(ChatContent.id).where(ChatContent.chat_session_id == chat_session_id, after_mark(mark))
+    return await db.scalar(select(func.count()).select_from(query.limit(cap).subquery()))
+
+
+async def fold_round(db: AsyncSession, session: ChatSession) -> bool:
+    """Fold the next messages past the mark into the summary. False when there was nothing new."""
+    query = (
+        select(ChatContent.id, ChatContent.content, ChatContent.role)
+        .where(ChatContent.chat_session_id == session.id, after_mark(session.summary_until))
+        .order_by(ChatContent.created_at, ChatContent.id)
+        .limit(FOLD_BATCH_ROWS)
+    )
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return False
+
+    llm_client = get_llm_client()
+    budget = llm_client.input_budget - message_tokens(HumanMessage(content=SUMMARY_INSTRUCTION))
+    if session.summary:
+        budget -= message_tokens(SystemMessage(content=session.summary))
+    # oldest first, as many as fit (at least one, so the mark always moves)
+    messages, used, until = [], 0, None
+    for row in rows:
+        message = HumanMessage(content=row.content) if row.role == "human" else AIMessage(content=row.content)
+        tokens = message_tokens(message)
+        if messages and used + tokens > budget:
+            break
+        messages.append(message)
+        used += tokens
+        until = row.id
+
+    answer: ChatSummary = await llm_client.ainvoke_structured(ChatSummary, fold_prompt(session.summary, messages))
+
+    # only move the mark forward from where this fold started, a concurrent fold may have won
+    started_from = ChatSession.summary_until == session.summary_until if session.summary_until else ChatSession.summary_until.is_(None)
+    result = await db.execute(
+        update(ChatSession)
+        .where(ChatSession.id == session.id, started_from)
+        .values(summary=answer.very_long_summary, summary_until=until)
+    )
+    await db.commit()
+    if result.rowcount:
+        session.summary, session.summary_until = answer.very_long_summary, until
+    else:
+        await db.refresh(session)
+    return True
+
+
+async def summarize_session(db: AsyncSession, chat_session_id: str) -> ChatSummary:
+    session = await db.get(ChatSession, chat_session_id, populate_existing=True)
+    if session is None:
+        raise SessionNotFound(chat_session_id)
+    while await fold_round(db, session):
+        pass
+    return ChatSummary(very_long_summary=session.summary or "")
+
+
+_refreshing: set[str] = set()
+_tasks: set[asyncio.Task] = set()
+
+
+async def _refresh(chat_session_id: str):
+    try:
+        async with async_session_maker() as db:
+            session = await db.get(ChatSession, chat_session_id)
+            if session is None:
+                return
+            if await unsummarized_count(db, chat_session_id, session.summary_until, REFRESH_AFTER_MESSAGES) >= REFRESH_AFTER_MESSAGES:
+                while await fold_round(db, session):
+                    pass
+    except Exception as e:
+        logger.warning("chat summary refresh failed", extra={"chat_session_id": chat_session_id, "error": str(e)})
+    finally:
+        _refreshing.discard(chat_session_id)
+
+
+def schedule_summary_refresh(chat_session_id: str):
+    """Fold the session's summary in the background once enough new messages piled up."""
+    if not REFRESH_AFTER_MESSAGES or chat_session_id in _refreshing:
+        return
+    _refreshing.add(chat_session_id)
+    task = asyncio.create_task(_refresh(chat_session_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def cancel_summary_refreshes():
+    for task in list(_tasks):
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
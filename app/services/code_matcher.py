@@ -0,0 +1,314 @@
+"""Project/unit code matching against the reference rows in the project and unit tables."""
+
+import asyncio
+import difflib
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.db_config import async_session_maker
+from app.logger import logger
+from app.model.base_model import is_ulid
+from app.model.dummy_project import DummyProject
+from app.model.dummy_unit import DummyUnit
+from app.services.embedding_service import embedding_service
+
+CODE_KINDS = ("project", "unit")
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def normalize_code(value: str) -> str:
+    """'pik-2', 'PIK 2' and 'Pik2' all become 'pik2'."""
+    return re.sub(r"[^0-9a-z]", "", value.lower())
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def reference_text(code: str, name: str) -> str:
+    # code and name together, so "Pantai Indah Kapuk" still lands on PIK2
+    return f"{code} {name}"
+
+
+def ulid_before(value: str, seconds: float) -> str:
+    """The smallest ULID generated `seconds` before `value` was."""
+    if not value:
+        return ""
+    millis = 0
+    for char in value[:10]:
+        millis = millis * 32 + CROCKFORD.index(char)
+    millis = max(0, millis - int(seconds * 1000))
+    prefix = ""
+    for _ in range(10):
+        millis, digit = divmod(millis, 32)
+        prefix = CROCKFORD[digit] + prefix
+    return prefix + "0" * 16
+
+
+@dataclass(frozen=True)
+class CodeReference:
+    id: str
+    code: str
+    name: str
+    parent_id: Optional[str] = None  # project id, for units
+
+
+@dataclass(frozen=True)
+class CodeMatch:
+    id: str
+    code: str
+    name: str
+    score: float
+    method: str  # exact | fuzzy | semantic
+
+
+class CodeIndex:
+    """
+    Reference codes of one kind plus their L2-normalized embedding matrix.
+
+    Adding rows builds new arrays and swaps them in, so a match running against the
+    old arrays is never affected.
+    """
+
+    def __init__(self):
+        self.references: list[CodeReference] = []
+        self.matrix: Optional[np.ndarray] = None
+        self.parent_ids = np.empty(0, dtype=object)
+        self.exact: dict[str, int] = {}
+        self.keys: dict[str, int] = {}
+        # normalized keys by (first character, length), the candidates for close spellings
+        self.buckets: dict[tuple[str, int], list[str]] = {}
+        # newest ULID seen; rows with other ids are only picked up by a full reload
+        self.last_id = ""
+
+    def __len__(self):
+        return len(self.references)
+
+    def unknown(self, references: Sequence[CodeReference]) -> list[CodeReference]:
+        known = {reference.id for reference in self.references}
+        return [reference for reference in references if reference.id not in known]
+
+    def embeddings(self) -> dict[CodeReference, np.ndarray]:
+        if self.matrix is None:
+            return {}
+        return dict(zip(self.references, self.matrix))
+
+    def add(self, references: Sequence[CodeReference], embeddings: np.ndarray) -> int:
+        known = {reference.id for reference in self.references}
+        fresh = [(reference, row) for reference, row in zip(references, embeddings) if reference.id not in known]
+        if not fresh:
+            return 0
+        rows = normalize_rows(np.stack([row for _, row in fresh]))
+        references = self.references + [reference for reference, _ in fresh]
+        exact, keys = dict(self.exact), dict(self.keys)
+        buckets = {first: list(bucket) for first, bucket in self.buckets.items()}
+        for position in range(len(self.references), len(references)):
+            reference = references[position]
+            key = normalize_code(reference.code)
+            exact.setdefault(reference.code, position)
+            if key and key not in keys:
+                keys[key] = position
+                buckets.setdefault((key[0], len(key)), []).append(key)
+
+        self.matrix = rows if self.matrix is None else np.vstack([self.matrix, rows])
+        self.parent_ids = np.array([reference.parent_id for reference in references], dtype=object)
+        self.references, self.exact, self.keys, self.buckets = references, exact, keys, buckets
+        self.last_id = max([self.last_id, *(reference.id for reference, _ in fresh if is_ulid(reference.id))])
+        return len(fresh)
+
+    def lookup(self, query: str, fuzzy_cutoff: float, parent_id: Optional[str] = None) -> Optional[CodeMatch]:
+        """String pre-filter: exact code, then normalized code, then close spelling."""
+        position = self.exact.get(query.strip())
+        method, score = "exact", 1.0
+        if position is None:
+            key = normalize_code(query)
+            position = self.keys.get(key)
+            method = "fuzzy"
+            if position is None and key and fuzzy_cutoff < 1:
+                candidates = [c for size in (len(key) - 1, len(key), len(key) + 1) for c in self.buckets.get((key[0], size), ())]
+                close = difflib.get_close_matches(key, candidates, n=1, cutoff=fuzzy_cutoff)
+                if close:
+                    position = self.keys[close[0]]
+                    score = difflib.SequenceMatcher(None, key, close[0]).ratio()
+        if position is None:
+            return None
+        reference = self.references[position]
+        if parent_id is not None and reference.parent_id != parent_id:
+            return None
+        return CodeMatch(reference.id, reference.code, reference.name, score, method)
+
+    def top_k(self, query_embedding: np.ndarray, k: int, parent_id: Optional[str] = None) -> list[CodeMatch]:
+        if self.matrix is None:
+            return []
+        scores = self.matrix @ normalize_rows(query_embedding[None, :])[0]
+        if parent_id is not None:
+            scores = np.where(self.parent_ids == parent_id, scores, -np.inf)
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            CodeMatch(self.references[i].id, self.references[i].code, self.references[i].name, float(scores[i]), "semantic")
+            for i in best
+            if np.isfinite(scores[i])
+        ]
+
+
+class CodeMatcher:
+    """
+    Matches free-text project/unit codes to the reference tables.
+
+    Reference rows are read once and embedded in a single batch. After that, every
+    `refresh_seconds`, rows whose ULID is at most `refresh_overlap_seconds` older than
+    the newest one seen are read again and the unknown ones embedded: a ULID is taken
+    when the row is built, so a row committed late can sort before one already seen.
+    Rows created on this worker are added right away through `add_projects`/`add_units`.
+    Every `full_reload_seconds` the index is rebuilt from all rows, which also picks up
+    edited and deleted rows and ids that are not ULIDs; unchanged rows keep their
+    embedding. A match tries the string pre-filter first and only embeds the query
+    when that misses; query embeddings are kept in a small LRU.
+    """
+
+    def __init__(
+        self,
+        encode_many: Callable[[Sequence[str]], Awaitable[list[np.ndarray]]],
+        threshold: float = 0.5,
+        fuzzy_cutoff: float = 0.85,
+        refresh_seconds: float = 60,
+        refresh_overlap_seconds: float = 300,
+        full_reload_seconds: float = 3600,
+        query_cache_size: int = 1024,
+    ):
+        self.encode_many = encode_many
+        self.threshold = threshold
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.refresh_seconds = refresh_seconds
+        self.refresh_overlap_seconds = refresh_overlap_seconds
+        self.full_reload_seconds = full_reload_seconds
+        self.query_cache_size = query_cache_size
+        self.indexes = {kind: CodeIndex() for kind in CODE_KINDS}
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._loaded_at: Optional[float] = None
+        self._reloaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def _embed(self, references: Sequence[CodeReference]) -> np.ndarray:
+        return np.asarray(await self.encode_many([reference_text(r.code, r.name) for r in references]))
+
+    async def _add(self, kind: str, references: Sequence[CodeReference]) -> int:
+        references = self.indexes[kind].unknown(references)
+        if not references:
+            return 0
+        return self.indexes[kind].add(references, await self._embed(references))
+
+    async def _rebuild(self, kind: str, references: Sequence[CodeReference]) -> int:
+        """A new index from all `references`, embedding only rows that are new or changed."""
+        previous = self.indexes[kind].embeddings()
+        missing = [reference for reference in references if reference not in previous]
+        embedded = dict(zip(missing, await self._embed(missing))) if missing else {}
+        index = CodeIndex()
+        if references:
+            index.add(references, np.stack([previous.get(r, embedded.get(r)) for r in references]))
+        self.indexes[kind] = index
+        return len(missing)
+
+    async def refresh(self, db: Optional[AsyncSession] = None, full: Optional[bool] = None) -> dict[str, int]:
+        """
+        Pull rows created since the last refresh, or all rows when `full` (by default on
+        the first call and then every `full_reload_seconds`).
+        """
+        if db is None:
+            async with async_session_maker() as session:
+                return await self.refresh(session, full)
+
+        if full is None:
+            full = self._reloaded_at is None or time.monotonic() - self._reloaded_at >= self.full_reload_seconds
+        projects = select(DummyProject.id, DummyProject.code, DummyProject.name)
+        units = select(DummyUnit.id, DummyUnit.code, DummyUnit.name, DummyUnit.dummy_project_id)
+        if not full:
+            projects = projects.where(DummyProject.id >= ulid_before(self.indexes["project"].last_id, self.refresh_overlap_seconds))
+            units = units.where(DummyUnit.id >= ulid_before(self.indexes["unit"].last_id, self.refresh_overlap_seconds))
+        project_rows = [CodeReference(*row) for row in (await db.execute(projects.order_by(DummyProject.id))).all()]
+        unit_rows = [CodeReference(*row) for row in (await db.execute(units.order_by(DummyUnit.id))).all()]
+        update = self._rebuild if full else self._add
+        added = {"project": await update("project", project_rows), "unit": await update("unit", unit_rows)}
+        self._loaded_at = time.monotonic()
+        if full:
+            self._reloaded_at = self._loaded_at
+        if any(added.values()):
+            logger.info("code matcher refreshed", extra={"added": added, "full": full, "size": self.size()})
+        return added
+
+    async def ensure_fresh(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+        async with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds:
+                await self.refresh()
+
+    async def _add_created(self, kind: str, references: Sequence[CodeReference]):
+        # before the first load there is nothing to update, the load will read them
+        if self._loaded_at is None:
+            return
+        try:
+            await self._add(kind, references)
+        except Exception as e:
+            # the rows are already committed, the next refresh picks them up
+            logger.warning("code matcher update failed", extra={"kind": kind, "error": str(e)})
+
+    async def add_projects(self, projects: Sequence[DummyProject]):
+        await self._add_created("project", [CodeReference(p.id, p.code, p.name) for p in projects])
+
+    async def add_units(self, units: Sequence[DummyUnit]):
+        await self._add_created("unit", [CodeReference(u.id, u.code, u.name, u.dummy_project_id) for u in units])
+
+    async def query_embedding(self, query: str) -> np.ndarray:
+        key = query.strip().lower()
+        embedding = self._query_cache.get(key)
+        if embedding is not None:
+            self._query_cache.move_to_end(key)
+            return embedding
+        [embedding] = await self.encode_many([query])
+        self._query_cache[key] = embedding
+        if len(self._query_cache) > self.query_cache_size:
+            self._query_cache.popitem(last=False)
+        return embedding
+
+    async def match(self, kind: str, query: str, k: int = 3, parent_id: Optional[str] = None) -> list[CodeMatch]:
+        """Best matches above `threshold`, best first. A string hit is returned on its own."""
+        await self.ensure_fresh()
+        index = self.indexes[kind]
+        hit = index.lookup(query, self.fuzzy_cutoff, parent_id)
+        if hit is not None:
+            return [hit]
+        if not len(index):
+            return []
+        matches = index.top_k(await self.query_embedding(query), k, parent_id)
+        return [match for match in matches if match.score >= self.threshold]
+
+    def size(self) -> dict[str, int]:
+        return {kind: len(index) for kind, index in self.indexes.items()}
+
+
+def create_code_matcher() -> CodeMatcher:
+    return CodeMatcher(
+        embedding_service.encode_many,
+        threshold=float(os.getenv("CODE_MATCH_THRESHOLD", "0.5")),
+        fuzzy_cutoff=float(os.getenv("CODE_MATCH_FUZZY_CUTOFF", "0.85")),
+        refresh_seconds=float(os.getenv("CODE_MATCHER_REFRESH_SECONDS", "60")),
+        refresh_overlap_seconds=float(os.getenv("CODE_MATCHER_REFRESH_OVERLAP_SECONDS", "300")),
+        full_reload_seconds=float(os.getenv("CODE_MATCHER_FULL_RELOAD_SECONDS", "3600")),
+    )
+
+
+code_matcher = create_code_matcher()
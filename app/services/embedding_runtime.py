@@ -0,0 +1,176 @@
+"""
+CPU runtimes for the sentence embedding model: PyTorch fp32, ONNX fp32 and ONNX int8.
+
+The ONNX files are exported once into a local directory (`<root>/<model>/onnx/`) and
+reused by every worker afterwards. Whatever the runtime, the model produces the same
+384-d vectors, so embeddings already stored in `Vector(384)` columns stay comparable.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+from app.logger import logger
+
+RUNTIMES = ("torch", "onnx", "onnx-int8")
+EMBEDDING_DIMENSION = 384
+QUANTIZATION_CONFIGS = ("arm64", "avx2", "avx512", "avx512_vnni")
+
+# fixed mix of short, long, Indonesian and code-like inputs, encoded by both runtimes
+VALIDATION_SENTENCES = [
+    "hello",
+    "How do I reset my password?",
+    "The invoice for project Alpha was sent twice and the customer wants a refund for the duplicate charge.",
+    "Bagaimana cara mengubah alamat email di akun saya?",
+    "Tolong jelaskan perbedaan antara unit dan proyek dalam aplikasi ini.",
+    "SELECT id, name FROM project WHERE created_at > now() - interval '7 days'",
+    "def encode(texts): return model.encode(texts, batch_size=32)",
+    "Error 502 Bad Gateway when uploading a CSV with 20k rows",
+    "What were the best selling science fiction books published between 1960 and 1980, and who wrote them?",
+    "ok thanks",
+    " ".join(["The agent summarizes the previous messages before answering."] * 12),
+    "Jadwal rapat dipindah ke hari Kamis pukul 14.00 WIB.",
+]
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Row-wise cosine similarity between two embedding matrices of the same inputs."""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    cosines = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1) + 1e-12
+    )
+    return {"min_cosine": round(float(cosines.min()), 6), "mean_cosine": round(float(cosines.mean()), 6)}
+
+
+def onnx_directory(model_name: str, root: str) -> str:
+    return os.path.join(root, model_name.replace("/", "__"))
+
+
+def onnx_file_name(runtime: str, quantization_config: str = "avx2") -> str:
+    return "onnx/model.onnx" if runtime == "onnx" else f"onnx/model_qint8_{quantization_config}.onnx"
+
+
+@contextmanager
+def export_lock(directory: str):
+    """Held while exporting, so workers starting together export the model only once."""
+    # Unix only, imported here so the module still loads elsewhere
+    import fcntl
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".export.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def export_onnx(model_name: str, directory: str, quantization_config: str = "avx2") -> str:
+    """
+    Export `model_name` to ONNX (`onnx/model.onnx`) and its int8 dynamically quantized
+    variant (`onnx/model_qint8_<config>.onnx`) into `directory`, skipping files that exist.
+    Needs `sentence-transformers[onnx]` (optimum and onnxruntime).
+    """
+    if quantization_config not in QUANTIZATION_CONFIGS:
+        raise ValueError(f"Unknown quantization config {quantization_config}, expected one of {QUANTIZATION_CONFIGS}")
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    with export_lock(directory):
+        fp32_path = os.path.join(directory, onnx_file_name("onnx"))
+        int8_path = os.path.join(directory, onnx_file_name("onnx-int8", quantization_config))
+        if not os.path.exists(fp32_path):
+            start = time.perf_counter()
+            # uses the repo's ONNX file when it ships one, otherwise optimum exports it on load
+            SentenceTransformer(model_name, backend="onnx", device="cpu").save_pretrained(directory)
+            logger.info("embedding model exported to onnx", extra={"path": fp32_path, "seconds": round(time.perf_counter() - start, 1)})
+        if not os.path.exists(int8_path):
+            model = SentenceTransformer(directory, backend="onnx", device="cpu", model_kwargs={"file_name": onnx_file_name("onnx")})
+            export_dynamic_quantized_onnx_model(
+                model, quantization_config, directory, file_suffix=f"qint8_{quantization_config}"
+            )
+            logger.info("embedding model quantized to int8", extra={"path": int8_path})
+    return directory
+
+
+def load_model(
+    model_name: str,
+    runtime: str = "torch",
+    threads: int = 0,
+    root: str = "app/model/onnx",
+    quantization_config: str = "avx2",
+):
+    """
+    SentenceTransformer for `runtime`. `threads` sets the intra-op thread count (0 keeps
+    the library default); ONNX sessions run a single inter-op thread since the
+    embedding graph is one sequential chain.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown embedding runtime {runtime}, expected one of {RUNTIMES}")
+    if runtime == "torch":
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name, device="cpu")
+
+    import onnxruntime as ort
+
+    directory = export_onnx(model_name, onnx_directory(model_name, root), quantization_config)
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.inter_op_num_threads = 1
+    if threads:
+        options.intra_op_num_threads = threads
+    return SentenceTransformer(
+        directory,
+        backend="onnx",
+        device="cpu",
+        model_kwargs={
+            "file_name": onnx_file_name(runtime, quantization_config),
+            "provider": "CPUExecutionProvider",
+            "session_options": options,
+        },
+    )
+
+
+def encode_validation(model) -> np.ndarray:
+    return model.encode(VALIDATION_SENTENCES, batch_size=len(VALIDATION_SENTENCES), convert_to_numpy=True)
+
+
+def check_dimension(model, runtime: str):
+    dimension = model.get_sentence_embedding_dimension()
+    if dimension != EMBEDDING_DIMENSION:
+        raise ValueError(f"{runtime} embedding model returns {dimension}-d vectors, stored embeddings are {EMBEDDING_DIMENSION}-d")
+
+
+def validation_marker(model_name: str, runtime: str, root: str, quantization_config: str) -> str:
+    onnx_path = os.path.join(onnx_directory(model_name, root), onnx_file_name(runtime, quantization_config))
+    return onnx_path + ".validation.json"
+
+
+def read_validation(marker: str) -> Optional[dict]:
+    """Cached agreement for an exported file, ignored once the file is re-exported."""
+    onnx_path = marker.removesuffix(".validation.json")
+    try:
+        with open(marker) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(onnx_path) or cached.get("onnx_mtime") != os.path.getmtime(onnx_path):
+        return None
+    return cached
+
+
+def write_validation(marker: str, agreement: dict):
+    onnx_path = marker.removesuffix(".validation.json")
+    tmp_path = f"{marker}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**agreement, "onnx_mtime": os.path.getmtime(onnx_path)}, f)
+    os.replace(tmp_path, marker)
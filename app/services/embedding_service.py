@@ -0,0 +1,61 @@
+"""Embedding service: batched, off-event-loop sentence embeddings."""
+
+import os
+import numpy as np
+from typing import Callable, Sequence
+
+from app.config.sbert_config import get_sbert_model
+from app.services.micro_batcher import MicroBatcher
+from app.services.telemetry import metrics, span
+
+
+class EmbeddingService:
+    """
+    Wraps a SentenceTransformer so concurrent requests share one `encode` call.
+
+    Texts submitted from different requests are queued and encoded together on a
+    dedicated thread, each caller awaits only its own vector.
+    """
+
+    def __init__(self, get_model: Callable, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        # resolved on the encode thread, so the first request loads the model off the event loop
+        self.get_model = get_model
+        self._batcher: MicroBatcher[str, np.ndarray] = MicroBatcher(
+            self._encode_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name="embedding",
+        )
+
+    def _encode_batch(self, texts: list[str]) -> list[np.ndarray]:
+        embeddings = self.get_model().encode(texts, batch_size=len(texts), convert_to_numpy=True)
+        return list(embeddings)
+
+    async def encode(self, text: str) -> np.ndarray:
+        # the batch itself runs on the batcher's task, the span covers this caller's wait for it
+        with span("embedding encode", texts=1):
+            return await self._batcher.submit(text)
+
+    async def encode_many(self, texts: Sequence[str]) -> list[np.ndarray]:
+        with span("embedding encode", texts=len(texts)):
+            return await self._batcher.submit_many(texts)
+
+    def stats(self) -> dict:
+        return self._batcher.stats()
+
+    async def close(self):
+        await self._batcher.close()
+
+
+embedding_service = EmbeddingService(
+    get_sbert_model,
+    max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64")),
+    max_wait_ms=float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5")),
+)
+
+# batch counts and sizes are in batch_size{batcher="embedding"}
+metrics.gauge(
+    "embedding_queue_depth",
+    "Texts waiting for the embedding batcher.",
+    lambda: [({}, embedding_service.stats()["queue_depth"])],
+)
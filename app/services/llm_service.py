@@ -0,0 +1,97 @@
+"""Async LLM client: non-blocking invocation with bounded concurrency and per-call timeouts."""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+from app.services.prompt_budget import input_budget, prompt_tokens, token_usage
+from app.services.telemetry import llm_request_seconds, span
+
+
+class LLMClient:
+    """
+    Shared async entry point for a chat model.
+
+    Every call goes through `ainvoke` so the event loop keeps serving other requests
+    during the provider round trip. A semaphore caps how many calls are in flight and
+    each call is bounded by a timeout (raises `TimeoutError`). Structured-output
+    runnables are built once per response schema and reused. Tokens in and out of
+    every call are counted into `token_usage`.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        max_concurrency: int = 32,
+        timeout: Optional[float] = 60.0,
+        model_name: Optional[str] = None,
+    ):
+        self.llm = llm
+        self.timeout = timeout
+        self.model_name = model_name or getattr(llm, "model_name", None) or "unknown"
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._structured: dict[type[BaseModel], Runnable] = {}
+        self.in_flight = 0
+
+    @property
+    def input_budget(self) -> int:
+        """Prompt tokens this model can take, after the reserved output."""
+        return input_budget(self.model_name)
+
+    def structured(self, schema: type[BaseModel]) -> Runnable:
+        runnable = self._structured.get(schema)
+        if runnable is None:
+            runnable = self._structured[schema] = self.llm.with_structured_output(schema)
+        return runnable
+
+    async def arun(self, runnable: Runnable, input: Any, timeout: Optional[float] = None) -> Any:
+        timeout = self.timeout if timeout is None else timeout
+        with span("llm invoke", **{"gen_ai.request.model": self.model_name}) as llm_span:
+            async with self._semaphore:
+                self.in_flight += 1
+                start = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(runnable.ainvoke(input), timeout)
+                finally:
+                    self.in_flight -= 1
+                    llm_request_seconds.observe(time.perf_counter() - start, model=self.model_name, mode="invoke")
+            tokens_in, tokens_out = prompt_tokens(input), prompt_tokens(result)
+            token_usage.record(self.model_name, tokens_in, tokens_out)
+            if llm_span is not None:
+                llm_span.set_attribute("gen_ai.usage.input_tokens", tokens_in)
+                llm_span.set_attribute("gen_ai.usage.output_tokens", tokens_out)
+        return result
+
+    async def ainvoke(self, input: Any, timeout: Optional[float] = None) -> Any:
+        return await self.arun(self.llm, input, timeout)
+
+    async def astream(self, input: Any, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield text chunks as they are generated. `timeout` bounds the wait for each chunk."""
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore:
+            self.in_flight += 1
+            start = time.perf_counter()
+            stream = self.llm.astream(input)
+            chunks: list[str] = []
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(stream), timeout)
+                    except StopAsyncIteration:
+                        break
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        yield chunk.content
+            finally:
+                self.in_flight -= 1
+                llm_request_seconds.observe(time.perf_counter() - start, model=self.model_name, mode="stream")
+                token_usage.record(self.model_name, prompt_tokens(input), prompt_tokens("".join(chunks)))
+                # closing the provider stream stops generation when the consumer goes away
+                await stream.aclose()
+
+    async def ainvoke_structured(self, schema: type[BaseModel], input: Any, timeout: Optional[float] = None) -> Any:
+        return await self.arun(self.structured(schema), input, timeout)
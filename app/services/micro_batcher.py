@@ -0,0 +1,135 @@
+"""Generic async micro-batcher: coalesce concurrent single-item calls into one batched call."""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Generic, Optional, Sequence, TypeVar
+
+from app.services.telemetry import batch_seconds, batch_size
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Queue items from concurrent requests and run `batch_fn` on them in batches.
+
+    A batch is flushed as soon as `max_batch_size` items are waiting or `max_wait_ms`
+    has passed since the first item of the batch arrived. `batch_fn` runs on a dedicated
+    executor so CPU-bound work never blocks the event loop. While a batch is running,
+    new items keep piling up in the queue, so batch size grows with load.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[T]], Sequence[R]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        executor: Optional[Executor] = None,
+        name: str = "micro-batcher",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._owns_executor = executor is None
+        self._executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # counters
+        self.batches_total = 0
+        self.items_total = 0
+        self.last_batch_size = 0
+        self.max_batch_size_seen = 0
+        self.batch_seconds_total = 0.0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(), name=self.name)
+
+    async def submit(self, item: T) -> R:
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def submit_many(self, items: Sequence[T]) -> list[R]:
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                # drain whatever is already waiting before sleeping on the deadline
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            pending = [(item, future) for item, future in batch if not future.cancelled()]
+            if not pending:
+                continue
+            await self._flush(pending)
+
+    async def _flush(self, pending: list[tuple[T, asyncio.Future]]):
+        items = [item for item, _ in pending]
+        start = time.perf_counter()
+        try:
+            results = await self._loop.run_in_executor(self._executor, self.batch_fn, items)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            seconds = time.perf_counter() - start
+            self.batch_seconds_total += seconds
+            batch_seconds.observe(seconds, batcher=self.name)
+            batch_size.observe(len(items), batcher=self.name)
+
+        self.batches_total += 1
+        self.items_total += len(items)
+        self.last_batch_size = len(items)
+        self.max_batch_size_seen = max(self.max_batch_size_seen, len(items))
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches_total": self.batches_total,
+            "items_total": self.items_total,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size_seen": self.max_batch_size_seen,
+            "avg_batch_size": self.items_total / self.batches_total if self.batches_total else 0.0,
+            "batch_seconds_total": self.batch_seconds_total,
+        }
+
+    async def close(self):
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
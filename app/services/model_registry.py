@@ -0,0 +1,227 @@
+"""Versioned model registry with pluggable inference backends and atomic hot reload."""
+
+import glob
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional
+
+import joblib
+import numpy as np
+
+from app.logger import logger
+
+
+class InferenceBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        ...
+
+
+class SklearnBackend(InferenceBackend):
+    name = "sklearn"
+
+    def __init__(self, estimator):
+        self.estimator = estimator
+
+    def predict(self, X):
+        return self.estimator.predict(X)
+
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(X)
+
+
+class OnnxBackend(InferenceBackend):
+    """Runs the estimator converted with skl2onnx on onnxruntime. Needs `skl2onnx` and `onnxruntime`."""
+
+    name = "onnx"
+
+    def __init__(self, estimator, n_features: int, intra_op_threads: int = 1):
+        import onnxruntime as ort
+        from skl2onnx import to_onnx
+        from skl2onnx.common.data_types import FloatTensorType
+
+        onnx_model = to_onnx(
+            estimator,
+            initial_types=[("input", FloatTensorType([None, n_features]))],
+            options={id(estimator): {"zipmap": False}},
+            target_opset=17,
+        )
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(onnx_model.SerializeToString(), options, providers=["CPUExecutionProvider"])
+        self.classes = estimator.classes_
+
+    def _run(self, X):
+        return self.session.run(None, {"input": np.asarray(X, dtype=np.float32)})
+
+    def predict(self, X):
+        return self._run(X)[0]
+
+    def predict_proba(self, X):
+        return self._run(X)[1]
+
+
+def outputs_match(reference: InferenceBackend, candidate: InferenceBackend, X: np.ndarray, atol: float = 1e-5) -> bool:
+    return bool(
+        np.array_equal(reference.predict(X), candidate.predict(X))
+        and np.allclose(reference.predict_proba(X), candidate.predict_proba(X), atol=atol)
+    )
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    version: str
+    path: str
+    backend: InferenceBackend
+    loaded_at: float = field(default_factory=time.time)
+
+
+class ModelRegistry:
+    """
+    Discovers versioned artifacts (`<dir>/<pattern>`, version = file name without extension)
+    and serves one of them.
+
+    `reload` builds the new backend completely before swapping a single reference, so
+    requests in flight keep the model they started with. With `poll_seconds` set, a
+    daemon thread started by the first load picks up newer artifacts; `current` itself
+    never loads anything after that first load. A compiled backend is only used when its
+    outputs match sklearn on the validation rows, otherwise the registry falls back to
+    sklearn.
+
+    `mmap=True` loads artifacts with `mmap_mode="r"`. That only shares memory between
+    workers for estimators whose large arrays stay plain numpy arrays (linear models,
+    for instance). sklearn's `Tree.__setstate__` copies the node arrays of tree models
+    into private buffers, so a RandomForest is resident once per worker either way.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        pattern: str,
+        backend: str = "sklearn",
+        pinned_version: Optional[str] = None,
+        mmap: bool = True,
+        poll_seconds: float = 0,
+        validation_data: Optional[np.ndarray] = None,
+    ):
+        self.model_dir = model_dir
+        self.pattern = pattern
+        self.backend_name = backend
+        self.pinned_version = pinned_version
+        self.mmap = mmap
+        self.poll_seconds = poll_seconds
+        self.validation_data = validation_data
+        self._current: Optional[LoadedModel] = None
+        self._lock = threading.RLock()
+        self._poller: Optional[threading.Thread] = None
+        self._stop_polling = threading.Event()
+
+    def versions(self) -> dict[str, str]:
+        paths = sorted(glob.glob(os.path.join(self.model_dir, self.pattern)), key=os.path.getmtime)
+        return {os.path.splitext(os.path.basename(path))[0]: path for path in paths}
+
+    def resolve(self, version: Optional[str] = None) -> tuple[str, str]:
+        versions = self.versions()
+        if not versions:
+            raise FileNotFoundError(f"No model artifact matching {self.pattern} in {self.model_dir}")
+        version = version or self.pinned_version
+        if version is None:
+            version = next(reversed(versions))  # newest by mtime
+        if version not in versions:
+            raise FileNotFoundError(f"Model version {version} not found in {self.model_dir}")
+        return version, versions[version]
+
+    def build_backend(self, estimator) -> InferenceBackend:
+        reference = SklearnBackend(estimator)
+        if self.backend_name == "sklearn":
+            return reference
+        try:
+            if self.backend_name != "onnx":
+                raise ValueError(f"Unknown inference backend {self.backend_name}")
+            candidate = OnnxBackend(estimator, estimator.n_features_in_, int(os.getenv("MODEL_INTRA_OP_THREADS", "1")))
+        except Exception as e:
+            logger.warning("model backend unavailable, using sklearn", extra={"backend": self.backend_name, "error": str(e)})
+            return reference
+        if self.validation_data is not None and not outputs_match(reference, candidate, self.validation_data):
+            logger.warning("model backend outputs differ from sklearn, using sklearn", extra={"backend": self.backend_name})
+            return reference
+        return candidate
+
+    def load(self, version: Optional[str] = None) -> LoadedModel:
+        version, path = self.resolve(version)
+        with self._lock:
+            estimator = joblib.load(path, mmap_mode="r" if self.mmap else None)
+            loaded = LoadedModel(version=version, path=path, backend=self.build_backend(estimator))
+            # single reference swap, readers never see a half-loaded model
+            self._current = loaded
+        logger.info("model loaded", extra={"version": version, "backend": loaded.backend.name})
+        if self.poll_seconds:
+            self.start_polling()
+        return loaded
+
+    def reload(self, version: Optional[str] = None) -> LoadedModel:
+        return self.load(version)
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    @property
+    def current(self) -> LoadedModel:
+        """The active model. Loads on first use only, so call it off the event loop until `loaded`."""
+        if self._current is None:
+            with self._lock:
+                if self._current is None:
+                    self.load()
+        return self._current
+
+    def maybe_reload(self):
+        """
+        Load the newest artifact in the directory if it is not the active one.
+        Write new artifacts under another name and `mv` them in, so a half-written file is never seen.
+        """
+        try:
+            version, _ = self.resolve()
+        except FileNotFoundError:
+            return
+        if self._current is not None and version != self._current.version:
+            self.load(version)
+
+    def _poll(self):
+        while not self._stop_polling.wait(self.poll_seconds):
+            try:
+                self.maybe_reload()
+            except Exception as e:
+                logger.warning("model reload failed, keeping the active model", extra={"error": str(e)})
+
+    def start_polling(self):
+        """Check for newer artifacts every `poll_seconds` on a daemon thread, away from the event loop."""
+        with self._lock:
+            if self._poller is None or not self._poller.is_alive():
+                self._stop_polling.clear()
+                self._poller = threading.Thread(target=self._poll, name="model-registry-poll", daemon=True)
+                self._poller.start()
+
+    def stop_polling(self):
+        self._stop_polling.set()
+        if self._poller is not None:
+            self._poller.join(timeout=5)
+            self._poller = None
+
+    def info(self) -> dict:
+        loaded = self._current
+        return {
+            "version": loaded.version if loaded else None,
+            "backend": loaded.backend.name if loaded else None,
+            "loaded_at": loaded.loaded_at if loaded else None,
+            "available_versions": list(self.versions()),
+        }
@@ -0,0 +1,72 @@
+"""Keyset pagination in creation order and NDJSON streaming of large result sets."""
+
+import datetime
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import DateTime, Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.db_config import async_session_maker
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+CURSOR_SEPARATOR = "~"
+
+
+def encode_cursor(row: Any, columns: Sequence) -> str:
+    values = (row._mapping[column.key] for column in columns)
+    return CURSOR_SEPARATOR.join(value.isoformat() if isinstance(value, datetime.datetime) else str(value) for value in values)
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list[Any]:
+    """The values of `columns` in the cursor; ValueError when it does not fit them."""
+    parts = cursor.split(CURSOR_SEPARATOR, len(columns) - 1)
+    if len(parts) != len(columns):
+        raise ValueError(f"invalid cursor {cursor!r}")
+    return [
+        datetime.datetime.fromisoformat(part) if isinstance(column.type, DateTime) else part
+        for part, column in zip(parts, columns)
+    ]
+
+
+def keyset(query: Select, columns: Sequence, after: Optional[str]) -> Select:
+    """
+    Rows after the cursor `after`, ordered by `columns`, which must end in a unique
+    column. Rows written in the same millisecond get ULIDs in random order, so tables
+    with a created_at order by (created_at, id) rather than by id alone.
+    """
+    if after:
+        query = query.where(tuple_(*columns) > tuple_(*decode_cursor(after, columns)))
+    return query.order_by(*columns)
+
+
+async def fetch_page(db: AsyncSession, query: Select, columns: Sequence, after: Optional[str], limit: int) -> tuple[list[Any], Optional[str]]:
+    """One page of rows plus the cursor of the next page (None on the last page)."""
+    rows = (await db.execute(keyset(query, columns, after).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1], columns)
+    return rows, None
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]):
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+async def stream_rows(query: Select, schema: type[BaseModel], batch_size: int = 500) -> AsyncIterator[str]:
+    """
+    Rows as NDJSON lines through a server-side cursor, `batch_size` rows in memory at a time.
+
+    Uses its own session: the request-scoped one may be closed before the body is sent.
+    """
+    async with async_session_maker() as session:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for row in result:
+            yield schema.model_validate(dict(row._mapping)).model_dump_json() + "\n"
+
+
+def ndjson_response(query: Select, schema: type[BaseModel]) -> StreamingResponse:
+    return StreamingResponse(stream_rows(query, schema), media_type="application/x-ndjson")
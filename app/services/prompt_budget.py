@@ -0,0 +1,202 @@
+"""Token counting and context budgets for prompt assembly."""
+
+import contextvars
+import math
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+import numpy as np
+from langchain_core.messages import BaseMessage
+from langchain_core.prompt_values import PromptValue
+from pydantic import BaseModel
+
+from app.logger import logger
+from app.services.telemetry import llm_tokens
+
+# chat formats add a few tokens per message for the role and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# context window per model, prompts are fitted to this minus the reserved output
+MODEL_CONTEXT_TOKENS = {
+    "qwen/qwen3-32b": 131072,
+    "gemma2-9b-it": 8192,
+}
+DEFAULT_CONTEXT_TOKENS = int(os.getenv("PROMPT_DEFAULT_CONTEXT_TOKENS", "8192"))
+RESERVED_OUTPUT_TOKENS = int(os.getenv("PROMPT_RESERVED_OUTPUT_TOKENS", "1024"))
+# cost cap on top of the context window, 0 disables it
+MAX_INPUT_TOKENS = int(os.getenv("PROMPT_MAX_INPUT_TOKENS", "16000"))
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def tokenizer():
+    """
+    tiktoken's cl100k_base (PROMPT_TOKENIZER=auto|tiktoken), or None for the character
+    estimate (PROMPT_TOKENIZER=estimate). cl100k_base is not the Qwen or Gemma vocabulary
+    either, so budgets keep the reserved output as headroom.
+    """
+    if os.getenv("PROMPT_TOKENIZER", "auto") == "estimate":
+        return None
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # the encoding file is downloaded on first use, offline hosts end up here
+        logger.warning("tiktoken unavailable, estimating token counts from characters", extra={"error": str(e)})
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """A rough count, not a tokenizer: ~4 characters per token on words, 1 per punctuation mark."""
+    return sum(math.ceil(len(piece) / 4) for piece in WORD_PATTERN.findall(text))
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = tokenizer()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def prompt_tokens(prompt: Any) -> int:
+    """Tokens of anything handed to a model: a prompt value, messages, a dict of inputs or text."""
+    if isinstance(prompt, PromptValue):
+        return sum(message_tokens(message) for message in prompt.to_messages())
+    if isinstance(prompt, BaseMessage):
+        return message_tokens(prompt)
+    if isinstance(prompt, BaseModel):
+        return count_tokens(prompt.model_dump_json())
+    if isinstance(prompt, dict):
+        return sum(prompt_tokens(value) for value in prompt.values())
+    if isinstance(prompt, (list, tuple)):
+        return sum(prompt_tokens(item) for item in prompt)
+    return count_tokens(prompt if isinstance(prompt, str) else str(prompt))
+
+
+def input_budget(model_name: Optional[str]) -> int:
+    budget = MODEL_CONTEXT_TOKENS.get(model_name or "", DEFAULT_CONTEXT_TOKENS) - RESERVED_OUTPUT_TOKENS
+    if MAX_INPUT_TOKENS:
+        budget = min(budget, MAX_INPUT_TOKENS)
+    return max(budget, 0)
+
+
+def fit_recent(messages: Sequence[BaseMessage], budget: int) -> list[BaseMessage]:
+    """Recency window: the newest messages that fit, oldest first. `messages` is oldest first."""
+    kept, used = [], 0
+    for message in reversed(messages):
+        tokens = message_tokens(message)
+        if used + tokens > budget:
+            break
+        kept.append(message)
+        used += tokens
+    return kept[::-1]
+
+
+def fit_ranked(messages: Sequence[BaseMessage], budget: int) -> list[BaseMessage]:
+    """Relevance selection: `messages` come best first, keep every one that still fits."""
+    kept, used = [], 0
+    for message in messages:
+        tokens = message_tokens(message)
+        if used + tokens <= budget:
+            kept.append(message)
+            used += tokens
+    return kept
+
+
+def split_chunks(text: str) -> list[str]:
+    return [chunk.strip() for chunk in re.split(r"\n\s*\n", text) if chunk.strip()]
+
+
+async def trim_sources(
+    sources: Sequence[str],
+    budget: int,
+    query: Optional[str] = None,
+    embed_many: Optional[Callable[[Sequence[str]], Awaitable[list[np.ndarray]]]] = None,
+) -> list[str]:
+    """
+    Extractive trimming: split every source into paragraphs and keep the best ones that
+    fit `budget`, in their original order; nothing when the budget is used up. The first
+    paragraph of a source (its title line) always goes with it. Paragraphs are ranked by
+    similarity to `query` when an embedder is given, otherwise earlier paragraphs win.
+    """
+    if budget <= 0:
+        return []
+    if sum(count_tokens(source) for source in sources) <= budget:
+        return list(sources)
+
+    chunks = [(s, c, chunk) for s, source in enumerate(sources) for c, chunk in enumerate(split_chunks(source))]
+    if not chunks:
+        return []
+    tokens = [count_tokens(chunk) for _, _, chunk in chunks]
+    if query and embed_many is not None:
+        vectors = np.asarray(await embed_many([query, *(chunk for _, _, chunk in chunks)]), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        scores = vectors[1:] @ vectors[0]
+    else:
+        scores = np.array([-c for _, c, _ in chunks], dtype=np.float32)
+
+    headers = {}
+    for i, (s, _, _) in enumerate(chunks):
+        headers.setdefault(s, i)
+    kept: set[int] = set()
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        s, c, _ = chunks[i]
+        if c == 0:
+            continue
+        header = headers[s]
+        cost = tokens[i] + (tokens[header] if header not in kept else 0)
+        if used + cost > budget:
+            continue
+        kept.update({header, i})
+        used += cost
+
+    trimmed = []
+    for s in range(len(sources)):
+        parts = [chunk for i, (source, _, chunk) in enumerate(chunks) if source == s and i in kept]
+        if parts:
+            trimmed.append("\n\n".join(parts))
+    return trimmed
+
+
+# tokens of the request being served, filled in by LLMClient and logged by the middleware
+request_usage: contextvars.ContextVar[dict | None] = contextvars.ContextVar("request_usage", default=None)
+
+
+class TokenUsage:
+    def __init__(self):
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, tokens_in: int, tokens_out: int):
+        with self._lock:
+            stats = self._stats.setdefault(model, {"calls": 0, "tokens_in": 0, "tokens_out": 0, "tokens_in_max": 0})
+            stats["calls"] += 1
+            stats["tokens_in"] += tokens_in
+            stats["tokens_out"] += tokens_out
+            stats["tokens_in_max"] = max(stats["tokens_in_max"], tokens_in)
+        llm_tokens.inc(tokens_in, model=model, direction="in")
+        llm_tokens.inc(tokens_out, model=model, direction="out")
+        usage = request_usage.get()
+        if usage is not None:
+            usage["tokens_in"] += tokens_in
+            usage["tokens_out"] += tokens_out
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            return {model: dict(stats) for model, stats in self._stats.items()}
+
+
+token_usage = TokenUsage()
@@ -0,0 +1,171 @@
+"""Token-bucket rate limiting with per-route rules and pluggable storage."""
+
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """`limit` requests per `window` seconds for paths starting with any of `path_prefixes`."""
+    name: str
+    limit: int
+    window: float = 60.0
+    path_prefixes: tuple[str, ...] = ()
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.limit / self.window
+
+    def matches(self, path: str) -> bool:
+        return any(path.startswith(prefix) for prefix in self.path_prefixes)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def acquire(self, key: str, capacity: int, refill_per_second: float, cost: float = 1.0) -> RateLimitResult:
+        ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process buckets kept in LRU order.
+
+    Each check touches one key. Buckets idle longer than `idle_ttl` (by then they
+    are full again, so dropping them changes nothing) and anything past `max_keys`
+    are evicted from the cold end.
+    """
+
+    def __init__(self, max_keys: int = 100_000, idle_ttl: float = 300.0):
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def _evict(self, now: float):
+        while self._buckets:
+            key, (_, last_seen) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - last_seen < self.idle_ttl:
+                break
+            del self._buckets[key]
+
+    async def acquire(self, key, capacity, refill_per_second, cost=1.0):
+        now = time.monotonic()
+        tokens, last_seen = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last_seen) * refill_per_second)
+        if tokens >= cost:
+            tokens -= cost
+            result = RateLimitResult(allowed=True, remaining=tokens, retry_after=0.0)
+        else:
+            result = RateLimitResult(allowed=False, remaining=tokens, retry_after=(cost - tokens) / refill_per_second)
+        self._buckets[key] = (tokens, now)
+        self._evict(now)
+        return result
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets in Redis so every replica shares the same limits. Needs the `redis` package."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local ttl = tonumber(ARGV[4])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], ttl)
+    return {allowed, tostring(tokens), tostring(retry_after)}
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(self.SCRIPT)
+
+    async def acquire(self, key, capacity, refill_per_second, cost=1.0):
+        # an idle bucket refills completely after capacity / rate seconds, no need to keep it longer
+        ttl = max(1, int(capacity / refill_per_second) + 1)
+        allowed, remaining, retry_after = await self._script(
+            keys=[self.prefix + key], args=[capacity, refill_per_second, cost, ttl]
+        )
+        return RateLimitResult(allowed=bool(allowed), remaining=float(remaining), retry_after=float(retry_after))
+
+
+class RateLimiter:
+    """Picks the first rule whose prefix matches the path (else `default_rule`) and checks its bucket."""
+
+    def __init__(self, backend: RateLimitBackend, default_rule: RateLimitRule, rules: Optional[list[RateLimitRule]] = None):
+        self.backend = backend
+        self.default_rule = default_rule
+        self.rules = rules or []
+        self.allowed = 0
+        self.rejected = 0
+
+    def rule_for(self, path: str) -> RateLimitRule:
+        for rule in self.rules:
+            if rule.matches(path):
+                return rule
+        return self.default_rule
+
+    async def check(self, identity: str, path: str) -> tuple[RateLimitRule, RateLimitResult]:
+        rule = self.rule_for(path)
+        result = await self.backend.acquire(f"{rule.name}:{identity}", rule.limit, rule.refill_per_second)
+        if result.allowed:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return rule, result
+
+    def stats(self) -> dict:
+        return {"allowed": self.allowed, "rejected": self.rejected}
+
+
+def parse_rate(value: str) -> tuple[int, float]:
+    """'60/minute' -> (60, 60.0). Units: second, minute, hour."""
+    count, _, unit = value.partition("/")
+    seconds = {"second": 1.0, "minute": 60.0, "hour": 3600.0}[unit.strip() or "minute"]
+    return int(count), seconds
+
+
+def create_rate_limiter(default_limit: Optional[int] = None) -> RateLimiter:
+    if os.getenv("RATE_LIMIT_BACKEND", "memory") == "redis":
+        backend: RateLimitBackend = RedisRateLimitBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    else:
+        backend = InMemoryRateLimitBackend()
+
+    limit, window = parse_rate(os.getenv("RATE_LIMIT_DEFAULT", "60/minute"))
+    if default_limit is not None:
+        limit, window = default_limit, 60.0
+    llm_limit, llm_window = parse_rate(os.getenv("RATE_LIMIT_LLM", "10/minute"))
+    return RateLimiter(
+        backend,
+        default_rule=RateLimitRule("default", limit, window),
+        rules=[
+            # LLM-backed routes cost far more than model predictions
+            RateLimitRule("llm", llm_limit, llm_window, ("/chat/start-chat", "/chat/chat-summary", "/chatbot", "/agents", "/ticket-agentic")),
+        ],
+    )
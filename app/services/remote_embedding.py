@@ -0,0 +1,103 @@
+"""Client for the out-of-process embedding server (app/embedding_server.py) and its wire format."""
+
+import json
+import os
+import struct
+import time
+from typing import Optional, Sequence
+
+import httpx
+import numpy as np
+
+# response frame: count and dimension as little-endian uint32, then count x dim float32
+FRAME_HEADER = struct.Struct("<II")
+FRAME_MEDIA_TYPE = "application/x-float32-frame"
+
+
+def encode_frame(vectors: np.ndarray) -> bytes:
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    count, dimension = vectors.shape
+    return FRAME_HEADER.pack(count, dimension) + vectors.tobytes()
+
+
+class EmbeddingServerUnavailable(Exception):
+    """The embedding server could not be reached or did not answer; the API maps it to 503."""
+
+
+def decode_frame(data: bytes) -> np.ndarray:
+    count, dimension = FRAME_HEADER.unpack_from(data)
+    expected = FRAME_HEADER.size + count * dimension * 4
+    if len(data) != expected:
+        raise ValueError(f"embedding frame is {len(data)} bytes, expected {expected}")
+    # copied out of the response buffer so callers get a writable array
+    return np.frombuffer(data, dtype="<f4", count=count * dimension, offset=FRAME_HEADER.size).reshape(count, dimension).copy()
+
+
+class RemoteEmbeddingModel:
+    """
+    Stands in for SentenceTransformer in this process: `encode` posts the texts to the
+    embedding server and reads the vectors back from a binary frame. The model then lives
+    once per pod instead of once per API worker. Called from the embedding batcher's
+    thread, so the blocking client is fine. Connection errors and error statuses are
+    raised as `EmbeddingServerUnavailable`.
+    """
+
+    def __init__(self, url: str, socket_path: Optional[str] = None, timeout: float = 30.0):
+        transport = httpx.HTTPTransport(uds=socket_path, retries=2) if socket_path else httpx.HTTPTransport(retries=2)
+        self.url = url
+        self.socket_path = socket_path
+        self._client = httpx.Client(base_url=url, transport=transport, timeout=timeout)
+
+    @classmethod
+    def from_env(cls) -> "RemoteEmbeddingModel":
+        """A client for the configured server, once its /health answers."""
+        url = os.getenv("EMBEDDING_SERVER_URL")
+        socket_path = os.getenv("EMBEDDING_SERVER_SOCKET") or None
+        if not url and not socket_path:
+            raise ValueError("EMBEDDING_BACKEND=remote needs EMBEDDING_SERVER_SOCKET or EMBEDDING_SERVER_URL")
+        model = cls(
+            # over a socket the host is only the Host header
+            url=url or "http://embedding",
+            socket_path=socket_path,
+            timeout=float(os.getenv("EMBEDDING_SERVER_TIMEOUT_SECONDS", "30")),
+        )
+        try:
+            model.wait_until_ready(float(os.getenv("EMBEDDING_SERVER_WAIT_SECONDS", "30")))
+        except EmbeddingServerUnavailable:
+            model.close()
+            raise
+        return model
+
+    def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        try:
+            response = self._client.request(method, path, **kwargs)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise EmbeddingServerUnavailable(f"embedding server at {self.socket_path or self.url}: {e}") from e
+        return response
+
+    def wait_until_ready(self, timeout: float, interval: float = 0.5):
+        """Poll /health until it answers 200; it is 503 while the server loads its model."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._request("GET", "/health")
+                return
+            except EmbeddingServerUnavailable:
+                if time.monotonic() + interval > deadline:
+                    raise
+            time.sleep(interval)
+
+    def encode(self, texts: str | Sequence[str], batch_size: int = 32, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        response = self._request(
+            "POST",
+            "/embed",
+            content=json.dumps([texts] if single else list(texts)),
+            headers={"content-type": "application/json", "accept": FRAME_MEDIA_TYPE},
+        )
+        vectors = decode_frame(response.content)
+        return vectors[0] if single else vectors
+
+    def close(self):
+        self._client.close()
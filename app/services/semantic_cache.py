@@ -0,0 +1,242 @@
+"""Semantic response cache: reuse answers for near-duplicate questions."""
+
+import datetime
+import os
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import delete, func, select, update
+
+from app.config.db_config import async_session_maker
+from app.model.semantic_cache import SemanticCacheEntry
+from app.services.telemetry import metrics
+
+cache_events = metrics.counter("semantic_cache_events_total", "Semantic cache hits, misses, stores and evictions.", ("event",))
+
+
+def normalize(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class CacheHit:
+    response: dict[str, Any]
+    similarity: float
+
+
+class SemanticCacheBackend(ABC):
+    """Storage for cached answers. `lookup` returns the nearest entry above `threshold`."""
+
+    @abstractmethod
+    async def lookup(self, namespace: str, embedding: np.ndarray, threshold: float, ttl: float) -> Optional[CacheHit]:
+        ...
+
+    @abstractmethod
+    async def store(self, namespace: str, question: str, embedding: np.ndarray, response: dict[str, Any]) -> int:
+        """Store an entry and return the number of entries evicted to stay within bounds."""
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+
+@dataclass
+class _MemoryEntry:
+    embedding: np.ndarray
+    response: dict[str, Any]
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class InMemorySemanticCacheBackend(SemanticCacheBackend):
+    """Per-process backend: one LRU-ordered dict and one embedding matrix per namespace."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: dict[str, OrderedDict[int, _MemoryEntry]] = {}
+        self._matrix: dict[str, tuple[list[int], np.ndarray]] = {}
+        self._next_key = 0
+
+    def _index(self, namespace: str) -> tuple[list[int], np.ndarray]:
+        index = self._matrix.get(namespace)
+        if index is None:
+            entries = self._entries.get(namespace, OrderedDict())
+            keys = list(entries.keys())
+            matrix = np.stack([e.embedding for e in entries.values()]) if keys else np.empty((0, 0), dtype=np.float32)
+            index = self._matrix[namespace] = (keys, matrix)
+        return index
+
+    def _purge_expired(self, namespace: str, ttl: float) -> int:
+        entries = self._entries.get(namespace)
+        if not entries:
+            return 0
+        cutoff = time.monotonic() - ttl
+        expired = [key for key, entry in entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            del entries[key]
+        if expired:
+            self._matrix.pop(namespace, None)
+        return len(expired)
+
+    async def lookup(self, namespace, embedding, threshold, ttl):
+        self._purge_expired(namespace, ttl)
+        keys, matrix = self._index(namespace)
+        if not keys:
+            return None
+        similarities = matrix @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        entries = self._entries[namespace]
+        entries.move_to_end(keys[best])
+        return CacheHit(response=entries[keys[best]].response, similarity=float(similarities[best]))
+
+    async def store(self, namespace, question, embedding, response):
+        entries = self._entries.setdefault(namespace, OrderedDict())
+        entries[self._next_key] = _MemoryEntry(embedding=embedding, response=response)
+        self._next_key += 1
+        evicted = 0
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            evicted += 1
+        self._matrix.pop(namespace, None)
+        return evicted
+
+    async def clear(self):
+        self._entries.clear()
+        self._matrix.clear()
+
+
+class PgvectorSemanticCacheBackend(SemanticCacheBackend):
+    """Shared backend on the `semantic_cache` table, so every replica sees the same entries."""
+
+    def __init__(self, max_entries: int = 10000, session_maker=async_session_maker):
+        self.max_entries = max_entries
+        self.session_maker = session_maker
+
+    async def lookup(self, namespace, embedding, threshold, ttl):
+        cutoff = datetime.datetime.now() - datetime.timedelta(seconds=ttl)
+        distance = SemanticCacheEntry.embedding.cosine_distance(embedding)
+        query = (
+            select(SemanticCacheEntry.id, SemanticCacheEntry.response, distance.label("distance"))
+            .where(SemanticCacheEntry.namespace == namespace, SemanticCacheEntry.created_at >= cutoff)
+            .order_by(distance)
+            .limit(1)
+        )
+        async with self.session_maker() as session:
+            row = (await session.execute(query)).first()
+            if row is None or 1 - row.distance < threshold:
+                return None
+            await session.execute(
+                update(SemanticCacheEntry)
+                .where(SemanticCacheEntry.id == row.id)
+                .values(hits=SemanticCacheEntry.hits + 1, last_hit_at=datetime.datetime.now())
+            )
+            await session.commit()
+            return CacheHit(response=row.response, similarity=1 - row.distance)
+
+    async def store(self, namespace, question, embedding, response):
+        async with self.session_maker() as session:
+            session.add(SemanticCacheEntry(namespace=namespace, question=question, embedding=embedding, response=response))
+            await session.flush()
+            count = await session.scalar(
+                select(func.count()).select_from(SemanticCacheEntry).where(SemanticCacheEntry.namespace == namespace)
+            )
+            evicted = 0
+            if count > self.max_entries:
+                # least recently hit entries go first
+                stale = (
+                    select(SemanticCacheEntry.id)
+                    .where(SemanticCacheEntry.namespace == namespace)
+                    .order_by(SemanticCacheEntry.last_hit_at)
+                    .limit(count - self.max_entries)
+                )
+                result = await session.execute(delete(SemanticCacheEntry).where(SemanticCacheEntry.id.in_(stale)))
+                evicted = result.rowcount
+            await session.commit()
+            return evicted
+
+    async def clear(self):
+        async with self.session_maker() as session:
+            await session.execute(delete(SemanticCacheEntry))
+            await session.commit()
+
+
+class SemanticCache:
+    """
+    Looks up cached structured answers by cosine similarity of the question embedding.
+
+    Entries are scoped by namespace (endpoint + response schema) so an answer cached
+    for one response shape is never returned for another. Only answers that depend on
+    the question alone belong here; answers built from a chat session's history would
+    leak that history to other sessions.
+    """
+
+    def __init__(self, backend: SemanticCacheBackend, enabled: bool = False, threshold: float = 0.95, ttl: float = 3600):
+        self.backend = backend
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def namespace(endpoint: str, schema: type) -> str:
+        return f"{endpoint}:{schema.__name__}"
+
+    async def lookup(self, namespace: str, embedding) -> Optional[dict[str, Any]]:
+        if not self.enabled:
+            return None
+        hit = await self.backend.lookup(namespace, normalize(embedding), self.threshold, self.ttl)
+        if hit is None:
+            self.misses += 1
+            cache_events.inc(event="miss")
+            return None
+        self.hits += 1
+        cache_events.inc(event="hit")
+        return hit.response
+
+    async def store(self, namespace: str, question: str, embedding, response: dict[str, Any]):
+        if not self.enabled:
+            return
+        evicted = await self.backend.store(namespace, question, normalize(embedding), response)
+        self.evictions += evicted
+        self.stores += 1
+        cache_events.inc(event="store")
+        if evicted:
+            cache_events.inc(evicted, event="evict")
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+def create_semantic_cache() -> SemanticCache:
+    max_entries = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+    if os.getenv("SEMANTIC_CACHE_BACKEND", "memory") == "pgvector":
+        backend: SemanticCacheBackend = PgvectorSemanticCacheBackend(max_entries=max_entries)
+    else:
+        backend = InMemorySemanticCacheBackend(max_entries=max_entries)
+    return SemanticCache(
+        backend,
+        enabled=os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true",
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+        ttl=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+    )
+
+
+semantic_cache = create_semantic_cache()
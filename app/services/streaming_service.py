@@ -0,0 +1,59 @@
+"""Server-Sent Events helpers for streaming LLM answers to the client."""
+
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.logger import logger
+from app.services.llm_service import LLMClient
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # disable proxy buffering (nginx ingress)
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_llm_answer(
+    http_request: Request,
+    llm_client: LLMClient,
+    prompt: Any,
+    on_complete: Callable[[str], Awaitable[Any]],
+) -> AsyncIterator[str]:
+    """
+    Stream `token` events while the model generates, then a final `done` event.
+
+    `on_complete` receives the assembled answer and is only called when the stream
+    finished; a client disconnect stops generation and nothing is persisted.
+    """
+    chunks: list[str] = []
+    try:
+        async for token in llm_client.astream(prompt):
+            if await http_request.is_disconnected():
+                logger.info("stream cancelled", extra={"url": http_request.url.path})
+                return
+            chunks.append(token)
+            yield sse_event("token", {"token": token})
+    except TimeoutError:
+        yield sse_event("error", {"detail": "LLM request timed out"})
+        return
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+        return
+
+    answer = "".join(chunks)
+    try:
+        result = await on_complete(answer)
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+        return
+    yield sse_event("done", result if result is not None else {"long_answer": answer})
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,273 @@
+"""
+Prometheus metrics and optional OpenTelemetry tracing for the request hot paths.
+
+Metrics are kept in process and rendered in the Prometheus text format by `GET /metrics`.
+Tracing is off unless OTEL_ENABLED=true and the opentelemetry SDK and OTLP exporter are
+installed; spans are then exported to OTEL_EXPORTER_OTLP_ENDPOINT.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from app.logger import logger
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [count per bucket (not cumulative), sum, count]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{format_value(bound)}"'
+                yield f"{self.name}_bucket{format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, key)} {format_value(total)}"
+            yield f"{self.name}_count{format_labels(self.labelnames, key)} {count}"
+
+
+class Gauge:
+    """Read at scrape time from `collect`, which returns (labels, value) pairs."""
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Iterable[tuple[dict, float]]]):
+        self.name, self.help, self.collect = name, help, collect
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        try:
+            samples = list(self.collect())
+        except Exception as e:
+            logger.warning("metrics gauge failed", extra={"gauge": self.name, "error": str(e)})
+            return
+        for labels, value in samples:
+            yield f"{self.name}{format_labels(list(labels), list(labels.values()))} {format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram | Gauge] = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, collect: Callable[[], Iterable[tuple[dict, float]]]) -> Gauge:
+        return self._add(Gauge(name, help, collect))
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+llm_request_seconds = metrics.histogram(
+    "llm_request_duration_seconds", "LLM provider call latency, queueing for a slot excluded.", ("model", "mode")
+)
+llm_tokens = metrics.counter("llm_tokens_total", "LLM tokens by model and direction.", ("model", "direction"))
+batch_seconds = metrics.histogram("batch_duration_seconds", "Micro-batch execution time.", ("batcher",), FAST_BUCKETS)
+batch_size = metrics.histogram("batch_size", "Items per micro-batch.", ("batcher",), SIZE_BUCKETS)
+db_query_seconds = metrics.histogram("db_query_duration_seconds", "Database statement latency.", ("operation",), FAST_BUCKETS)
+db_pool_wait_seconds = metrics.histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection.", (), FAST_BUCKETS)
+workflow_node_seconds = metrics.histogram(
+    "workflow_node_duration_seconds", "Workflow node latency.", ("node", "status"), FAST_BUCKETS
+)
+event_loop_lag_seconds = metrics.histogram("event_loop_lag_seconds", "Event loop scheduling delay.", (), FAST_BUCKETS)
+
+SQL_OPERATIONS = {"select", "insert", "update", "delete", "with", "begin", "commit", "rollback", "copy"}
+
+
+def sql_operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return word if word in SQL_OPERATIONS else "other"
+
+
+class LoopLagMonitor:
+    """Samples how late a periodic `asyncio.sleep` wakes up, i.e. how long ready work waits for the loop."""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(time.perf_counter() - start - self.interval, 0.0)
+            event_loop_lag_seconds.observe(self.last_lag)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="event-loop-lag")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor(float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5")))
+metrics.gauge("event_loop_lag_last_seconds", "Most recent event loop lag sample.", lambda: [({}, loop_lag_monitor.last_lag)])
+
+
+@lru_cache(maxsize=1)
+def tracer():
+    """The OpenTelemetry tracer when OTEL_ENABLED=true and the SDK is installed, else None."""
+    if os.getenv("OTEL_ENABLED", "false").lower() not in ("1", "true", "yes"):
+        return None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError as e:
+        logger.warning("OTEL_ENABLED is set but opentelemetry is not installed", extra={"error": str(e)})
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", "ai-agentic-api")}))
+    # endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer("app")
+
+
+def span(name: str, **attributes):
+    """Child span of the current one, or a no-op context when tracing is off."""
+    current = tracer()
+    if current is None:
+        return nullcontext()
+    return current.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None})
+
+
+def server_span(scope: dict):
+    """Span for an incoming HTTP request, continuing a `traceparent` sent by the caller."""
+    current = tracer()
+    if current is None:
+        return nullcontext()
+    from opentelemetry import propagate, trace
+
+    carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope.get("headers", ())}
+    return current.start_as_current_span(
+        f"{scope['method']} {scope['path']}",
+        context=propagate.extract(carrier),
+        kind=trace.SpanKind.SERVER,
+        attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+    )
+
+
+def instrument_engine(engine):
+    """Time every statement of `engine` (and trace it when tracing is on) via cursor events."""
+    from sqlalchemy import event
+
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        operation = sql_operation(statement)
+        context._telemetry = (time.perf_counter(), operation, None)
+        current = tracer()
+        if current is not None:
+            db_span = current.start_span(
+                f"db {operation}", attributes={"db.system": sync_engine.dialect.name, "db.statement": statement[:500]}
+            )
+            context._telemetry = (context._telemetry[0], operation, db_span)
+
+    def finish(context, error: Optional[BaseException] = None):
+        started = getattr(context, "_telemetry", None)
+        if started is None:
+            return
+        start, operation, db_span = started
+        context._telemetry = None
+        db_query_seconds.observe(time.perf_counter() - start, operation=operation)
+        if db_span is not None:
+            if error is not None:
+                db_span.record_exception(error)
+            db_span.end()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        finish(context)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        if exception_context.execution_context is not None:
+            finish(exception_context.execution_context, exception_context.original_exception)
@@ -0,0 +1,90 @@
+"""Per-node latency and state size for langgraph workflows."""
+
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+from app.logger import logger
+from app.services.telemetry import span, workflow_node_seconds
+
+# node timings of the workflow run in progress, collected for the run log line
+current_run: contextvars.ContextVar[list | None] = contextvars.ContextVar("workflow_run", default=None)
+
+
+def state_size(state: Any) -> int:
+    """Serialized size of a graph state in bytes."""
+    if isinstance(state, BaseModel):
+        return len(state.model_dump_json())
+    return len(json.dumps(state, default=str))
+
+
+class NodeMetrics:
+    def __init__(self):
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, node: str, seconds: float, state_bytes: int, failed: bool = False):
+        with self._lock:
+            stats = self._stats.setdefault(
+                node, {"calls": 0, "errors": 0, "seconds_total": 0.0, "seconds_max": 0.0, "state_bytes_last": 0, "state_bytes_max": 0}
+            )
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["seconds_total"] += seconds
+            stats["seconds_max"] = max(stats["seconds_max"], seconds)
+            stats["state_bytes_last"] = state_bytes
+            stats["state_bytes_max"] = max(stats["state_bytes_max"], state_bytes)
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                node: {**stats, "seconds_avg": stats["seconds_total"] / stats["calls"]}
+                for node, stats in self._stats.items()
+            }
+
+
+node_metrics = NodeMetrics()
+
+
+def timed_node(name: str, fn: Callable) -> Callable:
+    """Wrap a node (sync or async) so every call records its latency and input state size."""
+
+    @functools.wraps(fn)
+    async def wrapper(state):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = fn(state)
+            if inspect.isawaitable(result):
+                result = await result
+            failed = False
+            return result
+        finally:
+            seconds = time.perf_counter() - start
+            state_bytes = state_size(state)
+            node_metrics.record(name, seconds, state_bytes, failed)
+            workflow_node_seconds.observe(seconds, node=name, status="error" if failed else "ok")
+            run = current_run.get()
+            if run is not None:
+                run.append({"node": name, "seconds": round(seconds, 6), "state_bytes": state_bytes, "failed": failed})
+
+    return wrapper
+
+
+async def run_workflow(workflow, state: Any, name: str = "workflow") -> Any:
+    """`ainvoke` the compiled graph and log one line with the timing of every node that ran."""
+    run: list[dict] = []
+    token = current_run.set(run)
+    start = time.perf_counter()
+    try:
+        with span(f"workflow {name}"):
+            return await workflow.ainvoke(state)
+    finally:
+        current_run.reset(token)
+        logger.info("workflow run", extra={"workflow": name, "seconds": time.perf_counter() - start, "nodes": run})
@@ -1,5 +1,8 @@
+from functools import lru_cache
 from pyparsing import Literal
 from app.schemas.ticket_trans_schema import TicketAgenticChatSch
+from app.workflow.function.field_validator import ticket_field_validator
+from app.workflow.instrumentation import timed_node
 from langgraph.graph import StateGraph
 from langgraph.graph import START, END
 
@@ -15,9 +18,6 @@ def validate_field(state:TicketAgenticChatSch)->bool:
 def ticket_creation(state:TicketAgenticChatSch):
     return state
 
-def ticket_field_validator(state:TicketAgenticChatSch):
-    return state
-
 def retrieve_ticket(state:TicketAgenticChatSch):
     return state
 
@@ -26,11 +26,15 @@ def final_node(state:TicketAgenticChatSch):
 
 ticket_graph_builder = StateGraph(TicketAgenticChatSch)
 # graph
-ticket_graph_builder.add_node("inference_ticket_intent", inference_ticket_intent)
-ticket_graph_builder.add_node("ticket_field_validator", ticket_field_validator)
-ticket_graph_builder.add_node("retrieve_ticket", retrieve_ticket)
-ticket_graph_builder.add_node("ticket_creation", ticket_creation)
-ticket_graph_builder.add_node("final_node", final_node)
+# every node is timed, see app/workflow/instrumentation.py
+for name, node in [
+    ("inference_ticket_intent", inference_ticket_intent),
+    ("ticket_field_validator", ticket_field_validator),
+    ("retrieve_ticket", retrieve_ticket),
+    ("ticket_creation", ticket_creation),
+    ("final_node", final_node),
+]:
+    ticket_graph_builder.add_node(name, timed_node(name, node))
 
 #add start & end
 ticket_graph_builder.add_edge(START, "inference_ticket_intent")
@@ -64,4 +68,10 @@ ticket_graph_builder.add_edge("retrieve_ticket", "final_node")
 ticket_graph_builder.add_edge("final_node", END)
 ticket_graph_builder.set_finish_point("final_node")
 
+# compiled once at import; run it with `run_workflow` (ainvoke) so async nodes don't block the loop
 ticket_trans_workflow=ticket_graph_builder.compile()
+
+@lru_cache(maxsize=1)
+def ticket_trans_workflow_png() -> bytes:
+    # draw_mermaid_png renders through mermaid.ink, so only do it once per process
+    return ticket_trans_workflow.get_graph().draw_mermaid_png()
@@ -0,0 +1,144 @@
+"""
+Retrieval latency benchmark for chat_content similarity search.
+
+Seeds one chat session per size with random 384-d embeddings (generated server side)
+into a scratch `retrieval_bench` schema, so the live chat_content table and its HNSW
+index are never touched. The HNSW index is built once after seeding, as a bulk build
+is much faster than maintaining it row by row. Then times `retrieve_similar_content`
+in exact and approximate (HNSW) mode, with the scratch schema first on the search_path
+and the seeded size passed in (so no query pays for counting the session), and prints
+p50/p99 latency as JSON. The schema is dropped afterwards unless --keep.
+Needs a Postgres with pgvector at DB_URL.
+
+    uv run python -m benchmarks.chat_retrieval_bench --sizes 10000 100000 1000000 --queries 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config.db_config import DB_URL, engine_kwargs, init_db, register_vector_codec
+from app.model.base_model import generate_ulid
+from app.services.chat_retrieval import retrieve_similar_content
+
+SCHEMA = "retrieval_bench"
+
+# same columns as chat_content, without its foreign key and indexes
+CREATE_STATEMENTS = [
+    f"drop schema if exists {SCHEMA} cascade",
+    f"create schema {SCHEMA}",
+    f"create table {SCHEMA}.chat_content (like public.chat_content including defaults)",
+    f"alter table {SCHEMA}.chat_content add primary key (id)",
+    f"create index on {SCHEMA}.chat_content (chat_session_id, id)",
+]
+# the same index as app/model/chat_content.py
+HNSW_INDEX = f"create index on {SCHEMA}.chat_content using hnsw (embedding vector_ip_ops) with (m = 16, ef_construction = 64)"
+
+# the app's engine settings, but the scratch tables shadow the live ones for every
+# unqualified name in the app's queries, and seeding/index builds are not timed out
+bench_engine_kwargs = engine_kwargs()
+bench_engine_kwargs["connect_args"] = {
+    **bench_engine_kwargs.get("connect_args", {}),
+    "server_settings": {"search_path": f"{SCHEMA},public", "statement_timeout": "0"},
+}
+engine = create_async_engine(DB_URL, **bench_engine_kwargs)
+# NativeVector binds float32 arrays, which asyncpg only encodes with the pgvector codec
+register_vector_codec(engine)
+async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+SEED_QUERY = text("""
+    insert into chat_content (id, chat_session_id, content, role, embedding, created_by, updated_by, created_at, updated_at)
+    select :prefix || lpad(g::text, 16, '0'), :chat_session_id, 'bench message ' || g,
+           case when g % 2 = 0 then 'human' else 'ai' end,
+           (select array_agg(random()::real) from generate_series(1, 384) where g > 0)::vector,
+           'bench', 'bench', now(), now()
+    from generate_series(cast(:start as integer), cast(:stop as integer)) g""")
+
+
+async def create_schema():
+    async with engine.begin() as conn:
+        for statement in CREATE_STATEMENTS:
+            await conn.execute(text(statement))
+
+
+async def build_index() -> float:
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.execute(text(HNSW_INDEX))
+        await conn.execute(text("analyze chat_content"))
+    return time.perf_counter() - start
+
+
+async def drop_schema():
+    async with engine.begin() as conn:
+        await conn.execute(text(f"drop schema if exists {SCHEMA} cascade"))
+
+
+async def seed_session(size: int, chunk: int = 50_000) -> str:
+    chat_session_id = generate_ulid()
+    prefix = chat_session_id[-10:]
+    async with async_session_maker() as db:
+        for start in range(1, size + 1, chunk):
+            await db.execute(SEED_QUERY, {
+                "prefix": prefix,
+                "chat_session_id": chat_session_id,
+                "start": start,
+                "stop": min(start + chunk - 1, size),
+            })
+            await db.commit()
+    return chat_session_id
+
+
+async def time_queries(chat_session_id: str, size: int, queries: int, exact_max_rows: int) -> dict:
+    latencies = []
+    rng = np.random.default_rng(0)
+    for _ in range(queries):
+        embedding = rng.random(384, dtype=np.float32)
+        async with async_session_maker() as db:
+            start = time.perf_counter()
+            await retrieve_similar_content(db, chat_session_id, embedding, limit=5, exact_max_rows=exact_max_rows, size=size)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+async def main(sizes: list[int], queries: int, keep: bool):
+    # the live schema, for the vector extension and the table the scratch one copies
+    await init_db()
+    await create_schema()
+    try:
+        sessions = []
+        for size in sizes:
+            seed_start = time.perf_counter()
+            sessions.append((size, await seed_session(size), time.perf_counter() - seed_start))
+        index_seconds = await build_index()
+        report = [
+            {
+                "rows": size,
+                "seed_seconds": round(seed_seconds, 1),
+                "exact": await time_queries(chat_session_id, size, queries, exact_max_rows=size),
+                "approximate": await time_queries(chat_session_id, size, queries, exact_max_rows=0),
+            }
+            for size, chat_session_id, seed_seconds in sessions
+        ]
+    finally:
+        if not keep:
+            await drop_schema()
+        await engine.dispose()
+    print(json.dumps({"index_seconds": round(index_seconds, 1), "sizes": report}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema after the run")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.queries, args.keep))
@@ -0,0 +1,83 @@
+"""
+Embedding runtime benchmark: torch fp32 vs ONNX fp32 vs ONNX int8 on CPU.
+
+Encodes batches of chat-sized sentences with each runtime and prints, per batch size,
+sentences/sec and p50/p99 latency per batch, plus each runtime's cosine agreement with
+torch fp32 on the validation sentences, as JSON. ONNX files are exported on first use.
+
+    uv run python -m benchmarks.embedding_bench --batch-sizes 1 8 32 128 --threads 4
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.config.sbert_config import EMBEDDING_MODEL_NAME
+from app.services import embedding_runtime
+
+WORDS = (
+    "project unit invoice customer refund agent message summary book author genre year "
+    "proyek tagihan pelanggan pesan ringkasan jadwal rapat error upload csv rows password"
+).split()
+
+
+def make_sentences(count: int, seed: int = 0) -> list[str]:
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(WORDS, size=int(rng.integers(4, 40)))) for _ in range(count)]
+
+
+def time_batches(model, sentences: list[str], batch_size: int, repeats: int) -> dict:
+    batches = [sentences[i : i + batch_size] for i in range(0, len(sentences), batch_size)][:repeats]
+    model.encode(batches[0], batch_size=batch_size)  # warm-up
+    latencies = []
+    start = time.perf_counter()
+    for batch in batches:
+        batch_start = time.perf_counter()
+        model.encode(batch, batch_size=batch_size, convert_to_numpy=True)
+        latencies.append((time.perf_counter() - batch_start) * 1000)
+    elapsed = time.perf_counter() - start
+    return {
+        "batch_size": batch_size,
+        "sentences_per_sec": round(sum(len(batch) for batch in batches) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def main(runtimes: list[str], batch_sizes: list[int], repeats: int, threads: int, root: str, quantization_config: str):
+    sentences = make_sentences(max(batch_sizes) * repeats)
+    reference = None
+    report = []
+    for runtime in runtimes:
+        load_start = time.perf_counter()
+        model = embedding_runtime.load_model(EMBEDDING_MODEL_NAME, runtime, threads, root, quantization_config)
+        load_seconds = time.perf_counter() - load_start
+        embedding_runtime.check_dimension(model, runtime)
+        vectors = embedding_runtime.encode_validation(model)
+        if reference is None:
+            reference = (
+                vectors if runtime == "torch"
+                else embedding_runtime.encode_validation(embedding_runtime.load_model(EMBEDDING_MODEL_NAME, "torch", threads))
+            )
+        report.append({
+            "runtime": runtime,
+            "threads": threads or None,
+            "load_seconds": round(load_seconds, 2),
+            **embedding_runtime.cosine_agreement(reference, vectors),
+            "batches": [time_batches(model, sentences, batch_size, repeats) for batch_size in batch_sizes],
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runtimes", nargs="+", default=list(embedding_runtime.RUNTIMES), choices=embedding_runtime.RUNTIMES)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--repeats", type=int, default=20, help="batches timed per batch size")
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads, 0 keeps the library default")
+    parser.add_argument("--onnx-dir", default="app/model/onnx")
+    parser.add_argument("--quantization-config", default="avx2", choices=embedding_runtime.QUANTIZATION_CONFIGS)
+    args = parser.parse_args()
+    main(args.runtimes, args.batch_sizes, args.repeats, args.threads, args.onnx_dir, args.quantization_config)
@@ -0,0 +1,345 @@
+"""
+Load test of the main endpoints against the full app, with local stand-ins for the models.
+
+Boots `app.main:app` in process (lifespan included) with `FakeChatModel` in place of both
+Groq clients and `HashEmbedder` (or a small sentence-transformers model) in place of
+all-MiniLM, seeds reference projects/units and a chat session, then drives every scenario
+at the given concurrency through httpx's ASGI transport. Per scenario it reports throughput,
+latency percentiles, event-loop lag and RSS as JSON.
+
+DB_URL picks the database, a throwaway SQLite file by default (needs aiosqlite).
+`chat_continue` runs pgvector similarity search and is skipped on anything but PostgreSQL.
+
+    uv run python -m benchmarks.load_bench --requests 300 --concurrency 20 --output load-bench.json
+    uv run python -m benchmarks.load_bench --baseline load-bench-main.json --fail-on-regression
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.stand_ins import FakeChatModel, HashEmbedder
+
+SCENARIOS = ("chat_start", "chat_continue", "ticket_agentic", "predict_iris", "mcp_books")
+REFERENCE_PROJECTS = 200
+UNITS_PER_PROJECT = 5
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[int], str]
+    body: Optional[Callable[[int], dict]] = None
+    params: Optional[dict] = None
+
+
+def question(i: int) -> dict:
+    # distinct questions, so a semantic cache (if enabled) does not short-circuit the model
+    return {"question": f"load bench question {i}: what is the handover schedule of my unit?"}
+
+
+def build_scenarios(chat_session_id: Optional[str]) -> dict[str, Scenario]:
+    return {
+        "chat_start": Scenario("chat_start", "POST", lambda i: "/chat/start-chat", question),
+        "chat_continue": Scenario("chat_continue", "POST", lambda i: f"/chat/start-chat/{chat_session_id}", question),
+        "ticket_agentic": Scenario("ticket_agentic", "POST", lambda i: "/ticket-agentic/start-chat", question),
+        "predict_iris": Scenario("predict_iris", "POST", lambda i: "/predict/iris", lambda i: {"data": [5.1, 3.5, 1.4, 0.2]}),
+        "mcp_books": Scenario(
+            "mcp_books", "GET", lambda i: "/mcp/books",
+            params={"genre": "Business", "sort_by": "total_penjualan", "limit": 5},
+        ),
+    }
+
+
+def configure_environment(args):
+    """Set before `app.main` is imported: the engine and rate limiter read these at import time."""
+    workdir = tempfile.mkdtemp(prefix="load-bench-")
+    os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{workdir}/load_bench.db")
+    os.environ["RATE_LIMIT_DEFAULT"] = "1000000000/second"
+    os.environ["RATE_LIMIT_LLM"] = "1000000000/second"
+    os.environ["WARM_RESOURCES"] = ""
+    os.environ.setdefault("CHAT_MEMORY_PATH", os.path.join(workdir, "chat-memory.sqlite3"))
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", str(args.llm_max_concurrency))
+
+
+def install_stand_ins(args, codes: dict[str, list[str]]):
+    from app.config.resources import resources
+    from app.services.llm_service import LLMClient
+
+    def fake_client(model_name: str) -> LLMClient:
+        llm = FakeChatModel(
+            model_name=model_name,
+            latency_ms=args.llm_latency_ms,
+            tokens_per_second=args.llm_tokens_per_second,
+            output_tokens=args.llm_output_tokens,
+            choices=codes,
+        )
+        return LLMClient(llm, max_concurrency=args.llm_max_concurrency, timeout=60, model_name=model_name)
+
+    # same names as app/config, registered after it so these win; nothing is built yet
+    resources.register("llm_client", lambda: fake_client("qwen/qwen3-32b"))
+    resources.register("gemma_llm_client", lambda: fake_client("gemma2-9b-it"))
+    if args.embedding_model != "hash":
+        def load_embedding_model():
+            from sentence_transformers import SentenceTransformer
+
+            return SentenceTransformer(args.embedding_model)
+
+        resources.register("sbert_model", load_embedding_model)
+    else:
+        resources.register("sbert_model", HashEmbedder)
+
+
+async def seed_references() -> dict[str, list[str]]:
+    """Projects and units for the ticket workflow's code matcher; returns the codes the fake model may answer."""
+    from app.config.db_config import async_session_maker
+    from app.services.bulk_ingest import ingest
+
+    async def projects():
+        for p in range(REFERENCE_PROJECTS):
+            yield {"id": f"01BENCHPRJ{p:016d}", "code": f"PRJ{p:04d}", "name": f"Bench Residence {p}", "description": None}
+
+    async def units():
+        for p in range(REFERENCE_PROJECTS):
+            for u in range(UNITS_PER_PROJECT):
+                yield {
+                    "id": f"01BENCHTWR{p * UNITS_PER_PROJECT + u:016d}",
+                    "dummy_project_id": f"01BENCHPRJ{p:016d}",
+                    "code": f"T{u}-{p:04d}",
+                    "name": f"Tower {u} Unit {p}",
+                    "description": None,
+                }
+
+    async with async_session_maker() as db:
+        await ingest(db, "project", projects())
+        await ingest(db, "unit", units())
+    # exact codes, near misses for the fuzzy path and unknown ones for the semantic path
+    project_codes = [f"PRJ{p:04d}" for p in range(0, REFERENCE_PROJECTS, 7)]
+    return {
+        "project_code": project_codes + [code.lower().replace("prj", "prj-") for code in project_codes] + ["Bench Residense", None],
+        "unit_code": [f"T{u}-{p:04d}" for u in range(UNITS_PER_PROJECT) for p in range(0, 50, 7)] + [None],
+    }
+
+
+async def seed_chat_session(history: int) -> str:
+    from app.config.db_config import async_session_maker
+    from app.model.chat_content import ChatContent
+    from app.model.chat_session import ChatSession
+    from app.services.embedding_service import embedding_service
+
+    texts = [f"history message {i} about unit {i % 17} and its payment schedule" for i in range(history)]
+    embeddings = await embedding_service.encode_many(texts) if texts else []
+    async with async_session_maker() as db:
+        session = ChatSession(title="load bench")
+        db.add(session)
+        await db.flush()
+        db.add_all([
+            ChatContent(chat_session_id=session.id, content=text, role="human" if i % 2 == 0 else "ai", embedding=embedding)
+            for i, (text, embedding) in enumerate(zip(texts, embeddings))
+        ])
+        await db.commit()
+        return session.id
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def percentiles(values: list[float], points=(50, 95, 99)) -> dict:
+    if not values:
+        return {}
+    array = np.asarray(values) * 1000
+    summary = {f"p{p}": round(float(np.percentile(array, p)), 3) for p in points}
+    summary["max"] = round(float(array.max()), 3)
+    return summary
+
+
+class LoopLagMonitor:
+    """Oversleep of a periodic `asyncio.sleep`: how long ready callbacks waited for the loop."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: list[float] = []
+        self.peak_rss = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(time.perf_counter() - start - self.interval, 0.0))
+            self.peak_rss = max(self.peak_rss, rss_mb())
+
+    def start(self):
+        self.lags, self.peak_rss = [], rss_mb()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return percentiles(self.lags, points=(50, 99))
+
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int, offset: int = 0):
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    counter = itertools.count(offset)
+    last = offset + requests
+
+    async def worker():
+        while (i := next(counter)) < last:
+            start = time.perf_counter()
+            try:
+                response = await client.request(
+                    scenario.method, scenario.path(i),
+                    json=scenario.body(i) if scenario.body else None,
+                    params=scenario.params,
+                )
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, args) -> dict:
+    await drive(client, scenario, args.warmup, min(args.concurrency, max(args.warmup, 1)), offset=10**6)
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    latencies, statuses = await drive(client, scenario, args.requests, args.concurrency)
+    seconds = time.perf_counter() - start
+    loop_lag = await monitor.stop()
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(latencies) / seconds, 2) if seconds else None,
+        "latency_ms": {**percentiles(latencies), "mean": round(float(np.mean(latencies)) * 1000, 3) if latencies else None},
+        "loop_lag_ms": loop_lag,
+        "rss_mb": {"after": round(rss_mb(), 1), "peak": round(max(monitor.peak_rss, rss_mb()), 1)},
+    }
+
+
+async def run(args) -> dict:
+    from app.logger import logger
+
+    # the access log line per request would dominate the profile, and keeps stdout JSON only
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.WARNING)
+    from app.config.db_config import engine
+    from app.main import app
+
+    codes = {}
+    install_stand_ins(args, codes)
+    report = {
+        "config": {
+            key: getattr(args, key)
+            for key in ("requests", "concurrency", "warmup", "llm_latency_ms", "llm_tokens_per_second",
+                        "llm_output_tokens", "llm_max_concurrency", "embedding_model", "chat_history")
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+        },
+        "scenarios": {},
+    }
+    async with app.router.lifespan_context(app):
+        codes.update(await seed_references())
+        chat_session_id = None
+        if engine.dialect.name == "postgresql":
+            chat_session_id = await seed_chat_session(args.chat_history)
+        scenarios = build_scenarios(chat_session_id)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for name in args.scenarios:
+                if name == "chat_continue" and chat_session_id is None:
+                    report["scenarios"][name] = {"skipped": "needs PostgreSQL with pgvector"}
+                    continue
+                report["scenarios"][name] = await run_scenario(client, scenarios[name], args)
+                print(f"{name}: {json.dumps(report['scenarios'][name]['latency_ms'])}", file=sys.stderr)
+            report["app_metrics"] = {
+                path: (await client.get(f"/metrics/{path}")).json() for path in ("tokens", "workflow", "pool")
+            }
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list[str]:
+    """Regressions of `report` against `baseline`: slower p95, lower throughput or new errors."""
+    regressions = []
+    for name, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or "skipped" in result or "skipped" in base:
+            continue
+        p95, base_p95 = result["latency_ms"]["p95"], base["latency_ms"]["p95"]
+        if p95 > base_p95 * (1 + tolerance) and p95 - base_p95 > min_delta_ms:
+            regressions.append(f"{name}: p95 {p95} ms vs {base_p95} ms")
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['throughput_rps']} req/s vs {base['throughput_rps']} req/s")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: {result['errors']} errors vs {base['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="fake model time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=500.0)
+    parser.add_argument("--llm-output-tokens", type=int, default=64, help="words per generated text field")
+    parser.add_argument("--llm-max-concurrency", type=int, default=32)
+    parser.add_argument("--embedding-model", default="hash", help="'hash' or a sentence-transformers model name")
+    parser.add_argument("--chat-history", type=int, default=200, help="messages in the seeded chat session")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore p95 changes smaller than this")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    report = asyncio.run(run(args))
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance, args.min_delta_ms)
+
+    output = json.dumps(report, indent=2, default=str)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if args.fail_on_regression and report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
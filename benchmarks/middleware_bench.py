@@ -0,0 +1,99 @@
+"""
+Request throughput on /predict/iris with the old BaseHTTPMiddleware vs the pure ASGI middleware.
+
+Requests go through httpx's in-process ASGI transport, so the numbers measure framework
+and middleware overhead only (no sockets).
+
+    uv run python -m benchmarks.middleware_bench --requests 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.logger import logger
+from app.middleware import Middleware
+from app.routers import predict
+from app.services.rate_limiter import InMemoryRateLimitBackend, RateLimiter, RateLimitRule
+
+
+class LegacyMiddleware(BaseHTTPMiddleware):
+    """The previous implementation: rebuilds the whole request log on every call."""
+
+    def __init__(self, app, throttle_rate: int = 60):
+        super().__init__(app)
+        self.throttle_rate = throttle_rate
+        self.request_log = {}
+
+    async def dispatch(self, request: Request, call_next):
+        client_ip = request.client.host
+        now = time.time()
+        self.request_log = {
+            ip: [ts for ts in times if ts > now - 60]
+            for ip, times in self.request_log.items()
+        }
+        ip_history = self.request_log.get(client_ip, [])
+        ip_history.append(now)
+        self.request_log[client_ip] = ip_history
+
+        start = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start
+        log_dict = {'url': request.url.path, 'method': request.method, 'process_time': process_time}
+        logger.info(log_dict, extra=log_dict)
+        return response
+
+
+def build_app(legacy: bool) -> FastAPI:
+    app = FastAPI()
+    app.include_router(predict.router)
+    if legacy:
+        app.add_middleware(LegacyMiddleware, throttle_rate=10**9)
+    else:
+        unlimited = RateLimiter(InMemoryRateLimitBackend(), RateLimitRule("default", 10**9))
+        app.add_middleware(Middleware, rate_limiter=unlimited)
+    return app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    payload = {"data": [5.1, 3.5, 1.4, 0.2]}
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                response = await client.post("/predict/iris", json=payload)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int, concurrency: int):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = {}
+    for name, legacy in (("base_http_middleware", True), ("pure_asgi_middleware", False)):
+        app = build_app(legacy)
+        await run(app, min(requests, 200), concurrency)  # warm up
+        report[name] = {"req_per_sec": round(await run(app, requests, concurrency), 1)}
+    report["speedup"] = round(report["pure_asgi_middleware"]["req_per_sec"] / report["base_http_middleware"]["req_per_sec"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,139 @@
+"""
+Local stand-ins for the external models, so benchmarks run without Groq or a model download.
+
+`FakeChatModel` answers deterministically (same prompt, same answer) after a configurable
+first-token latency plus output tokens / token rate, streams at that rate and fills any
+structured-output schema. `HashEmbedder` is a sentence-transformers shaped encoder of
+hashed word features: texts sharing words get similar vectors.
+"""
+
+import asyncio
+import enum
+import hashlib
+import random
+import time
+import types
+import typing
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import numpy as np
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+WORDS = (
+    "project unit ticket customer payment schedule handover invoice building tower floor "
+    "request status update report issue service water electricity access parking contract"
+).split()
+
+
+def prompt_seed(input: Any) -> int:
+    if isinstance(input, list):
+        input = "\n".join(m.content if isinstance(m, BaseMessage) else str(m) for m in input)
+    elif hasattr(input, "to_string"):
+        input = input.to_string()
+    return int.from_bytes(hashlib.blake2b(str(input).encode(), digest_size=8).digest(), "big")
+
+
+class FakeChatModel(BaseChatModel):
+    model_name: str = "fake"
+    latency_ms: float = 200.0
+    tokens_per_second: float = 200.0
+    output_tokens: int = 64
+    # field name -> values to pick from in structured output, e.g. real project codes
+    choices: dict[str, list] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _text(self, rng: random.Random, tokens: Optional[int] = None) -> list[str]:
+        return [rng.choice(WORDS) for _ in range(tokens or self.output_tokens)]
+
+    def _delay(self, tokens: int) -> float:
+        return self.latency_ms / 1000 + tokens / self.tokens_per_second
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        words = self._text(random.Random(prompt_seed(messages)))
+        time.sleep(self._delay(len(words)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        words = self._text(random.Random(prompt_seed(messages)))
+        await asyncio.sleep(self._delay(len(words)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(words)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency_ms / 1000)
+        for word in self._text(random.Random(prompt_seed(messages))):
+            time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        for word in self._text(random.Random(prompt_seed(messages))):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+    def fill(self, schema: type[BaseModel], rng: random.Random) -> BaseModel:
+        values = {name: self._value(name, field.annotation, rng) for name, field in schema.model_fields.items()}
+        return schema.model_validate(values)
+
+    def _value(self, name: str, annotation: Any, rng: random.Random) -> Any:
+        if name in self.choices:
+            return rng.choice(self.choices[name])
+        origin = typing.get_origin(annotation)
+        if origin in (typing.Union, types.UnionType):
+            annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+            return self._value(name, annotation, rng)
+        if origin is typing.Literal:
+            return rng.choice(typing.get_args(annotation))
+        if origin in (list, tuple, set):
+            return []
+        if isinstance(annotation, type):
+            if issubclass(annotation, enum.Enum):
+                return rng.choice(list(annotation))
+            if issubclass(annotation, BaseModel):
+                return self.fill(annotation, rng)
+            if issubclass(annotation, bool):
+                return True
+            if issubclass(annotation, int):
+                return rng.randrange(100)
+            if issubclass(annotation, float):
+                return rng.random()
+        return " ".join(self._text(rng))
+
+    def with_structured_output(self, schema, **kwargs):
+        def invoke(input):
+            answer = self.fill(schema, random.Random(prompt_seed(input)))
+            time.sleep(self._delay(self.output_tokens))
+            return answer
+
+        async def ainvoke(input):
+            answer = self.fill(schema, random.Random(prompt_seed(input)))
+            await asyncio.sleep(self._delay(self.output_tokens))
+            return answer
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+
+class HashEmbedder:
+    """Bag of hashed words, L2-normalized; `encode` matches SentenceTransformer's."""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in text.lower().split():
+            digest = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big")
+            vector[digest % self.dimension] += 1.0 if digest & (1 << 63) else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        vectors = np.stack([self._vector(text) for text in ([texts] if single else texts)])
+        return vectors[0] if single else vectors
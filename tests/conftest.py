@@ -0,0 +1,32 @@
+"""
+Shared fixtures. The app reads its settings from the environment at import time, so the
+throwaway SQLite database and stores are configured here, before anything in app/ loads.
+"""
+
+import os
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["DB_URL"] = f"sqlite+aiosqlite:///{WORKDIR}/test.db"
+os.environ["CHAT_MEMORY_PATH"] = os.path.join(WORKDIR, "chat-memory.sqlite3")
+os.environ["SEMANTIC_CACHE_BACKEND"] = "memory"
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+
+import pytest
+from sqlmodel import SQLModel
+
+import app.model  # noqa: F401  registers every table
+from app.config.db_config import async_session_maker, engine, init_db
+
+
+@pytest.fixture
+async def db():
+    """A session on an empty schema; every table is emptied again afterwards."""
+    await init_db()
+    async with async_session_maker() as session:
+        yield session
+    async with engine.begin() as conn:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            await conn.execute(table.delete())
+    # pooled aiosqlite connections belong to this test's event loop
+    await engine.dispose()
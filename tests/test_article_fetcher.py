@@ -0,0 +1,67 @@
+"""ArticleFetcher against an in-process HTTP stand-in (httpx.MockTransport)."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import article_fetcher as article_fetcher_module
+from app.services.article_fetcher import ArticleFetcher
+
+
+def stand_in(requests: list[str]):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(str(request.url))
+        path = request.url.path
+        if path.startswith("/slow"):
+            await asyncio.sleep(5)
+        if path == "/missing":
+            return httpx.Response(404)
+        if path == "/big":
+            return httpx.Response(200, content=b"x" * 10_000)
+        return httpx.Response(200, content=f"<title>{path}</title><p>body of {path}</p>".encode())
+
+    return handler
+
+
+@pytest.fixture
+async def fetcher(monkeypatch):
+    # newspaper's heuristics are not under test, the page is returned as is
+    monkeypatch.setattr(article_fetcher_module, "parse_article", lambda url, html: (url, html))
+    requests: list[str] = []
+    fetcher = ArticleFetcher(deadline=0.5, max_bytes=1000, parse_workers=0)
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(stand_in(requests)))
+    fetcher.requests = requests
+    yield fetcher
+    await fetcher.close()
+
+
+async def test_fetch_many_returns_what_is_ready_by_the_deadline(fetcher):
+    urls = [f"http://site.test/page{i}" for i in range(8)] + ["http://site.test/slow1", "http://site.test/slow2"]
+
+    articles = await fetcher.fetch_many(urls)
+
+    assert [article.url for article in articles] == urls[:8]
+    assert fetcher.stats()["timed_out"] == 2
+
+
+async def test_failed_downloads_are_skipped(fetcher):
+    articles = await fetcher.fetch_many(["http://site.test/missing", "http://site.test/ok"])
+
+    assert [article.url for article in articles] == ["http://site.test/ok"]
+    assert fetcher.stats()["failed"] == 1
+
+
+async def test_large_bodies_are_truncated(fetcher):
+    article = await fetcher.fetch("http://site.test/big")
+
+    assert article.truncated
+    assert len(article.text) == 1000
+
+
+async def test_repeat_fetch_is_served_from_cache(fetcher):
+    await fetcher.fetch("http://site.test/page")
+    await fetcher.fetch("http://site.test/page")
+
+    assert fetcher.requests == ["http://site.test/page"]
+    assert fetcher.stats()["cache_hits"] == 1
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from app.services.books_dataset import BooksDataset, BooksTable
+
+HEADER = "nama_buku,harga,total_penjualan,penulis,tahun_terbit,genre,rating\n"
+ROWS = [
+    "Laskar Pelangi,90000,500,Andrea Hirata,2005,Fiksi,4.8",
+    "Sang Pemimpi,85000,300,Andrea Hirata,2006,Fiksi,4.5",
+    "Filosofi Teras,98000,500,Henry Manampiring,2018,Filsafat,4.6",
+    "Bumi,95000,450,Tere Liye,2014,fiksi,4.4",
+]
+
+
+def write_csv(path, rows, mtime=None):
+    path.write_text(HEADER + "\n".join(rows) + "\n")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+@pytest.fixture
+def table(tmp_path):
+    return BooksTable.load(write_csv(tmp_path / "books.csv", ROWS))
+
+
+def titles(rows):
+    return [row["nama_buku"] for row in rows]
+
+
+def test_filters_combine(table):
+    assert titles(table.query(genre=" FIKSI ")) == ["Laskar Pelangi", "Sang Pemimpi", "Bumi"]
+    assert titles(table.query(genre="fiksi", author="hirata", year_from=2006)) == ["Sang Pemimpi"]
+    assert titles(table.query(year_from=2006, year_to=2014)) == ["Sang Pemimpi", "Bumi"]
+    assert table.query(genre="horor") == []
+
+
+def test_sort_keeps_file_order_between_ties(table):
+    assert titles(table.query(sort_by="total_penjualan")) == ["Laskar Pelangi", "Filosofi Teras", "Bumi", "Sang Pemimpi"]
+    assert titles(table.query(sort_by="total_penjualan", descending=False)) == ["Sang Pemimpi", "Bumi", "Laskar Pelangi", "Filosofi Teras"]
+
+
+def test_fields_limit_and_offset(table):
+    rows = table.query(sort_by="rating", fields=["nama_buku", "rating"], limit=2, offset=1)
+
+    assert rows == [{"nama_buku": "Filosofi Teras", "rating": 4.6}, {"nama_buku": "Sang Pemimpi", "rating": 4.5}]
+
+
+async def test_dataset_reloads_when_the_file_changes(tmp_path):
+    path = write_csv(tmp_path / "books.csv", ROWS, mtime=1_000_000)
+    dataset = BooksDataset(path, check_interval=0)
+
+    assert len(await dataset.query()) == 4
+    assert len(await dataset.query()) == 4
+    write_csv(tmp_path / "books.csv", ROWS[:2], mtime=2_000_000)
+
+    assert len(await dataset.query()) == 2
+    assert dataset.stats()["loads"] == 2 and dataset.stats()["queries"] == 3
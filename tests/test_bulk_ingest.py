@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from sqlmodel import select
+
+from app.model.base_model import generate_ulid
+from app.model.dummy_project import DummyProject
+from app.model.dummy_unit import DummyUnit
+from app.services.bulk_ingest import ingest, records
+
+
+async def chunks(text: str, size: int = 7):
+    # split mid-line so records spanning chunks are exercised
+    data = text.encode()
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def ndjson(*rows: dict) -> str:
+    return "\n".join(json.dumps(row) for row in rows) + "\n"
+
+
+async def test_csv_rows_are_validated_with_their_row_numbers(db):
+    text = 'code,name,description\nP1,First,"two\nlines"\nP2,,\nP3,Third,\n'
+
+    report = await ingest(db, "project", records(chunks(text), "csv"), batch_size=2)
+
+    assert (report.rows, report.inserted, report.invalid) == (3, 2, 1)
+    assert [error["row"] for batch in report.batches for error in batch.errors] == [2]
+    projects = (await db.scalars(select(DummyProject).order_by(DummyProject.code))).all()
+    assert [(p.code, p.description) for p in projects] == [("P1", "two\nlines"), ("P3", None)]
+
+
+async def test_non_ulid_ids_are_rejected(db):
+    good = generate_ulid()
+    text = ndjson(
+        {"id": good.lower(), "code": "P1", "name": "ok", "description": None},
+        {"id": "project-42", "code": "P2", "name": "bad id", "description": None},
+        {"id": 42, "code": "P3", "name": "bad id", "description": None},
+    )
+
+    report = await ingest(db, "project", records(chunks(text), "ndjson"))
+
+    assert (report.inserted, report.invalid) == (1, 2)
+    assert [error["row"] for error in report.batches[0].errors] == [2, 3]
+    assert list(await db.scalars(select(DummyProject.id))) == [good]
+
+
+async def test_rerun_with_ids_skips_rows_already_loaded(db):
+    text = ndjson(*({"id": generate_ulid(), "code": f"P{i}", "name": f"p{i}", "description": None} for i in range(5)))
+
+    first = await ingest(db, "project", records(chunks(text), "ndjson"), batch_size=2)
+    second = await ingest(db, "project", records(chunks(text), "ndjson"), batch_size=2)
+
+    assert (first.inserted, first.skipped) == (5, 0)
+    assert (second.inserted, second.skipped) == (0, 5)
+
+
+async def test_units_of_unknown_projects_are_dropped(db):
+    project_id = generate_ulid()
+    await ingest(db, "project", records(chunks(ndjson({"id": project_id, "code": "P", "name": "p", "description": None})), "ndjson"))
+    text = ndjson(
+        {"dummy_project_id": project_id, "code": "U1", "name": "u1", "description": None},
+        {"dummy_project_id": generate_ulid(), "code": "U2", "name": "u2", "description": None},
+    )
+
+    report = await ingest(db, "unit", records(chunks(text), "ndjson"))
+
+    assert (report.inserted, report.invalid, report.failed_batches) == (1, 1, 0)
+    assert list(await db.scalars(select(DummyUnit.code))) == ["U1"]
+
+
+async def test_invalid_json_lines_are_reported(db):
+    text = '{"code": "P1", "name": "ok", "description": null}\n{not json\n'
+
+    report = await ingest(db, "project", records(chunks(text), "ndjson"))
+
+    assert (report.inserted, report.invalid) == (1, 1)
+    assert report.batches[0].errors[0]["error"].startswith("invalid JSON")
+
+
+async def test_copy_without_asyncpg_fails_before_reading_rows(db):
+    read = []
+
+    async def rows():
+        read.append(True)
+        yield {"code": "P1", "name": "p", "description": None}
+
+    with pytest.raises(ValueError, match="asyncpg"):
+        await ingest(db, "project", rows(), method="copy")
+    assert read == []
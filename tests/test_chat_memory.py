@@ -0,0 +1,105 @@
+import asyncio
+import multiprocessing
+import os
+
+import pytest
+
+from app.services.chat_memory import JsonlChatMemoryStore, SQLiteChatMemoryStore, create_chat_memory_store
+
+
+def make_store(backend: str, directory: str, **kwargs):
+    if backend == "sqlite":
+        return SQLiteChatMemoryStore(os.path.join(directory, "memory.sqlite3"), **kwargs)
+    return JsonlChatMemoryStore(os.path.join(directory, "memory"), **kwargs)
+
+
+def turn(i: int) -> list[dict]:
+    return [{"role": "human", "content": f"question {i}"}, {"role": "ai", "content": f"answer {i}"}]
+
+
+@pytest.fixture(params=["sqlite", "jsonl"])
+def backend(request):
+    return request.param
+
+
+async def test_window_returns_the_latest_messages_oldest_first(backend, tmp_path):
+    store = make_store(backend, str(tmp_path))
+    try:
+        for i in range(5):
+            await store.append("s1", turn(i))
+        await store.append("s2", turn(99))
+
+        window = await store.window("s1", 3)
+    finally:
+        store.close()
+
+    assert [m["content"] for m in window] == ["answer 3", "question 4", "answer 4"]
+
+
+async def test_unknown_session_is_empty(backend, tmp_path):
+    store = make_store(backend, str(tmp_path))
+    try:
+        assert await store.window("nobody", 10) == []
+    finally:
+        store.close()
+
+
+async def test_compaction_keeps_the_latest_retain_messages(backend, tmp_path):
+    store = make_store(backend, str(tmp_path), retain=4, compact_every=6)
+    try:
+        for i in range(5):
+            await store.append("s1", turn(i))
+
+        window = await store.window("s1", 100)
+    finally:
+        store.close()
+
+    # compacted to the latest 4 after the 6th message, then 4 more appended
+    assert [m["content"] for m in window] == [m["content"] for i in (1, 2, 3, 4) for m in turn(i)]
+    assert store.stats()["compactions"] == 1
+
+
+def test_seed_only_writes_an_empty_session(backend, tmp_path):
+    store = make_store(backend, str(tmp_path))
+    try:
+        assert store.seed("default", turn(0))
+        assert not store.seed("default", turn(1))
+    finally:
+        store.close()
+
+
+def test_legacy_history_seeds_the_default_session(tmp_path):
+    legacy = tmp_path / "chat-history.json"
+    legacy.write_text('{"data": [{"role": "human", "content": "hi"}]}')
+
+    store = create_chat_memory_store("sqlite", str(tmp_path / "memory.sqlite3"), legacy_path=str(legacy))
+    try:
+        assert asyncio.run(store.window("default", 10)) == [{"role": "human", "content": "hi"}]
+    finally:
+        store.close()
+
+
+def append_turns(backend: str, directory: str, worker: int, turns: int):
+    store = make_store(backend, directory, retain=0)
+    try:
+        for i in range(turns):
+            asyncio.run(store.append("shared", turn(worker * 1000 + i)))
+    finally:
+        store.close()
+
+
+def test_concurrent_processes_lose_no_messages(backend, tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=append_turns, args=(backend, str(tmp_path), w, 50)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    store = make_store(backend, str(tmp_path))
+    try:
+        window = asyncio.run(store.window("shared", 1000))
+    finally:
+        store.close()
+    assert len(window) == 4 * 50 * 2
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from sqlmodel import select
+
+from app.config.resources import ResourceEntry, resources
+from app.model.chat_content import ChatContent
+from app.model.chat_session import ChatSession
+from app.schemas.chat_schema import ChatRequest, ChatResponse, ChatSummary
+from app.services import chat_service, chat_summary
+from app.services.llm_service import LLMClient
+from benchmarks.stand_ins import FakeChatModel, HashEmbedder
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    """The messages of every summary prompt sent to the fake model."""
+    client = LLMClient(FakeChatModel(latency_ms=0, tokens_per_second=1_000_000, output_tokens=5))
+    sent: list[list[str]] = []
+    ainvoke_structured = client.ainvoke_structured
+
+    async def record(schema, prompt):
+        if schema is ChatSummary:
+            sent.append([m.content for m in prompt.to_messages()[:-1]])
+        return await ainvoke_structured(schema, prompt)
+
+    monkeypatch.setattr(client, "ainvoke_structured", record)
+    monkeypatch.setitem(resources._entries, "llm_client", ResourceEntry("llm_client", lambda: client))
+    monkeypatch.setitem(resources._entries, "sbert_model", ResourceEntry("sbert_model", HashEmbedder))
+    return sent
+
+
+async def add_turn(db, session_id: str, i: int, answer_id_first: bool = False):
+    question = ChatContent(chat_session_id=session_id, content=f"question {i}", role="human")
+    answer = ChatContent(chat_session_id=session_id, content=f"answer {i}", role="ai")
+    if answer_id_first:
+        # same millisecond ULIDs: the random part can sort the answer before the question
+        answer.id, question.id = sorted([question.id, answer.id])
+    db.add_all([question, answer])
+    await db.commit()
+
+
+async def test_summary_follows_creation_order_not_ulid_order(db, prompts):
+    session = ChatSession(title="t")
+    db.add(session)
+    await db.commit()
+    await add_turn(db, session.id, 1, answer_id_first=True)
+
+    await chat_summary.summarize_session(db, session.id)
+    await add_turn(db, session.id, 2, answer_id_first=True)
+    await chat_summary.summarize_session(db, session.id)
+
+    assert [messages[-2:] for messages in prompts] == [["question 1", "answer 1"], ["question 2", "answer 2"]]
+    # the mark is the last message of the latest turn
+    assert (await db.get(ChatSession, session.id, populate_existing=True)).summary_until == (
+        await db.scalar(select(ChatContent.id).where(ChatContent.content == "answer 2"))
+    )
+
+
+async def test_nothing_new_sends_no_prompt(db, prompts):
+    session = ChatSession(title="t")
+    db.add(session)
+    await db.commit()
+    await add_turn(db, session.id, 1)
+
+    await chat_summary.summarize_session(db, session.id)
+    await chat_summary.summarize_session(db, session.id)
+
+    assert len(prompts) == 1
+
+
+async def test_background_refresh_folds_once_enough_messages_are_new(db, prompts, monkeypatch):
+    monkeypatch.setattr(chat_summary, "REFRESH_AFTER_MESSAGES", 4)
+    session = ChatSession(title="t")
+    db.add(session)
+    await db.commit()
+
+    await add_turn(db, session.id, 1)
+    chat_summary.schedule_summary_refresh(session.id)
+    await asyncio.gather(*chat_summary._tasks)
+    assert prompts == []
+
+    await add_turn(db, session.id, 2)
+    chat_summary.schedule_summary_refresh(session.id)
+    await asyncio.gather(*chat_summary._tasks)
+    assert prompts == [["question 1", "answer 1", "question 2", "answer 2"]]
+
+
+async def test_start_new_chat_schedules_a_refresh(db, prompts, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(chat_service, "schedule_summary_refresh", scheduled.append)
+
+    await chat_service.start_new_chat(ChatRequest(question="how do I pay the invoice"), db, ChatResponse)
+
+    assert scheduled == [await db.scalar(select(ChatSession.id))]
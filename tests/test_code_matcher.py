@@ -0,0 +1,99 @@
+import pytest
+
+from app.model.base_model import generate_ulid
+from app.model.dummy_project import DummyProject
+from app.services.code_matcher import CodeMatcher, ulid_before
+from benchmarks.stand_ins import HashEmbedder
+
+embedder = HashEmbedder()
+
+
+class Encoder:
+    def __init__(self):
+        self.texts: list[str] = []
+        self.fail = False
+
+    async def __call__(self, texts):
+        if self.fail:
+            raise RuntimeError("embedding server down")
+        self.texts.extend(texts)
+        return list(embedder.encode(list(texts)))
+
+
+@pytest.fixture
+def encoder():
+    return Encoder()
+
+
+@pytest.fixture
+def matcher(encoder):
+    return CodeMatcher(encoder, refresh_seconds=3600, refresh_overlap_seconds=60)
+
+
+async def add(db, code: str, id: str | None = None) -> DummyProject:
+    project = DummyProject(id=id or generate_ulid(), code=code, name=f"Project {code}", description=None)
+    db.add(project)
+    await db.commit()
+    return project
+
+
+def test_ulid_before_moves_the_timestamp_back():
+    now = generate_ulid()
+
+    assert ulid_before(now, 0) == now[:10] + "0" * 16
+    assert ulid_before(now, 1) < ulid_before(now, 0)
+    assert ulid_before("", 60) == ""
+
+
+async def test_exact_and_fuzzy_codes_match_without_embedding_the_query(db, matcher, encoder):
+    await add(db, "PIK2")
+    await matcher.refresh(db)
+    loaded = len(encoder.texts)
+
+    assert [m.method for m in await matcher.match("project", "PIK2")] == ["exact"]
+    assert [m.code for m in await matcher.match("project", "pik-2")] == ["PIK2"]
+    assert len(encoder.texts) == loaded
+
+
+async def test_late_committed_row_is_picked_up(db, matcher, encoder):
+    await add(db, "NEW")
+    await matcher.refresh(db)
+    # its ULID was taken 10s ago, before the row already seen
+    late = await add(db, "LATE", ulid_before(generate_ulid(), 10)[:-1] + "1")
+
+    added = await matcher.refresh(db, full=False)
+
+    assert added["project"] == 1
+    assert [m.id for m in await matcher.match("project", "LATE")] == [late.id]
+    # rows in the overlap that are already known are not embedded again
+    assert [text for text in encoder.texts if text.startswith("NEW")] == ["NEW Project NEW"]
+
+
+async def test_full_reload_picks_up_edits_and_keeps_unchanged_embeddings(db, matcher, encoder):
+    edited = await add(db, "OLD")
+    await add(db, "SAME")
+    await add(db, "GONE")
+    await matcher.refresh(db)
+    edited.code = "RENAMED"
+    await db.commit()
+    await db.delete(await db.get(DummyProject, (await matcher.match("project", "GONE"))[0].id))
+    await db.commit()
+    encoder.texts.clear()
+
+    await matcher.refresh(db, full=True)
+
+    assert encoder.texts == ["RENAMED Project OLD"]
+    assert sorted(r.code for r in matcher.indexes["project"].references) == ["RENAMED", "SAME"]
+
+
+async def test_failed_update_after_create_is_left_to_the_next_refresh(db, matcher, encoder):
+    await matcher.refresh(db)
+    project = await add(db, "P1")
+    encoder.fail = True
+
+    await matcher.add_projects([project])
+    assert matcher.size()["project"] == 0
+
+    encoder.fail = False
+    await matcher.refresh(db, full=False)
+    assert matcher.size()["project"] == 1
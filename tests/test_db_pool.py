@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config.db_config import TimedQueuePool
+
+
+async def test_pool_wait_excludes_connect_time(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/pool.db", poolclass=TimedQueuePool, pool_size=1, max_overflow=0)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def slow_connect(dbapi_connection, connection_record):
+        time.sleep(0.2)
+
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("select 1"))
+        pool = engine.pool
+        # the first checkout opened the connection but never waited for one
+        assert pool.wait_count >= 1 and pool.wait_seconds_max < 0.1
+
+        async def hold():
+            async with engine.connect():
+                await asyncio.sleep(0.3)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.05)
+        async with engine.connect() as conn:
+            await conn.execute(text("select 1"))
+        await holder
+
+        assert 0.2 <= pool.wait_seconds_max < 0.5
+    finally:
+        await engine.dispose()
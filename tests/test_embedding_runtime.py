@@ -0,0 +1,51 @@
+import logging
+import os
+
+import numpy as np
+import pytest
+
+from app.config import sbert_config
+from app.services import embedding_runtime
+
+# the `onnx` extra; without it the runtime is not expected to load
+pytest.importorskip("onnxruntime")
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory) -> str:
+    """A one-layer 384-d BERT sentence model with random weights, so nothing is downloaded."""
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    directory = tmp_path_factory.mktemp("tiny-minilm")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *"abcdefghijklmnopqrstuvwxyz0123456789.,?'-():=_*"]
+    (directory / "vocab.txt").write_text("\n".join(vocab + ["##" + c for c in "abcdefghijklmnopqrstuvwxyz0123456789"]))
+    config = BertConfig(
+        vocab_size=len(vocab) + 36, hidden_size=384, num_hidden_layers=1, num_attention_heads=12, intermediate_size=64
+    )
+    BertModel(config).save_pretrained(directory / "hf")
+    BertTokenizerFast(str(directory / "vocab.txt"), do_lower_case=True).save_pretrained(directory / "hf")
+    transformer = models.Transformer(str(directory / "hf"), max_seq_length=64)
+    model = SentenceTransformer(modules=[transformer, models.Pooling(384, "mean"), models.Normalize()], device="cpu")
+    model.save(str(directory / "st"))
+    return str(directory / "st")
+
+
+@pytest.mark.parametrize("runtime", ["onnx", "onnx-int8"])
+def test_onnx_runtime_loads_without_falling_back_to_torch(tiny_model, tmp_path, monkeypatch, caplog, runtime):
+    monkeypatch.setattr(sbert_config, "EMBEDDING_MODEL_NAME", tiny_model)
+    monkeypatch.setenv("EMBEDDING_RUNTIME", runtime)
+    monkeypatch.setenv("EMBEDDING_ONNX_DIR", str(tmp_path))
+    monkeypatch.setenv("EMBEDDING_MIN_COSINE", "0.9")
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+
+    with caplog.at_level(logging.WARNING):
+        model = sbert_config.load_sbert_model()
+
+    # any warning of load_sbert_model means it fell back to torch
+    assert [record.getMessage() for record in caplog.records if record.pathname == sbert_config.__file__ and record.levelno >= logging.WARNING] == []
+    assert model.backend == "onnx"
+    file_name = embedding_runtime.onnx_file_name(runtime, "avx2")
+    assert os.path.exists(os.path.join(embedding_runtime.onnx_directory(tiny_model, str(tmp_path)), file_name))
+    assert model.encode(["hello"]).shape == (1, embedding_runtime.EMBEDDING_DIMENSION)
+    assert np.isfinite(model.encode(embedding_runtime.VALIDATION_SENTENCES)).all()
@@ -0,0 +1,28 @@
+import httpx
+from fastapi import FastAPI
+
+from app.routers import metrics_routes
+from app.services.embedding_service import EmbeddingService, embedding_service
+from app.services.telemetry import metrics
+from benchmarks.stand_ins import HashEmbedder
+
+
+async def test_concurrent_texts_are_encoded_in_one_batch():
+    service = EmbeddingService(HashEmbedder, max_wait_ms=20)
+    try:
+        embeddings = await service.encode_many(["water", "electricity", "parking"])
+    finally:
+        await service.close()
+
+    assert [embedding.shape for embedding in embeddings] == [(384,)] * 3
+    assert service.stats()["batches_total"] == 1 and service.stats()["items_total"] == 3
+
+
+async def test_batcher_stats_are_exposed():
+    app = FastAPI()
+    app.include_router(metrics_routes.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/metrics/embedding")
+
+    assert response.json() == embedding_service.stats()
+    assert "embedding_queue_depth 0" in metrics.render()
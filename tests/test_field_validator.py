@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from app.model.dummy_project import DummyProject
+from app.schemas.ticket_trans_schema import TicketAgenticChatSch
+from app.services.code_matcher import CodeMatcher
+from app.workflow.function import field_validator
+from benchmarks.stand_ins import FakeChatModel, HashEmbedder
+
+embedder = HashEmbedder()
+
+
+async def encode_many(texts):
+    return list(embedder.encode(list(texts)))
+
+
+@pytest.fixture
+async def matcher(db, monkeypatch):
+    db.add(DummyProject(code="PIK2", name="Pantai Indah Kapuk 2", description=None))
+    await db.commit()
+    matcher = CodeMatcher(encode_many)
+    await matcher.refresh(db)
+    monkeypatch.setattr(field_validator, "code_matcher", matcher)
+    return matcher
+
+
+def ticket(project_code: str) -> TicketAgenticChatSch:
+    state = FakeChatModel().fill(TicketAgenticChatSch, random.Random(0))
+    schema = state.ticket_schema.model_copy(update={"project_code": project_code, "unit_code": None})
+    return state.model_copy(update={"long_answer": "Tiket dibuat.", "ticket_schema": schema})
+
+
+async def test_exact_code_leaves_the_answer_unchanged(matcher):
+    assert await field_validator.ticket_field_validator(ticket("PIK2")) == {"long_answer": "Tiket dibuat."}
+
+
+async def test_close_code_asks_about_the_reference_project(matcher):
+    update = await field_validator.ticket_field_validator(ticket("pik-2"))
+
+    assert update == {"long_answer": "Tiket dibuat.\nApakah yang kamu maksud adalah project Pantai Indah Kapuk 2?"}
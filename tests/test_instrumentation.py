@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.workflow import instrumentation
+from app.workflow.instrumentation import NodeMetrics, run_workflow, timed_node
+
+
+@pytest.fixture
+def node_metrics(monkeypatch):
+    metrics = NodeMetrics()
+    monkeypatch.setattr(instrumentation, "node_metrics", metrics)
+    return metrics
+
+
+async def test_sync_and_async_nodes_are_counted(node_metrics):
+    async def translate(state):
+        await asyncio.sleep(0.01)
+        return {"text": state["text"].upper()}
+
+    sync_node = timed_node("validate", lambda state: {"valid": True})
+    async_node = timed_node("translate", translate)
+
+    assert await sync_node({"text": "a"}) == {"valid": True}
+    assert await async_node({"text": "a"}) == {"text": "A"}
+    assert await async_node({"text": "bb"}) == {"text": "BB"}
+
+    stats = node_metrics.stats()
+    assert stats["validate"]["calls"] == 1 and stats["validate"]["errors"] == 0
+    assert stats["translate"]["calls"] == 2
+    assert stats["translate"]["seconds_max"] >= 0.01
+    assert stats["translate"]["state_bytes_last"] == len('{"text": "bb"}')
+
+
+async def test_failures_are_counted_and_reraised(node_metrics):
+    def broken(state):
+        raise ValueError("bad state")
+
+    node = timed_node("broken", broken)
+
+    with pytest.raises(ValueError, match="bad state"):
+        await node({})
+    assert node_metrics.stats()["broken"]["errors"] == 1
+
+
+async def test_run_workflow_collects_the_nodes_that_ran(node_metrics, caplog):
+    first = timed_node("first", lambda state: state)
+    second = timed_node("second", lambda state: state)
+
+    class Workflow:
+        async def ainvoke(self, state):
+            return await second(await first(state))
+
+    with caplog.at_level("INFO", logger="app"):
+        assert await run_workflow(Workflow(), {"n": 1}, name="pipeline") == {"n": 1}
+
+    record = next(record for record in caplog.records if record.getMessage() == "workflow run")
+    assert record.workflow == "pipeline"
+    assert [node["node"] for node in record.nodes] == ["first", "second"]
+    assert instrumentation.current_run.get() is None
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from app.services.llm_service import LLMClient
+from benchmarks.stand_ins import FakeChatModel
+
+
+class Answer(BaseModel):
+    title: str
+    long_answer: str
+
+
+async def test_ainvoke_returns_the_model_answer():
+    client = LLMClient(FakeChatModel(latency_ms=1, tokens_per_second=10_000, output_tokens=5))
+
+    result = await client.ainvoke("hello")
+
+    assert len(result.content.split()) == 5
+    assert client.in_flight == 0
+
+
+async def test_ainvoke_times_out():
+    client = LLMClient(FakeChatModel(latency_ms=500), timeout=0.05)
+
+    with pytest.raises(TimeoutError):
+        await client.ainvoke("hello")
+    assert client.in_flight == 0
+
+
+async def test_semaphore_caps_calls_in_flight():
+    client = LLMClient(FakeChatModel(latency_ms=20, tokens_per_second=10_000, output_tokens=1), max_concurrency=2)
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, client.in_flight)
+            await asyncio.sleep(0.001)
+
+    watcher = asyncio.create_task(watch())
+    await asyncio.gather(*(client.ainvoke(f"question {i}") for i in range(6)))
+    watcher.cancel()
+
+    assert peak == 2
+
+
+async def test_structured_runnable_is_built_once_per_schema():
+    client = LLMClient(FakeChatModel(latency_ms=1, tokens_per_second=10_000, output_tokens=3))
+
+    first = await client.ainvoke_structured(Answer, "hello")
+    await client.ainvoke_structured(Answer, "again")
+
+    assert isinstance(first, Answer)
+    assert list(client._structured) == [Answer]
+
+
+async def test_astream_yields_every_chunk():
+    client = LLMClient(FakeChatModel(latency_ms=1, tokens_per_second=10_000, output_tokens=4))
+
+    chunks = [chunk async for chunk in client.astream("hello")]
+
+    assert len(chunks) == 4
+    assert client.in_flight == 0
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.services.micro_batcher import MicroBatcher
+
+
+async def test_concurrent_items_share_one_batch():
+    batches = []
+
+    def double(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=64, max_wait_ms=20)
+    try:
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+    finally:
+        await batcher.close()
+
+    assert results == [i * 2 for i in range(10)]
+    assert batches == [list(range(10))]
+    assert batcher.stats()["items_total"] == 10
+
+
+async def test_batches_are_cut_at_max_batch_size():
+    batcher = MicroBatcher(lambda items: list(items), max_batch_size=4, max_wait_ms=20)
+    try:
+        results = await batcher.submit_many(list(range(10)))
+    finally:
+        await batcher.close()
+
+    assert results == list(range(10))
+    assert batcher.max_batch_size_seen == 4
+    assert batcher.batches_total == 3
+
+
+async def test_batch_error_reaches_every_caller():
+    def fail(items):
+        raise RuntimeError("model down")
+
+    batcher = MicroBatcher(fail, max_wait_ms=5)
+    try:
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+    finally:
+        await batcher.close()
+
+    assert [str(result) for result in results] == ["model down", "model down"]
+
+
+async def test_cancelled_callers_are_dropped_from_the_batch():
+    seen = []
+
+    def record(items):
+        seen.extend(items)
+        return list(items)
+
+    batcher = MicroBatcher(record, max_wait_ms=50)
+    try:
+        cancelled = asyncio.create_task(batcher.submit("gone"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        assert await batcher.submit("kept") == "kept"
+    finally:
+        await batcher.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert seen == ["kept"]
@@ -0,0 +1,90 @@
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.services.model_registry import ModelRegistry
+
+ARTIFACT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app", "model", "model-randomforest.pkl")
+ROWS = np.random.default_rng(0).uniform(0, 8, size=(200, 4))
+
+
+def add_version(directory, version: str, age: float = 0.0) -> str:
+    path = os.path.join(directory, f"{version}.pkl")
+    shutil.copy(ARTIFACT, path)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    add_version(tmp_path, "model-v1", age=60)
+    return str(tmp_path)
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_current_loads_the_newest_version_once(model_dir):
+    registry = ModelRegistry(model_dir, "model-*.pkl")
+
+    assert not registry.loaded
+    assert registry.current.version == "model-v1"
+    add_version(model_dir, "model-v2")
+    # without polling, `current` keeps returning the loaded model
+    assert registry.current.version == "model-v1"
+
+
+def test_polling_reloads_on_a_background_thread(model_dir, monkeypatch):
+    registry = ModelRegistry(model_dir, "model-*.pkl", poll_seconds=0.02)
+    load_threads = []
+    original_load = registry.load
+
+    def load(version=None):
+        load_threads.append(threading.current_thread().name)
+        return original_load(version)
+
+    monkeypatch.setattr(registry, "load", load)
+    try:
+        assert registry.current.version == "model-v1"
+        add_version(model_dir, "model-v2")
+
+        wait_for(lambda: registry.current.version == "model-v2")
+    finally:
+        registry.stop_polling()
+
+    assert load_threads == ["MainThread", "model-registry-poll"]
+
+
+def test_failed_reload_keeps_the_active_model(model_dir):
+    registry = ModelRegistry(model_dir, "model-*.pkl", poll_seconds=0.02)
+    try:
+        registry.current
+        with open(os.path.join(model_dir, "model-v2.pkl"), "wb") as f:
+            f.write(b"not a pickle")
+        time.sleep(0.1)
+
+        assert registry.current.version == "model-v1"
+    finally:
+        registry.stop_polling()
+
+
+def test_onnx_backend_is_used_when_it_matches_sklearn(model_dir):
+    pytest.importorskip("skl2onnx")
+    registry = ModelRegistry(model_dir, "model-*.pkl", backend="onnx", validation_data=ROWS)
+
+    assert registry.current.backend.name == "onnx"
+
+
+def test_unknown_backend_falls_back_to_sklearn(model_dir):
+    registry = ModelRegistry(model_dir, "model-*.pkl", backend="tvm")
+
+    assert registry.current.backend.name == "sklearn"
@@ -0,0 +1,85 @@
+import datetime
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.config.db_config import get_session
+from app.model.chat_content import ChatContent
+from app.model.chat_session import ChatSession
+from app.routers import chat_services
+from app.services.pagination import NEXT_CURSOR_HEADER
+
+
+@pytest.fixture
+async def client(db):
+    app = FastAPI()
+    app.include_router(chat_services.router)
+    app.dependency_overrides[get_session] = lambda: db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def chat_session(db):
+    session = ChatSession(title="paging")
+    db.add(session)
+    await db.commit()
+    start = datetime.datetime.now()
+    messages = [
+        ChatContent(
+            chat_session_id=session.id, content=f"message {i}", role="human" if i % 2 == 0 else "ai",
+            created_at=start + datetime.timedelta(microseconds=i * 100),
+        )
+        for i in range(7)
+    ]
+    for question, answer in zip(messages[::2], messages[1::2]):
+        # an answer written in the same millisecond as its question can get the smaller ULID
+        answer.id, question.id = sorted([question.id, answer.id])
+    db.add_all(messages)
+    await db.commit()
+    return session.id
+
+
+async def test_history_pages_follow_the_cursor(client, chat_session):
+    pages, after = [], None
+    while True:
+        params = {"limit": 3, **({"after": after} if after else {})}
+        response = await client.get(f"/chat/chat-history/{chat_session}", params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if after is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    contents = [row["content"] for page in pages for row in page]
+    assert contents == [f"message {i}" for i in range(7)]
+    assert "embedding" not in pages[0][0]
+
+
+async def test_history_streams_as_ndjson(client, chat_session):
+    response = await client.get(f"/chat/chat-history/{chat_session}", params={"format": "ndjson"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["content"] for row in rows] == [f"message {i}" for i in range(7)]
+
+
+async def test_session_lists_messages_in_order(client, chat_session):
+    response = await client.get(f"/chat/chat-session/{chat_session}")
+
+    assert [row["content"] for row in response.json()["chat_content"]] == [f"message {i}" for i in range(7)]
+
+
+async def test_malformed_cursor_is_400(client, chat_session):
+    response = await client.get(f"/chat/chat-history/{chat_session}", params={"after": "no-separator"})
+
+    assert response.status_code == 400
+
+
+async def test_unknown_session_is_404(client, db):
+    response = await client.get("/chat/chat-session/missing")
+
+    assert response.status_code == 404
@@ -0,0 +1,53 @@
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+
+from app.routers import predict
+
+ROWS = np.random.default_rng(1).uniform(0, 8, size=(10, 4))
+
+
+@pytest.fixture
+async def client():
+    app = FastAPI()
+    app.include_router(predict.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.parametrize("columns", [
+    [[1.0], [2.0], [3.0]],
+    [[1.0, 2.0], [2.0], [3.0], [4.0]],
+    [[], [], [], []],
+])
+async def test_batch_shape_is_validated(client, columns):
+    response = await client.post("/predict/iris/batch", json={"columns": columns})
+
+    assert response.status_code == 422
+
+
+async def test_batch_rows_are_capped(client, monkeypatch):
+    monkeypatch.setattr(predict, "MAX_BATCH_ROWS", 5)
+
+    response = await client.post("/predict/iris/batch", json={"columns": ROWS.T.tolist()})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("inline_max_rows", [0, 256])
+async def test_chunked_batch_matches_one_predict_call(client, monkeypatch, inline_max_rows):
+    monkeypatch.setattr(predict, "CHUNK_SIZE", 3)
+    monkeypatch.setattr(predict, "INLINE_MAX_ROWS", inline_max_rows)
+    backend = predict.iris_registry.current.backend
+    chunks = []
+    real_predict = backend.predict
+    monkeypatch.setattr(backend, "predict", lambda rows: chunks.append(len(rows)) or real_predict(rows))
+
+    response = await client.post("/predict/iris/batch", json={"columns": ROWS.T.tolist(), "include_proba": True})
+
+    assert response.status_code == 200
+    assert chunks == [3, 3, 3, 1]
+    body = response.json()
+    assert body["predictions"] == backend.predict(ROWS).astype(int).tolist()
+    assert np.allclose(body["probabilities"], backend.predict_proba(ROWS))
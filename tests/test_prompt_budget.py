@@ -0,0 +1,50 @@
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.services import prompt_budget
+from app.services.prompt_budget import estimate_tokens, fit_ranked, fit_recent, message_tokens, trim_sources
+
+
+@pytest.fixture(autouse=True)
+def estimate(monkeypatch):
+    # the tiktoken encoding is downloaded on first use, the estimate needs nothing
+    monkeypatch.setenv("PROMPT_TOKENIZER", "estimate")
+    prompt_budget.tokenizer.cache_clear()
+    yield
+    prompt_budget.tokenizer.cache_clear()
+
+
+def test_estimate_counts_words_by_length_and_punctuation_apart():
+    assert estimate_tokens("hello, world") == 2 + 1 + 2
+    assert prompt_budget.count_tokens("") == 0
+
+
+def test_fit_recent_keeps_the_newest_messages_in_order():
+    messages = [HumanMessage(content=f"message {i}") for i in range(5)]
+
+    kept = fit_recent(messages, 2 * message_tokens(messages[0]))
+
+    assert [m.content for m in kept] == ["message 3", "message 4"]
+
+
+def test_fit_ranked_skips_what_does_not_fit_and_keeps_going():
+    messages = [HumanMessage(content="short"), HumanMessage(content="long " * 50), HumanMessage(content="tiny")]
+
+    assert [m.content for m in fit_ranked(messages, 20)] == ["short", "tiny"]
+
+
+async def test_trim_sources_keeps_the_closest_paragraphs_with_their_title():
+    sources = ["Title A\n\nwater pipes\n\n" + "parking " * 40, "Title B\n\n" + "invoice " * 40]
+
+    async def embed_many(texts):
+        return [[1.0, 0.0] if "water" in text else [0.0, 1.0] for text in texts]
+
+    assert await trim_sources(sources, 10, "water", embed_many) == ["Title A\n\nwater pipes"]
+
+
+async def test_trim_sources_returns_nothing_when_the_budget_is_used_up():
+    async def embed_many(texts):
+        raise AssertionError("nothing to rank")
+
+    assert await trim_sources(["Title\n\nbody"], -5, "query", embed_many) == []
+    assert await trim_sources(["Title\n\nbody"], 100) == ["Title\n\nbody"]
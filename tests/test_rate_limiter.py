@@ -0,0 +1,103 @@
+import secrets
+
+import httpx
+from fastapi import FastAPI
+
+from app.middleware import Middleware, client_identity
+from app.services.rate_limiter import InMemoryRateLimitBackend, RateLimitBackend, RateLimiter, RateLimitRule, parse_rate
+
+
+def scope(authorization: bytes | None = None, ip: str = "10.0.0.1") -> dict:
+    headers = [(b"authorization", authorization)] if authorization else []
+    return {"type": "http", "headers": headers, "client": (ip, 1234)}
+
+
+async def test_bucket_allows_the_limit_then_rejects():
+    backend = InMemoryRateLimitBackend()
+
+    results = [await backend.acquire("k", capacity=3, refill_per_second=0.001) for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert results[-1].retry_after > 0
+
+
+async def test_bucket_refills_over_time(monkeypatch):
+    backend = InMemoryRateLimitBackend()
+    now = [100.0]
+    monkeypatch.setattr("app.services.rate_limiter.time.monotonic", lambda: now[0])
+
+    assert (await backend.acquire("k", capacity=1, refill_per_second=1.0)).allowed
+    assert not (await backend.acquire("k", capacity=1, refill_per_second=1.0)).allowed
+    now[0] += 1.0
+    assert (await backend.acquire("k", capacity=1, refill_per_second=1.0)).allowed
+
+
+async def test_idle_buckets_are_evicted():
+    backend = InMemoryRateLimitBackend(max_keys=2)
+
+    for key in ("a", "b", "c"):
+        await backend.acquire(key, capacity=1, refill_per_second=1.0)
+
+    assert list(backend._buckets) == ["b", "c"]
+
+
+def test_first_matching_rule_wins():
+    llm = RateLimitRule("llm", 1, path_prefixes=("/chat/start-chat",))
+    limiter = RateLimiter(InMemoryRateLimitBackend(), RateLimitRule("default", 10), [llm])
+
+    assert limiter.rule_for("/chat/start-chat/123") is llm
+    assert limiter.rule_for("/predict/iris").name == "default"
+
+
+def test_parse_rate():
+    assert parse_rate("60/minute") == (60, 60.0)
+    assert parse_rate("5/second") == (5, 1.0)
+    assert parse_rate("100/hour") == (100, 3600.0)
+
+
+def test_identity_uses_the_token_only_when_it_matches():
+    assert client_identity(scope(b"Bearer secret"), "secret") == "token:10.0.0.1"
+    assert client_identity(scope(b"Bearer secret", ip="10.0.0.2"), "secret") == "token:10.0.0.2"
+    assert client_identity(scope(b"Bearer guess"), "secret") == "ip:10.0.0.1"
+    assert client_identity(scope(b"Bearer secret"), None) == "ip:10.0.0.1"
+    assert client_identity(scope(), "secret") == "ip:10.0.0.1"
+
+
+def ping_app(limiter: RateLimiter) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(Middleware, rate_limiter=limiter, api_token="secret")
+    return app
+
+
+async def test_random_bearer_tokens_share_the_ip_bucket():
+    app = ping_app(RateLimiter(InMemoryRateLimitBackend(), RateLimitRule("default", 3, 60.0)))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        statuses = [
+            (await client.get("/ping", headers={"Authorization": f"Bearer {secrets.token_hex(8)}"})).status_code
+            for _ in range(5)
+        ]
+        # the real token has a bucket of its own
+        authorized = await client.get("/ping", headers={"Authorization": "Bearer secret"})
+
+    assert statuses == [200, 200, 200, 429, 429]
+    assert authorized.status_code == 200
+
+
+class UnavailableBackend(RateLimitBackend):
+    async def acquire(self, key, capacity, refill_per_second, cost=1.0):
+        raise ConnectionError("redis is down")
+
+
+async def test_backend_errors_fail_open():
+    app = ping_app(RateLimiter(UnavailableBackend(), RateLimitRule("default", 1, 60.0)))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        statuses = [(await client.get("/ping")).status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 200]
@@ -0,0 +1,92 @@
+import json
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+
+from app.config.db_config import get_session
+from app.config.resources import ResourceEntry, resources
+from app.routers import chat_services
+from app.services.remote_embedding import EmbeddingServerUnavailable, RemoteEmbeddingModel, decode_frame, encode_frame
+
+
+def test_frame_round_trip():
+    vectors = np.random.default_rng(0).random((3, 384), dtype=np.float32)
+
+    decoded = decode_frame(encode_frame(vectors))
+
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, vectors)
+    decoded[0, 0] = 1.0  # callers get a writable copy
+
+
+def test_empty_frame_round_trip():
+    assert decode_frame(encode_frame(np.empty((0, 0), dtype=np.float32))).shape == (0, 0)
+
+
+def test_truncated_frame_is_rejected():
+    frame = encode_frame(np.ones((2, 4), dtype=np.float32))
+
+    with pytest.raises(ValueError):
+        decode_frame(frame[:-4])
+
+
+def stand_in(statuses: list[int]):
+    """An embedding server whose /health answers the given statuses in turn, then 200."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return httpx.Response(statuses.pop(0) if statuses else 200)
+        texts = json.loads(request.content)
+        return httpx.Response(200, content=encode_frame(np.ones((len(texts), 4), dtype=np.float32)))
+
+    model = RemoteEmbeddingModel("http://embedding")
+    model._client = httpx.Client(base_url="http://embedding", transport=httpx.MockTransport(handler))
+    return model
+
+
+def test_from_env_needs_a_server(monkeypatch):
+    monkeypatch.delenv("EMBEDDING_SERVER_URL", raising=False)
+    monkeypatch.delenv("EMBEDDING_SERVER_SOCKET", raising=False)
+
+    with pytest.raises(ValueError, match="EMBEDDING_SERVER"):
+        RemoteEmbeddingModel.from_env()
+
+
+def test_from_env_fails_when_the_server_is_down(monkeypatch, tmp_path):
+    monkeypatch.setenv("EMBEDDING_SERVER_SOCKET", str(tmp_path / "missing.sock"))
+    monkeypatch.setenv("EMBEDDING_SERVER_WAIT_SECONDS", "0")
+
+    with pytest.raises(EmbeddingServerUnavailable):
+        RemoteEmbeddingModel.from_env()
+
+
+def test_wait_until_ready_polls_while_the_model_loads():
+    model = stand_in([503, 503])
+
+    model.wait_until_ready(timeout=5, interval=0.01)
+    assert model.encode(["a", "b"]).shape == (2, 4)
+
+
+def test_wait_until_ready_gives_up_after_the_timeout():
+    with pytest.raises(EmbeddingServerUnavailable):
+        stand_in([503] * 100).wait_until_ready(timeout=0.05, interval=0.01)
+
+
+class DownServer:
+    def encode(self, texts, **kwargs):
+        raise EmbeddingServerUnavailable("embedding server at /tmp/embedding.sock: connection refused")
+
+
+async def test_routes_answer_503_when_the_server_is_down(db, monkeypatch):
+    monkeypatch.setitem(resources._entries, "sbert_model", ResourceEntry("sbert_model", DownServer))
+    app = FastAPI()
+    app.include_router(chat_services.router)
+    app.dependency_overrides[get_session] = lambda: db
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        started = await client.post("/chat/start-chat", json={"question": "hello"})
+        continued = await client.post("/chat/start-chat/01ARZ3NDEKTSV4RRFFQ69G5FAV", json={"question": "hello"})
+
+    assert (started.status_code, continued.status_code) == (503, 503)
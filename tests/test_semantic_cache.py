@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.schemas.chat_schema import ChatResponse
+from app.services.semantic_cache import InMemorySemanticCacheBackend, SemanticCache, cache_events
+from app.services.telemetry import metrics
+from benchmarks.stand_ins import HashEmbedder
+
+embedder = HashEmbedder()
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(InMemorySemanticCacheBackend(max_entries=2), enabled=True, threshold=0.9, ttl=3600)
+
+
+async def test_near_duplicate_question_hits(cache):
+    namespace = cache.namespace("start-chat", ChatResponse)
+    await cache.store(namespace, "how do I pay the invoice", embedder.encode("how do I pay the invoice"), {"title": "pay"})
+
+    assert await cache.lookup(namespace, embedder.encode("How do I pay the invoice")) == {"title": "pay"}
+    assert await cache.lookup(namespace, embedder.encode("parking access for tower floor")) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+async def test_namespaces_are_isolated(cache):
+    embedding = embedder.encode("project status")
+    await cache.store(cache.namespace("start-chat", ChatResponse), "project status", embedding, {"title": "a"})
+
+    assert await cache.lookup(cache.namespace("ticket", ChatResponse), embedding) is None
+
+
+async def test_least_recently_used_entry_is_evicted(cache):
+    namespace = "ns"
+    first, second, third = (embedder.encode(text) for text in ("water", "electricity", "parking"))
+    await cache.store(namespace, "water", first, {"answer": 1})
+    await cache.store(namespace, "electricity", second, {"answer": 2})
+    await cache.lookup(namespace, first)  # first is now the most recently used
+    await cache.store(namespace, "parking", third, {"answer": 3})
+
+    assert await cache.lookup(namespace, first) == {"answer": 1}
+    assert await cache.lookup(namespace, second) is None
+    assert cache.stats()["evictions"] == 1
+
+
+async def test_expired_entries_are_not_returned():
+    cache = SemanticCache(InMemorySemanticCacheBackend(), enabled=True, threshold=0.9, ttl=0.01)
+    embedding = np.ones(384, dtype=np.float32)
+    await cache.store("ns", "q", embedding, {"answer": 1})
+
+    await asyncio.sleep(0.02)
+    assert await cache.lookup("ns", embedding) is None
+
+
+async def test_disabled_cache_never_stores(cache):
+    cache.enabled = False
+    await cache.store("ns", "q", np.ones(384), {"answer": 1})
+
+    cache.enabled = True
+    assert await cache.lookup("ns", np.ones(384)) is None
+
+
+async def test_events_are_exported_as_counters(cache):
+    before = dict(cache_events._values)
+    await cache.store("ns", "q", np.ones(384), {"answer": 1})
+    await cache.lookup("ns", np.ones(384))
+    await cache.lookup("ns", -np.ones(384))
+
+    for event in ("hit", "miss", "store"):
+        assert cache_events._values[(event,)] == before.get((event,), 0.0) + 1
+    assert 'semantic_cache_events_total{event="hit"}' in metrics.render()
@@ -0,0 +1,115 @@
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlmodel import select
+
+from app.config.db_config import get_session
+from app.config.resources import ResourceEntry, resources
+from app.model.chat_content import ChatContent
+from app.model.chat_session import ChatSession
+from app.routers import chat_services, chatbot
+from app.services.llm_service import LLMClient
+from app.services.streaming_service import stream_llm_answer
+from benchmarks.stand_ins import FakeChatModel, HashEmbedder
+
+OUTPUT_TOKENS = 5
+
+
+def parse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def llm_client(monkeypatch):
+    client = LLMClient(FakeChatModel(latency_ms=0, tokens_per_second=1_000_000, output_tokens=OUTPUT_TOKENS))
+    for name in ("llm_client", "gemma_llm_client"):
+        monkeypatch.setitem(resources._entries, name, ResourceEntry(name, lambda: client))
+    monkeypatch.setitem(resources._entries, "sbert_model", ResourceEntry("sbert_model", HashEmbedder))
+    return client
+
+
+@pytest.fixture
+async def client(db, llm_client, monkeypatch):
+    async def no_similar_content(*args, **kwargs):
+        # the similarity query is pgvector SQL, the test database is SQLite
+        return []
+
+    monkeypatch.setattr(chat_services, "retrieve_similar_content", no_similar_content)
+    monkeypatch.setattr(chat_services, "schedule_summary_refresh", lambda id: None)
+    app = FastAPI()
+    app.include_router(chat_services.router)
+    app.include_router(chatbot.router)
+    app.dependency_overrides[get_session] = lambda: db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+def assert_tokens_then_done(events: list[tuple[str, dict]]) -> str:
+    names = [name for name, _ in events]
+    assert names == ["token"] * OUTPUT_TOKENS + ["done"]
+    answer = "".join(data["token"] for _, data in events[:-1])
+    assert events[-1][1] == {"long_answer": answer}
+    return answer
+
+
+async def test_chat_stream_persists_the_turn_after_done(client, db):
+    session = ChatSession(title="stream")
+    db.add(session)
+    await db.commit()
+
+    response = await client.post(f"/chat/start-chat/{session.id}/stream", json={"question": "how do I pay"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    answer = assert_tokens_then_done(parse_events(response.text))
+    rows = (await db.execute(
+        select(ChatContent.content, ChatContent.role).where(ChatContent.chat_session_id == session.id).order_by(ChatContent.created_at)
+    )).all()
+    assert [tuple(row) for row in rows] == [("how do I pay", "human"), (answer, "ai")]
+
+
+async def test_chatbot_stream_appends_to_chat_memory(client):
+    response = await client.post("/chatbot/ask/stream", json={"question": "hello", "session_id": "stream-test"})
+
+    answer = assert_tokens_then_done(parse_events(response.text))
+    history = await resources.get("chat_memory").window("stream-test", 10)
+    assert history[-2:] == [{"role": "human", "content": "hello"}, {"role": "ai", "content": answer}]
+
+
+class DisconnectingRequest:
+    """Stands in for the starlette Request, the client goes away after `tokens` tokens."""
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.url = httpx.URL("http://test/stream")
+
+    async def is_disconnected(self) -> bool:
+        self.tokens -= 1
+        return self.tokens < 0
+
+
+async def test_disconnect_stops_the_stream_without_persisting(llm_client):
+    persisted = []
+
+    async def persist(answer):
+        persisted.append(answer)
+
+    events = [event async for event in stream_llm_answer(DisconnectingRequest(2), llm_client, "question", persist)]
+
+    assert [name for name, _ in parse_events("".join(events))] == ["token", "token"]
+    assert persisted == []
+
+
+async def test_persist_failure_is_an_error_event(llm_client):
+    async def persist(answer):
+        raise RuntimeError("database is down")
+
+    events = parse_events("".join([event async for event in stream_llm_answer(DisconnectingRequest(100), llm_client, "q", persist)]))
+
+    assert events[-1] == ("error", {"detail": "database is down"})
+    assert "done" not in [name for name, _ in events]
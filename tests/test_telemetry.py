@@ -0,0 +1,95 @@
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.middleware import Middleware
+from app.services import telemetry
+from app.services.rate_limiter import InMemoryRateLimitBackend, RateLimiter, RateLimitRule
+from app.services.telemetry import MetricsRegistry, metrics, server_span, span, sql_operation
+
+
+@pytest.fixture(autouse=True)
+def fresh_tracer():
+    telemetry.tracer.cache_clear()
+    yield
+    telemetry.tracer.cache_clear()
+
+
+def test_tracing_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("OTEL_ENABLED", raising=False)
+
+    assert telemetry.tracer() is None
+    with span("embedding encode", texts=1) as current:
+        assert current is None
+    with server_span({"method": "GET", "path": "/", "headers": []}) as current:
+        assert current is None
+
+
+def test_enabling_tracing_without_the_sdk_stays_off(monkeypatch):
+    monkeypatch.setenv("OTEL_ENABLED", "true")
+    # None in sys.modules makes the import fail, whether or not the SDK is installed
+    monkeypatch.setitem(sys.modules, "opentelemetry", None)
+
+    assert telemetry.tracer() is None
+
+
+def test_registry_renders_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", (), buckets=(0.1, 1.0))
+    registry.gauge("queue_depth", "Queued items.", lambda: [({"queue": "a"}, 3)])
+    requests.inc(route='/say "hi"')
+    latency.observe(0.5)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/say \\"hi\\""} 1' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{le="1"} 1' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in lines
+    assert "latency_seconds_count 1" in lines
+    assert 'queue_depth{queue="a"} 3' in lines
+
+
+def test_failing_gauge_is_skipped():
+    registry = MetricsRegistry()
+    registry.gauge("broken", "Raises.", lambda: 1 / 0)
+
+    assert registry.render().splitlines() == ["# HELP broken Raises.", "# TYPE broken gauge"]
+
+
+async def test_requests_are_timed_by_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    app.add_middleware(Middleware, rate_limiter=RateLimiter(InMemoryRateLimitBackend(), RateLimitRule("default", 100)))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/items/1")
+        await client.get("/items/2")
+        await client.get("/missing/3")
+
+    rendered = metrics.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"}' in rendered
+    assert 'route="unmatched",status="404"' in rendered
+    assert "/items/1" not in rendered
+
+
+def selects_timed() -> int:
+    series = telemetry.db_query_seconds._series.get(("select",))
+    return series[2] if series else 0
+
+
+async def test_statements_are_timed_by_operation(db):
+    before = selects_timed()
+    await db.execute(text("select 1"))
+
+    assert selects_timed() == before + 1
+    assert sql_operation("  SELECT 1") == "select"
+    assert sql_operation("vacuum") == "other"